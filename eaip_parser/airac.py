@@ -17,7 +17,9 @@ from loguru import logger
 class Airac:
     """Class for general functions relating to AIRAC"""
 
-    def __init__(self):
+    def __init__(self, base_url:str="https://www.aurora.nats.co.uk/htmlAIP/Publications/"):
+        # Where each AIRAC cycle is published
+        self.base_url = base_url
         # First AIRAC date following the last cycle length modification
         self.start_date = "2019-01-02"
         self.base_date = date.fromisoformat(self.start_date)
@@ -27,7 +29,7 @@ class Airac:
     def _initialise(self, date_in:str="") -> int:
         """Calculate the number of AIRAC cycles between any given date and the start date"""
 
-        if date_in != "":
+        if date_in:
             input_date = date.fromisoformat(str(date_in))
         else:
             input_date = date.today()
@@ -56,10 +58,19 @@ class Airac:
 
         return select_cycle
 
+    def cycles(self, start:str, end:str="") -> list:
+        """Return the date of every AIRAC cycle in effect from the start date to the end date"""
+
+        first = self._initialise(start)
+        last = self._initialise(end)
+        if last < first:
+            raise ValueError(f"{end} is before {start}")
+        return [self.base_date + timedelta(days=number * self.cycle_days + 1)
+                for number in range(first, last + 1)]
+
     def url(self, next_cycle:bool=False, date_in:str="") -> str:
         """Return a generated URL based on the AIRAC cycle start date"""
 
-        base_url = "https://www.aurora.nats.co.uk/htmlAIP/Publications/"
         if next_cycle:
             # if the 'next_cycle' variable is passed, generate a URL for the next AIRAC cycle
             base_date = self.cycle(next_cycle=True, date_in=date_in)
@@ -68,7 +79,7 @@ class Airac:
 
         base_post_string = "-AIRAC/html/eAIP/"
 
-        formatted_url = base_url + str(base_date) + base_post_string
+        formatted_url = self.base_url + str(base_date) + base_post_string
         logger.debug(formatted_url)
 
         return formatted_url
@@ -0,0 +1,132 @@
+"""
+eAIP Parser
+Chris Parkinson (@chssn)
+"""
+
+#!/usr/bin/env python3.9
+
+# Standard Libraries
+import hashlib
+import json
+import os
+import re
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+# Third Party Libraries
+from loguru import logger
+
+# Local Libraries
+from eaip_parser import functions, staging
+
+
+def cycle_name(cycle_url:str) -> str:
+    """Returns the cycle date from an eAIP url, which names the cycle in the archive"""
+    cycle = re.search(r"(\d{4}-\d{2}-\d{2})-AIRAC", cycle_url)
+    if not cycle:
+        raise ValueError(f"There isn't an AIRAC cycle in {cycle_url}")
+    return cycle[1]
+
+
+class Archive:
+    """
+    Keeps every cycle's DataFrames as compressed blobs named by the hash of their content, with
+    a manifest per cycle of the blob each file was. A table which is the same in several cycles
+    is only stored once and any archived cycle can be written back out.
+    """
+
+    def __init__(self, root:Optional[str]=None, workers:int=4) -> None:
+        if root is None:
+            root = os.path.join(functions.work_dir, "archive")
+        self.root = root
+        self.objects_dir = os.path.join(root, "objects")
+        self.cycles_dir = os.path.join(root, "cycles")
+        self.workers = workers
+
+    def blob_path(self, digest:str) -> str:
+        """Returns the path of a blob"""
+        return os.path.join(self.objects_dir, digest[:2], digest[2:])
+
+    def manifest_path(self, cycle:str) -> str:
+        """Returns the path of a cycle's manifest"""
+        return os.path.join(self.cycles_dir, f"{cycle}.json")
+
+    def cycles(self) -> list:
+        """Returns every archived cycle, oldest first"""
+        if not os.path.isdir(self.cycles_dir):
+            return []
+        return sorted(name[:-5] for name in os.listdir(self.cycles_dir) if name.endswith(".json"))
+
+    def store(self, file_path:str) -> dict:
+        """Store a file's content unless it's already stored, returning its manifest entry"""
+
+        with open(file_path, "rb") as file:
+            data = file.read()
+        digest = hashlib.sha256(data).hexdigest()
+        blob_path = self.blob_path(digest)
+        if not os.path.exists(blob_path):
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            # Written under a unique name first so a reader never sees part of a blob
+            temp_path = f"{blob_path}.{os.getpid()}.{id(data)}.tmp"
+            with open(temp_path, "wb") as file:
+                file.write(zlib.compress(data))
+            os.replace(temp_path, blob_path)
+        return {"sha256": digest, "size": len(data)}
+
+    def save(self, cycle:str, directory:Optional[str]=None) -> dict:
+        """Archive a DataFrames directory as the given cycle, returning its manifest"""
+
+        if directory is None:
+            directory = os.path.join(functions.work_dir, "DataFrames")
+        file_paths = sorted(
+            os.path.relpath(os.path.join(path, name), directory)
+            for path, _, names in os.walk(directory) for name in names)
+        with ThreadPoolExecutor(max_workers=max(1, self.workers)) as executor:
+            entries = executor.map(
+                lambda name: self.store(os.path.join(directory, name)), file_paths)
+            manifest = {name.replace(os.sep, "/"): entry
+                        for name, entry in zip(file_paths, entries)}
+
+        os.makedirs(self.cycles_dir, exist_ok=True)
+        temp_path = f"{self.manifest_path(cycle)}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump(manifest, file, indent=2, sort_keys=True)
+        os.replace(temp_path, self.manifest_path(cycle))
+        logger.info(f"Archived {len(manifest)} files from {directory} as {cycle}")
+        return manifest
+
+    def load(self, cycle:str) -> dict:
+        """Load a cycle's manifest"""
+        if not os.path.exists(self.manifest_path(cycle)):
+            raise ValueError(f"{cycle} hasn't been archived")
+        with open(self.manifest_path(cycle), "r", encoding="utf-8") as file:
+            return json.load(file)
+
+    def read(self, digest:str) -> bytes:
+        """Read a blob"""
+        with open(self.blob_path(digest), "rb") as file:
+            return zlib.decompress(file.read())
+
+    def materialise(self, cycle:str, destination:str) -> str:
+        """Write an archived cycle out to a directory"""
+
+        manifest = self.load(cycle)
+
+        def write(item:tuple) -> None:
+            name, entry = item
+            file_path = os.path.join(destination, *name.split("/"))
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            with open(file_path, "wb") as file:
+                file.write(self.read(entry["sha256"]))
+
+        os.makedirs(destination, exist_ok=True)
+        with ThreadPoolExecutor(max_workers=max(1, self.workers)) as executor:
+            list(executor.map(write, manifest.items()))
+        logger.info(f"Wrote {len(manifest)} files from {cycle} to {destination}")
+        return destination
+
+    def restore(self, cycle:str) -> None:
+        """Replace the live DataFrames with an archived cycle, keeping the current output"""
+        with staging.StagedOutput(copy=False):
+            self.materialise(cycle, os.path.join(functions.work_dir, "DataFrames"))
@@ -0,0 +1,96 @@
+"""
+eAIP Parser
+Chris Parkinson (@chssn)
+"""
+
+#!/usr/bin/env python3.9
+
+# Standard Libraries
+import json
+import os
+from typing import BinaryIO, Optional
+
+# Local Libraries
+from eaip_parser import functions
+
+
+class AreaFile:
+    """
+    Every area of an ENR 5 section in a single file, with a sidecar index of the byte offset
+    and length of each area so any one of them can be read without scanning the file. The
+    areas can still be exploded into the one file per area layout.
+    """
+
+    def __init__(self, section:str, directory:Optional[str]=None) -> None:
+        self.section = section
+        if directory is None:
+            directory = os.path.join(functions.work_dir, "DataFrames")
+        self.directory = directory
+        self.path = os.path.join(directory, f"{section}.txt")
+        self.index_path = os.path.join(directory, f"{section}.index.json")
+        self.index:dict = {}
+        self._file:Optional[BinaryIO] = None
+
+    def __enter__(self) -> "AreaFile":
+        self.index = {}
+        functions.unshare(self.path)
+        self._file = open( # pylint: disable=consider-using-with
+            self.path, "wb", buffering=functions.WRITE_BUFFER)
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        if self._file:
+            self._file.close()
+            self._file = None
+        functions.unshare(self.index_path)
+        with open(self.index_path, "w", encoding="utf-8") as file:
+            json.dump(self.index, file, indent=2)
+
+    def add(self, area_id:str, text:str) -> None:
+        """Append an area, replacing any earlier area with the same id in the index"""
+
+        if not self._file:
+            raise ValueError(f"{self.path} isn't open for writing")
+        if self._file.tell():
+            # Areas are separated by a newline which isn't part of either of them
+            self._file.write(b"\n")
+        data = text.encode("utf-8")
+        self.index[area_id] = [self._file.tell(), len(data)]
+        self._file.write(data)
+
+    def load(self) -> dict:
+        """Load the index"""
+        with open(self.index_path, "r", encoding="utf-8") as file:
+            self.index = json.load(file)
+        return self.index
+
+    def read(self, area_id:str) -> str:
+        """Read a single area"""
+
+        if not self.index:
+            self.load()
+        try:
+            offset, length = self.index[area_id]
+        except KeyError as error:
+            raise ValueError(f"{area_id} isn't in {self.index_path}") from error
+        with open(self.path, "rb") as file:
+            file.seek(offset)
+            return file.read(length).decode("utf-8")
+
+    def explode(self, directory:Optional[str]=None) -> list:
+        """Write each area to its own file, as written by the one file per area output"""
+
+        if directory is None:
+            directory = self.directory
+        if not self.index:
+            self.load()
+        file_paths = []
+        with open(self.path, "rb") as file:
+            for area_id, (offset, length) in self.index.items():
+                file.seek(offset)
+                file_path = os.path.join(directory, f"{self.section}-{area_id}.txt")
+                functions.unshare(file_path)
+                with open(file_path, "wb") as area:
+                    area.write(file.read(length))
+                file_paths.append(file_path)
+        return file_paths
@@ -0,0 +1,115 @@
+"""
+eAIP Parser
+Chris Parkinson (@chssn)
+"""
+
+#!/usr/bin/env python3.9
+
+# Standard Libraries
+import json
+import multiprocessing
+import os
+import urllib.parse
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+# Third Party Libraries
+from loguru import logger
+
+# Local Libraries
+from eaip_parser import airac, builder, countries, functions
+
+
+class Backfill:
+    """
+    Processes every AIRAC cycle in effect between two dates at once, across as many processes
+    as there are cores, into a store per cycle. Every process shares one conversion cache so a
+    point common to several cycles is only converted once, and the cache is kept for the next
+    backfill. What each cycle's run did is merged into backfill.json.
+    """
+
+    def __init__(
+            self,
+            start:str,
+            end:str="",
+            root:Optional[str]=None,
+            country_code:str="EG",
+            base_url:Optional[str]=None,
+            host_limit:int=4,
+            processes:Optional[int]=None,
+            ) -> None:
+        cycle = airac.Airac(base_url=base_url) if base_url else airac.Airac()
+        self.cycles = cycle.cycles(start, end)
+        self.base_url = cycle.base_url
+        if host_limit < 1:
+            raise ValueError("The host limit must be at least 1")
+        self.country = country_code.upper()
+        self.root = root or functions.work_dir
+        self.host_limit = host_limit
+        self.processes = min(processes or os.cpu_count() or 1, len(self.cycles))
+        self.manifest_path = os.path.join(self.root, "backfill.json")
+        self.cache_path = os.path.join(self.root, "conversions.jsonl")
+
+    def work_dir(self, cycle) -> str:
+        """Returns the working directory for a cycle"""
+        return os.path.join(self.root, "cycles", str(cycle))
+
+    def load_cache(self) -> dict:
+        """Load the conversions kept by previous backfills"""
+
+        cache = {}
+        if os.path.exists(self.cache_path):
+            with open(self.cache_path, "r", encoding="utf-8") as file:
+                for line in file:
+                    entry = json.loads(line)
+                    cache[tuple(entry["key"])] = entry["result"]
+        return cache
+
+    def save_cache(self, cache:dict) -> None:
+        """Keep every conversion for the next backfill"""
+
+        temp_path = f"{self.cache_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            for key, result in cache.items():
+                file.write(json.dumps({"key": list(key), "result": result}) + "\n")
+        os.replace(temp_path, self.cache_path)
+
+    def run(self, no_build:bool=False, only:Optional[list]=None, workers:int=4) -> dict:
+        """Run every cycle and write the merged manifest"""
+
+        os.makedirs(self.root, exist_ok=True)
+        logger.info(f"Backfilling {len(self.cycles)} cycles from {self.cycles[0]} to "
+                    f"{self.cycles[-1]} in {self.processes} processes")
+        context = multiprocessing.get_context("spawn")
+        with context.Manager() as manager:
+            shared = manager.dict(self.load_cache())
+            # Every cycle shares the one cache and the limits on the eAIP and converter hosts
+            conversions = (shared, manager.dict())
+            host_limits = {urllib.parse.urlsplit(url).netloc:
+                           manager.BoundedSemaphore(self.host_limit)
+                           for url in [self.base_url, builder.CONVERTER_URL]}
+            jobs = [{
+                "country": self.country,
+                "work_dir": self.work_dir(cycle),
+                "base_url": self.base_url,
+                "language": None,
+                "host_limits": host_limits,
+                "conversions": conversions,
+                "next_cycle": False,
+                "date_in": str(cycle),
+                "no_build": no_build,
+                "only": only,
+                "workers": workers,
+                } for cycle in self.cycles]
+            with ProcessPoolExecutor(max_workers=self.processes, mp_context=context) as executor:
+                results = list(executor.map(countries.run_country, jobs))
+            self.save_cache(dict(shared))
+
+        merged = {"cycles": {str(cycle): result for cycle, result in zip(self.cycles, results)}}
+        countries.save(self.manifest_path, merged)
+
+        failed = [cycle for cycle, result in merged["cycles"].items() if result["status"] != "ok"]
+        logger.info(f"{len(self.cycles) - len(failed)} of {len(self.cycles)} cycles backfilled")
+        if failed:
+            raise RuntimeError(f"Unable to backfill {', '.join(failed)}, see {self.manifest_path}")
+        return merged
@@ -6,12 +6,15 @@ Chris Parkinson (@chssn)
 #!/usr/bin/env python3.9
 
 # Standard Libraries
+import glob
 import json
 import os
 import re
 import shutil
+import threading
 import time
 from dataclasses import dataclass
+from typing import Optional
 
 # Third Party Libraries
 import requests # type: ignore
@@ -19,7 +22,8 @@ from loguru import logger
 import pandas as pd # type: ignore
 
 # Local Libraries
-from eaip_parser import functions, lists, process
+from eaip_parser import (
+    cassette, coordinates, functions, lists, manifest, metrics, process, staging)
 
 
 @dataclass
@@ -40,13 +44,18 @@ class ArcSettings:
     arcres:int=9
     polynl:int=1
 
+# Where coordinates are converted
+CONVERTER_URL = "https://kilojuliett.ch/webtools/geo/json"
+
 class KiloJuliett:
     """A class to build using https://kilojuliett.ch/webtools/geo/coordinatesconverter"""
 
-    def __init__(self, base_url:str="https://kilojuliett.ch/webtools/geo/json") -> None:
+    def __init__(self, base_url:str=CONVERTER_URL) -> None:
         self.request_settings: dict = {}
         self.base_url = base_url
         self.rate_limit = 0
+        # request_output may be called from several pipeline tasks at once
+        self._rate_lock = threading.Lock()
 
     def settings(
             self,
@@ -165,7 +174,17 @@ class KiloJuliett:
         https://kilojuliett.ch/webtools/geo/coordinatesconverter
         """
 
-        self.request_settings["input"] = data_in
+        # Identical requests are only sent once, the result is shared through the conversion table.
+        # The normalised request is what's sent so every spelling of it gets the same result.
+        data_in = coordinates.normalise(data_in)
+        key = (self.base_url, json.dumps(self.request_settings, sort_keys=True), data_in)
+        return coordinates.table.get(key, lambda: self.convert(data_in))
+
+    def convert(self, data_in:str) -> str:
+        """Sends a single request to be transformed"""
+
+        # Each request gets its own copy of the settings so concurrent calls can't clash
+        request_data = dict(self.request_settings, input=data_in)
         logger.trace(data_in)
 
         headers = {
@@ -187,20 +206,26 @@ class KiloJuliett:
             }
 
         # Apply a rate limiter
-        if self.rate_limit > 1000:
-            logger.info(f"Rate limit hit for {self.base_url} - Pausing for 10 seconds...")
-            self.rate_limit = 0
-            time.sleep(10)
-            logger.info("Continuing...")
+        with self._rate_lock:
+            if self.rate_limit > 1000:
+                logger.info(f"Rate limit hit for {self.base_url} - Pausing for 10 seconds...")
+                self.rate_limit = 0
+                time.sleep(10)
+                logger.info("Continuing...")
 
         attempt = 0
         while attempt < 5:
-            response = requests.post(
-                self.base_url,
-                headers=headers,
-                data=self.request_settings,
-                timeout=30
-                )
+            # The converter is shared by every country and cycle being run at once
+            with cassette.host_limit(self.base_url):
+                response = cassette.request(
+                    "POST",
+                    self.base_url,
+                    headers=headers,
+                    data=request_data,
+                    timeout=30
+                    )
+            metrics.collector.count("http_requests")
+            metrics.collector.count("bytes_downloaded", len(response.content))
 
             # If any response other than 200, pause and try again
             if response.status_code != 200:
@@ -208,7 +233,8 @@ class KiloJuliett:
                 logger.warning(f"Unable to connect to {self.base_url} - Attempt {attempt}")
                 time.sleep(5)
                 continue
-            self.rate_limit += 1
+            with self._rate_lock:
+                self.rate_limit += 1
             json_load = json.loads(response.text)
             if self.check_in_uk(json_load["txt"]):
                 return json_load["txt"]
@@ -232,21 +258,65 @@ class BuildAirports:
         self.icao_title = ""
         self.no_build = no_build
 
-    def run(self) -> None:
-        """Run the full process"""
+    @metrics.timed("build", "AD-2")
+    def run(self, icao_filter:Optional[list]=None, force:bool=False) -> None:
+        """
+        Run the full process, optionally only for the given aerodromes. Aerodromes whose scraped
+        data hasn't changed since they were last built are skipped unless force is set.
+        """
+
+        df_ad_1_3 = self.df_ad_1_3
+        if icao_filter:
+            df_ad_1_3 = df_ad_1_3[df_ad_1_3["icao_designator"].isin(icao_filter)]
+        # The aerodromes are built in a staged copy of DataFrames which replaces it on success
+        with staging.StagedOutput():
+            build_manifest = manifest.Manifest()
+            # Keep every conversion so a failed build can be rerun quickly
+            coordinates.table.open_journal(
+                os.path.join(functions.work_dir, "DataFrames", "conversions.jsonl"))
+            try:
+                self.build_aerodromes(df_ad_1_3, build_manifest, force)
+            finally:
+                coordinates.table.close_journal()
+
+    def build_aerodromes(
+            self,
+            df_ad_1_3:pd.DataFrame,
+            build_manifest:manifest.Manifest,
+            force:bool=False,
+            ) -> None:
+        """Build each of the given aerodromes, skipping those which haven't changed"""
 
         # For each aerodrome defined in AD 1.3 do this
-        for index, row in self.df_ad_1_3.iterrows():
+        for index, row in df_ad_1_3.iterrows():
+            metrics.collector.count("rows")
             self.coord = ""
             self.icao = row['icao_designator']
             self.icao_title = str(row["location"]).title()
+
+            stage = f"build AD-2.{self.icao}"
+            digest = build_manifest.digest(
+                glob.glob(os.path.join(functions.work_dir, "DataFrames", f"{self.icao}_*.csv")),
+                {"location": row["location"], "kilojuliett": self.build.request_settings,
+                 "no_build": self.no_build}
+                )
+            output_dir = os.path.join(
+                functions.work_dir, "DataFrames", "Output", "Airports", self.icao)
+            if (not force and build_manifest.unchanged(stage, digest) and
+                os.path.exists(output_dir)):
+                logger.info(f"Skipping {self.icao} as its data hasn't changed")
+                metrics.collector.count("cache_hits")
+                continue
+
             logger.info(f"Building files for {self.icao} ({index})")
+            build_manifest.forget(stage)
             # Create the directory to store output
             self.airport_dir = self.create_dirs(self.icao)
             self.txt_airspace()
             self.text_basic()
             self.text_positions()
             self.text_runway()
+            build_manifest.update(stage, digest)
 
     @staticmethod
     def create_dirs(dir_name:str) -> str:
@@ -268,7 +338,7 @@ class BuildAirports:
         """Returns something representing the opposing runway"""
 
         # Search the given string - not sure what the X suffix denotes but G seems to be grass
-        rwy = re.match(r"^(\d{1,2})([LRCXG]{1})?$", str(runway).upper())
+        rwy = lists.patterns["runway"].match(str(runway).upper())
         if runway is not None and rwy:
             # Flip the number using modulo 36 as we're dealing in 2 digit numbers
             if int(rwy[1]) >= 0 and int(rwy[1]) <= 36:
@@ -341,6 +411,7 @@ class BuildAirports:
         data:dict = {}
         ats_data = self.load_df("AA - ATS.csv", True)
         file_path = os.path.join(self.airport_dir, "Airspace.txt")
+        functions.unshare(file_path)
         with open(file_path, "w", encoding="utf-8") as file:
             for index, row in ats_data.iterrows():
                 # Loop through every row the filter returns for this icao aerodrome
@@ -407,6 +478,7 @@ class BuildAirports:
             coord_out = f"{xform_split[0]} {xform_split[1]}"
         self.coord = coord_out
         file_path = os.path.join(self.airport_dir, "Basic.txt")
+        functions.unshare(file_path)
         with open(file_path, "w", encoding="utf-8") as file:
             file.write(self.icao_title + "\n")
             file.write(coord_out + "\n")
@@ -445,6 +517,7 @@ class BuildAirports:
         data["ignore"] = []
         runway_data = self.load_df("AA - COMMS.csv", True)
         file_path = os.path.join(self.airport_dir, "Positions.txt")
+        functions.unshare(file_path)
         with open(file_path, "w", encoding="utf-8") as file:
             for index, row in runway_data.iterrows():
                 logger.trace(index)
@@ -491,6 +564,7 @@ class BuildAirports:
                 data["freq"] = freq_out
                 if data["callsign"] == f"{self.icao}_TWR":
                     file_basic = os.path.join(self.airport_dir, "Basic.txt")
+                    functions.unshare(file_basic, keep=True)
                     with open(file_basic, "a", encoding="utf-8") as file_b:
                         file_b.write(data["freq"])
 
@@ -529,6 +603,7 @@ class BuildAirports:
         data["ignore"] = []
         runway_data = self.load_df("AA - RUNWAYS.csv", True)
         file_path = os.path.join(self.airport_dir, "Runway.txt")
+        functions.unshare(file_path)
         with open(file_path, "w", encoding="utf-8") as file:
             for index, row in runway_data.iterrows():
                 if (index not in data["ignore"] and
@@ -536,7 +611,7 @@ class BuildAirports:
                     pd.notna(row["bearing"])):
                     data["opp_runway"] = self.runway_flip_flop(row["rwy"])
                     data["runway"] = row["rwy"]
-                    data["bearing"] = re.match(r"^(\d+(\.\d+)?)", str(row["bearing"]))
+                    data["bearing"] = lists.patterns["bearing"].match(str(row["bearing"]))
                     data["bearing"] = round(float(data["bearing"][1]))
                     data["coords"] = lists.Regex.coordinates(row["coordinates"], False)
 
@@ -545,8 +620,8 @@ class BuildAirports:
                     if len(df_opp) == 1:
                         # Add this index to the ignore list so we don't duplicate
                         data["ignore"].append(df_opp.index)
-                        data["opp_bearing"] = re.match(
-                            r"^(\d+(\.\d+)?)", str(df_opp["bearing"].values[0]))
+                        data["opp_bearing"] = lists.patterns["bearing"].match(
+                            str(df_opp["bearing"].values[0]))
                         data["opp_bearing"] = round(float(data["opp_bearing"][1]))
                         data["opp_coords"] = lists.Regex.coordinates(
                             df_opp["coordinates"].values[0], False)
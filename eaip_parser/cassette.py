@@ -0,0 +1,154 @@
+"""
+eAIP Parser
+Chris Parkinson (@chssn)
+"""
+
+#!/usr/bin/env python3.9
+
+# Standard Libraries
+import contextlib
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+import urllib.parse
+from dataclasses import dataclass
+from typing import Any, Optional
+
+# Third Party Libraries
+import requests # type: ignore
+from loguru import logger
+
+# Local Libraries
+
+
+class CassetteMissError(Exception):
+    """Exception raised when a request being replayed was never recorded"""
+
+    def __init__(self, url:str, message:str="No recorded exchange for the given url") -> None:
+        self.url = url
+        self.message = message
+        super().__init__(f"{self.message} - {self.url}")
+
+
+@dataclass
+class ReplayResponse:
+    """The parts of a requests.Response which the parser uses"""
+    status_code:int
+    content:bytes
+
+    @property
+    def text(self) -> str:
+        """The decoded content"""
+        return self.content.decode("utf-8")
+
+    def raise_for_status(self) -> None:
+        """Raise an HTTPError for 4xx and 5xx responses"""
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code} Error")
+
+
+class Cassette:
+    """
+    Records every HTTP exchange to a gzipped JSON lines file, or replays a previous recording
+    with an optional simulated latency per request
+    """
+
+    def __init__(self, file_path:str, mode:str="replay", latency:float=0.0) -> None:
+        if mode not in ["record", "replay"]:
+            raise ValueError("Cassette mode must be one of ['record', 'replay']")
+        self.file_path = file_path
+        self.mode = mode
+        self.latency = latency
+        self.exchanges:dict = {}
+        self._cursor:dict = {}
+        self._lock = threading.Lock()
+        self._previous:Optional[Cassette] = None
+        if self.mode == "replay":
+            self.load()
+
+    def __enter__(self) -> "Cassette":
+        global active # pylint: disable=global-statement
+        self._previous = active
+        active = self
+        return self
+
+    def __exit__(self, *args) -> None:
+        global active # pylint: disable=global-statement
+        active = self._previous
+        if self.mode == "record":
+            self.save()
+
+    @staticmethod
+    def key(method:str, url:str, data:Optional[dict]=None) -> str:
+        """Returns a key identifying a request by its method, url and body"""
+        body = urllib.parse.urlencode(sorted((data or {}).items()))
+        return hashlib.sha256(f"{method.upper()} {url}\n{body}".encode("utf-8")).hexdigest()
+
+    def load(self) -> None:
+        """Load a recording"""
+        with gzip.open(self.file_path, "rt", encoding="utf-8") as file:
+            for line in file:
+                exchange = json.loads(line)
+                self.exchanges.setdefault(exchange["key"], []).append(exchange)
+        logger.info(f"Loaded {len(self.exchanges)} recorded requests from {self.file_path}")
+
+    def save(self) -> None:
+        """Save the recording"""
+        directory = os.path.dirname(self.file_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        with gzip.open(self.file_path, "wt", encoding="utf-8") as file:
+            for exchanges in self.exchanges.values():
+                for exchange in exchanges:
+                    file.write(json.dumps(exchange, separators=(",", ":")) + "\n")
+        logger.info(f"Recorded {len(self.exchanges)} requests to {self.file_path}")
+
+    def request(self, method:str, url:str, **kwargs) -> Any:
+        """Make or replay a request"""
+
+        key = self.key(method, url, kwargs.get("data"))
+        if self.mode == "replay":
+            with self._lock:
+                if key not in self.exchanges:
+                    raise CassetteMissError(url)
+                # Repeated requests are replayed in the order they were recorded
+                exchanges = self.exchanges[key]
+                cursor = self._cursor.get(key, 0)
+                exchange = exchanges[min(cursor, len(exchanges) - 1)]
+                self._cursor[key] = cursor + 1
+            if self.latency:
+                time.sleep(self.latency)
+            return ReplayResponse(exchange["status"], exchange["text"].encode("utf-8"))
+
+        response = requests.request(method, url, **kwargs)
+        with self._lock:
+            self.exchanges.setdefault(key, []).append({
+                "key": key,
+                "method": method.upper(),
+                "url": url,
+                "status": response.status_code,
+                "text": response.content.decode("utf-8", errors="replace"),
+                })
+        return response
+
+
+# The cassette in use, if any
+active:Optional[Cassette] = None
+
+# Limits on the requests in flight to each host, keyed by host and port. These are shared
+# across processes when several countries or cycles are run at once.
+host_limits:dict = {}
+
+def host_limit(url:str) -> Any:
+    """Returns the limit on the requests in flight to a url's host, if it has one"""
+    limit = host_limits.get(urllib.parse.urlsplit(url).netloc)
+    return limit if limit is not None else contextlib.nullcontext()
+
+def request(method:str, url:str, **kwargs) -> Any:
+    """Make a request through the active cassette, or directly if there isn't one"""
+    if active is None:
+        return requests.request(method, url, **kwargs)
+    return active.request(method, url, **kwargs)
@@ -0,0 +1,85 @@
+"""
+eAIP Parser
+Chris Parkinson (@chssn)
+"""
+
+#!/usr/bin/env python3.9
+
+# Standard Libraries
+import json
+import os
+import threading
+from typing import Callable, Optional
+
+# Third Party Libraries
+from loguru import logger
+
+# Local Libraries
+from eaip_parser import functions, metrics
+
+
+class Checkpoint:
+    """
+    Records the stages, and the items within them, which a run has completed so that an
+    interrupted run can be resumed without redoing them. A checkpoint belongs to a single run,
+    given by its run id, so a resumed run for a different AIRAC cycle starts from scratch.
+    """
+
+    def __init__(self, run_id:str, resume:bool=False, file_path:Optional[str]=None) -> None:
+        if file_path is None:
+            file_path = os.path.join(functions.work_dir, "DataFrames", "checkpoint.json")
+        self.file_path = file_path
+        self.run_id = run_id
+        self.completed:dict = {}
+        self._lock = threading.Lock()
+        if resume and os.path.exists(self.file_path):
+            with open(self.file_path, "r", encoding="utf-8") as file:
+                saved = json.load(file)
+            if saved.get("run_id") == run_id:
+                self.completed = saved.get("completed", {})
+                logger.info(f"Resuming from {self.file_path}")
+            else:
+                logger.warning(f"The checkpoint is for {saved.get('run_id')}, starting again")
+        self.save()
+
+    def done(self, stage:str, item:Optional[str]=None) -> bool:
+        """Checks if a stage, or an item within it, has been completed"""
+        with self._lock:
+            completed = self.completed.get(stage)
+            if completed is True or item is None:
+                return completed is True
+            return item in (completed or [])
+
+    def complete(self, stage:str, item:Optional[str]=None) -> None:
+        """Record a stage, or an item within it, as complete"""
+        with self._lock:
+            if item is None:
+                self.completed[stage] = True
+            elif self.completed.get(stage) is not True:
+                self.completed.setdefault(stage, [])
+                if item not in self.completed[stage]:
+                    self.completed[stage].append(item)
+            self.save()
+
+    def save(self) -> None:
+        """Save the checkpoint"""
+        directory = os.path.dirname(self.file_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        temp_path = f"{self.file_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump({"run_id": self.run_id, "completed": self.completed}, file, indent=2)
+        os.replace(temp_path, self.file_path)
+
+    def stage(self, stage:str, func:Callable) -> Callable:
+        """Wraps a stage so that it's skipped if it has already been completed"""
+
+        def run(*args, **kwargs) -> None:
+            if self.done(stage):
+                logger.info(f"Skipping {stage} as it was completed before the run was resumed")
+                with metrics.collector.stage("checkpoint", stage):
+                    metrics.collector.count("cache_hits")
+                return
+            func(*args, **kwargs)
+            self.complete(stage)
+        return run
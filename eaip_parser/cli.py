@@ -0,0 +1,345 @@
+"""
+eAIP Parser
+Chris Parkinson (@chssn)
+"""
+
+#!/usr/bin/env python3.9
+
+# Standard Libraries
+import argparse
+import os
+import re
+import sys
+from typing import Optional
+
+# Third Party Libraries
+from loguru import logger
+
+# Local Libraries
+import eaip_parser
+
+# Heavy dependencies (pandas, bs4, requests, GitPython) are only imported by the commands which
+# need them so that small commands such as 'airac' start quickly.
+# pylint: disable=import-outside-toplevel
+
+
+def sections(value:str) -> list:
+    """Parse a comma separated list of sections such as 'ENR-3.2,AD-2.EGLL'"""
+
+    items = [item.strip().upper() for item in value.split(",") if item.strip()]
+    for item in items:
+        if not re.match(r"^(AD|ENR|GEN)(\-[0-6](\.(\d{1,2}|[A-Z]{4}))?)?$", item):
+            raise argparse.ArgumentTypeError(f"{item} is not a valid section")
+    return items
+
+def country_url(value:str) -> tuple:
+    """Parse a country's eAIP url such as 'EH=https://eaip.lvnl.nl/'"""
+
+    country, _, url = value.partition("=")
+    if not re.match(r"^[A-Za-z]{2}$", country) or not url:
+        raise argparse.ArgumentTypeError(f"{value} should be a country code, '=' and a url")
+    return country.upper(), url
+
+def cmd_airac(args:argparse.Namespace) -> None:
+    """Print the AIRAC cycle date or url"""
+    from eaip_parser import airac
+
+    cycle = airac.Airac()
+    if args.url:
+        print(cycle.url(next_cycle=args.next, date_in=args.date))
+    else:
+        print(cycle.cycle(next_cycle=args.next, date_in=args.date))
+
+def cmd_scrape(args:argparse.Namespace) -> None:
+    """Scrape the eAIP"""
+    from eaip_parser import cassette, webscrape
+
+    scrape = webscrape.Webscrape(
+        next_cycle=not args.current,
+        country_code=args.country,
+        date_in=args.date,
+        base_url=args.base_url,
+        html_backend=args.html_backend,
+        )
+    # Only start from scratch if everything is being scraped
+    clean = not args.only and not args.no_clean and not args.resume
+    if args.record or args.replay:
+        with cassette.Cassette(
+            args.record or args.replay,
+            mode="record" if args.record else "replay",
+            latency=args.latency,
+            ):
+            scrape.scrape(only=args.only, workers=args.workers, resume=args.resume, clean=clean)
+    else:
+        scrape.scrape(only=args.only, workers=args.workers, resume=args.resume, clean=clean)
+
+def cmd_countries(args:argparse.Namespace) -> None:
+    """Run several countries at once"""
+    from eaip_parser import countries
+
+    runner = countries.MultiCountry(
+        args.countries.split(","),
+        base_urls=dict(args.base_url or []),
+        host_limit=args.host_limit,
+        processes=args.processes,
+        )
+    runner.run(no_build=args.no_build, only=args.only, workers=args.workers,
+               next_cycle=not args.current, date_in=args.date)
+    print(runner.manifest_path)
+
+def cmd_backfill(args:argparse.Namespace) -> None:
+    """Process every cycle between two dates"""
+    from eaip_parser import backfill
+
+    runner = backfill.Backfill(
+        args.start,
+        args.end,
+        country_code=args.country,
+        base_url=args.base_url,
+        host_limit=args.host_limit,
+        processes=args.processes,
+        )
+    runner.run(no_build=args.no_build, only=args.only, workers=args.workers)
+    print(runner.manifest_path)
+
+def cmd_process(args:argparse.Namespace) -> None:
+    """Process previously scraped data"""
+    from eaip_parser import functions, process, staging, webscrape
+
+    with staging.StagedOutput():
+        proc = webscrape.ProcessData()
+        proc.consolidate_enr_5 = args.consolidate_enr_5
+        proc.process(no_build=args.no_build, only=args.only)
+        # The aerodrome tables are combined so AD 2 is always processed in full
+        if functions.section_selected("AD-2", args.only):
+            process.ProcessAerodromes().run()
+
+def cmd_build(args:argparse.Namespace) -> None:
+    """Build the aerodrome output"""
+    from eaip_parser import builder, functions
+
+    if functions.section_selected("AD-2", args.only):
+        builder.BuildAirports(no_build=args.no_build).run(
+            icao_filter=functions.section_items("AD-2", args.only), force=args.force)
+
+def cmd_compare(args:argparse.Namespace) -> None:
+    """Compare the processed data against the UK Sector File"""
+    from eaip_parser import compare, functions
+
+    comp = compare.UkSectorFile()
+    report = compare.ComparisonReport(args.report, args.format) if args.report else None
+    try:
+        if functions.section_selected("ENR-3.2", args.only):
+            comp.airways_rnav(report)
+        if functions.section_selected("ENR-4.1", args.only):
+            comp.vor_dme_tacan(report)
+    finally:
+        if report:
+            report.close()
+
+def cmd_delta(args:argparse.Namespace) -> None:
+    """Write the changes between two cycles' scraped tables"""
+    from eaip_parser import delta, functions
+
+    current = args.current or os.path.join(functions.work_dir, "DataFrames")
+    delta.CycleDelta(args.previous, current).write(args.report, args.format)
+
+def cmd_validate(args:argparse.Namespace) -> None:
+    """Check the airway segment tracks and distances against their coordinates"""
+    from eaip_parser import geodesy
+
+    validator = geodesy.SegmentValidator(
+        track_tolerance=args.track_tolerance,
+        distance_tolerance=args.distance_tolerance,
+        magnetic_variation=args.variation,
+        )
+    validator.run(report_path=args.report)
+
+def cmd_explode(args:argparse.Namespace) -> None:
+    """Split the consolidated ENR 5 files into one file per area"""
+    from eaip_parser import functions, staging
+    from eaip_parser.area_file import AreaFile
+
+    with staging.StagedOutput():
+        for section in ["ENR-5.1", "ENR-5.2", "ENR-5.3"]:
+            if functions.section_selected(section, args.only):
+                file_paths = AreaFile(section).explode()
+                logger.info(f"Wrote {len(file_paths)} {section} areas")
+
+def cmd_archive(args:argparse.Namespace) -> None:
+    """Save, list or restore archived cycles"""
+    from eaip_parser import archive
+
+    store = archive.Archive(root=args.root)
+    if args.action == "list":
+        for cycle in store.cycles():
+            print(cycle)
+        return
+    if not args.cycle:
+        raise ValueError(f"A cycle is needed to {args.action}")
+    if args.action == "save":
+        store.save(args.cycle)
+    elif args.action == "restore":
+        if args.destination:
+            print(store.materialise(args.cycle, args.destination))
+        else:
+            store.restore(args.cycle)
+
+def cmd_rollback(args:argparse.Namespace) -> None: # pylint: disable=unused-argument
+    """Point DataFrames back at the previous generation"""
+    from eaip_parser import staging
+
+    print(staging.rollback())
+
+def cmd_all(args:argparse.Namespace) -> None:
+    """Run the full scrape, process, build and compare"""
+    from eaip_parser import archive, compare, webscrape
+
+    # Run the webscraper
+    scrape = webscrape.Webscrape()
+    scrape.proc.consolidate_enr_5 = args.consolidate_enr_5
+    scrape.run(
+        prometheus_path=args.prometheus,
+        archive=archive.Archive() if args.archive else None,
+        workers=args.workers,
+        incremental=args.incremental,
+        previous_dir=args.previous,
+        streaming=args.stream,
+        resume=args.resume,
+        )
+
+    # Run the comparison
+    comp = compare.UkSectorFile()
+    comp.airways_rnav()
+    comp.vor_dme_tacan()
+
+def parser() -> argparse.ArgumentParser:
+    """Returns the command line parser"""
+
+    consolidate_help = "Write each ENR 5 section to one indexed file instead of one per area"
+    main_parser = argparse.ArgumentParser(
+        prog="eaip_parser", description="eAIP Parser and Sector File Validator")
+    main_parser.add_argument("--debug", action="store_true", help="Enable debug logging")
+    main_parser.add_argument("--prometheus", help="Write run metrics to this Prometheus file")
+    main_parser.add_argument("--workers", type=int, default=4, help="Number of worker threads")
+    main_parser.add_argument(
+        "--incremental", action="store_true", help="Only rerun stages whose inputs have changed")
+    main_parser.add_argument(
+        "--stream", action="store_true", help="Process each table as soon as it is scraped")
+    main_parser.add_argument(
+        "--previous", metavar="DIR", help="The previous cycle's DataFrames, to process changes")
+    main_parser.add_argument(
+        "--resume", action="store_true", help="Carry on from where an interrupted run stopped")
+    main_parser.add_argument("--consolidate-enr-5", action="store_true", help=consolidate_help)
+    main_parser.add_argument(
+        "--archive", action="store_true", help="Save the cycle's DataFrames to the archive")
+    main_parser.set_defaults(func=cmd_all)
+    subparsers = main_parser.add_subparsers(title="commands")
+
+    only_help = "Comma separated list of sections, for example ENR-3.2,AD-2.EGLL"
+
+    cmd = subparsers.add_parser("airac", help="Show the AIRAC cycle")
+    cmd.add_argument("--next", action="store_true", help="Show the next cycle")
+    cmd.add_argument("--date", default="", help="Show the cycle in effect on this date")
+    cmd.add_argument("--url", action="store_true", help="Show the eAIP url for the cycle")
+    cmd.set_defaults(func=cmd_airac)
+
+    cmd = subparsers.add_parser("scrape", help="Scrape the eAIP")
+    cmd.add_argument("--only", type=sections, help=only_help)
+    cmd.add_argument("--country", default="EG", help="Two character country code")
+    cmd.add_argument("--current", action="store_true", help="Scrape the current cycle")
+    cmd.add_argument("--date", default="", help="Scrape the cycle in effect on this date")
+    cmd.add_argument("--base-url", help="Override the eAIP publication url")
+    cmd.add_argument("--no-clean", action="store_true", help="Keep previously scraped data")
+    cmd.add_argument(
+        "--resume", action="store_true", help="Carry on from where an interrupted scrape stopped")
+    cmd.add_argument("--html-backend", choices=["auto", "bs4", "lxml"], default="auto",
+                     help="Html table parser, 'auto' uses lxml for the route pages")
+    cassette_group = cmd.add_mutually_exclusive_group()
+    cassette_group.add_argument("--record", metavar="PATH", help="Record traffic to a cassette")
+    cassette_group.add_argument("--replay", metavar="PATH", help="Replay traffic from a cassette")
+    cmd.add_argument("--latency", type=float, default=0.0, help="Replay latency in seconds")
+    cmd.set_defaults(func=cmd_scrape)
+
+    cmd = subparsers.add_parser("countries", help="Run several countries at once")
+    cmd.add_argument("countries", help="Comma separated list of country codes, for example EG,EH")
+    cmd.add_argument("--base-url", type=country_url, action="append",
+                     help="A country's eAIP publication url, for example EH=https://...")
+    cmd.add_argument("--only", type=sections, help=only_help)
+    cmd.add_argument("--no-build", action="store_true", help="Skip coordinate conversion")
+    cmd.add_argument("--current", action="store_true", help="Run the current cycle")
+    cmd.add_argument("--date", default="", help="Run the cycle in effect on this date")
+    cmd.add_argument("--host-limit", type=int, default=4, help="Requests in flight per host")
+    cmd.add_argument("--processes", type=int, help="Number of countries run at once")
+    cmd.set_defaults(func=cmd_countries)
+
+    cmd = subparsers.add_parser("backfill", help="Process every cycle between two dates")
+    cmd.add_argument("start", help="The first cycle is the one in effect on this date")
+    cmd.add_argument("end", nargs="?", default="", help="The last cycle, today's if not given")
+    cmd.add_argument("--country", default="EG", help="Two character country code")
+    cmd.add_argument("--base-url", help="Override the eAIP publication url")
+    cmd.add_argument("--only", type=sections, help=only_help)
+    cmd.add_argument("--no-build", action="store_true", help="Skip coordinate conversion")
+    cmd.add_argument("--host-limit", type=int, default=4, help="Requests in flight per host")
+    cmd.add_argument("--processes", type=int, help="Number of cycles run at once")
+    cmd.set_defaults(func=cmd_backfill)
+
+    cmd = subparsers.add_parser("process", help="Process previously scraped data")
+    cmd.add_argument("--only", type=sections, help=only_help)
+    cmd.add_argument("--no-build", action="store_true", help="Skip coordinate conversion")
+    cmd.add_argument("--consolidate-enr-5", action="store_true", help=consolidate_help)
+    cmd.set_defaults(func=cmd_process)
+
+    cmd = subparsers.add_parser("build", help="Build the aerodrome output")
+    cmd.add_argument("--only", type=sections, help=only_help)
+    cmd.add_argument("--no-build", action="store_true", help="Skip coordinate conversion")
+    cmd.add_argument("--force", action="store_true", help="Rebuild unchanged aerodromes")
+    cmd.set_defaults(func=cmd_build)
+
+    cmd = subparsers.add_parser("compare", help="Compare against the UK Sector File")
+    cmd.add_argument("--only", type=sections, help="ENR-3.2 (airways) and/or ENR-4.1 (navaids)")
+    cmd.add_argument("--report", metavar="PATH", help="Write a machine readable report")
+    cmd.add_argument("--format", choices=["json", "jsonl"], default="jsonl", help="Report format")
+    cmd.set_defaults(func=cmd_compare)
+
+    cmd = subparsers.add_parser("delta", help="List the changes between two cycles")
+    cmd.add_argument("previous", help="The previous cycle's DataFrames directory")
+    cmd.add_argument("current", nargs="?", help="The current cycle's DataFrames directory")
+    cmd.add_argument("--report", metavar="PATH", default="delta.jsonl", help="Change list path")
+    cmd.add_argument("--format", choices=["json", "jsonl"], default="jsonl", help="Report format")
+    cmd.set_defaults(func=cmd_delta)
+
+    cmd = subparsers.add_parser("validate", help="Check the ENR-3.2 segment tracks and distances")
+    cmd.add_argument("--report", metavar="PATH", help="Write every segment to a csv report")
+    cmd.add_argument("--track-tolerance", type=float, default=5.0, help="Degrees")
+    cmd.add_argument("--distance-tolerance", type=float, default=0.2, help="Nautical miles")
+    cmd.add_argument("--variation", type=float, default=0.0,
+                     help="Magnetic variation in degrees, east positive")
+    cmd.set_defaults(func=cmd_validate)
+
+    cmd = subparsers.add_parser("explode", help="Split the consolidated ENR 5 files by area")
+    cmd.add_argument("--only", type=sections, help="ENR-5.1, ENR-5.2 and/or ENR-5.3")
+    cmd.set_defaults(func=cmd_explode)
+
+    cmd = subparsers.add_parser("archive", help="Save, list or restore archived cycles")
+    cmd.add_argument("action", choices=["save", "list", "restore"], help="What to do")
+    cmd.add_argument("cycle", nargs="?", help="The cycle date, for example 2024-01-25")
+    cmd.add_argument("--root", metavar="DIR", help="The archive directory")
+    cmd.add_argument("--destination", metavar="DIR",
+                     help="Restore to this directory instead of replacing DataFrames")
+    cmd.set_defaults(func=cmd_archive)
+
+    cmd = subparsers.add_parser("rollback", help="Restore the previous run's DataFrames")
+    cmd.set_defaults(func=cmd_rollback)
+
+    return main_parser
+
+def main(argv:Optional[list]=None) -> None:
+    """Parse the command line and run the selected command"""
+
+    args = parser().parse_args(argv)
+    logger.remove()
+    logger.add(sys.stderr, level="DEBUG" if args.debug else "INFO")
+    if args.func is not cmd_airac:
+        logger.info(f"eAIP Parser and Sector File Validator - {eaip_parser.__VERSION__}")
+    args.func(args)
@@ -7,8 +7,10 @@ Chris Parkinson (@chssn)
 
 # Standard Libraries
 import difflib
+import json
 import os
 import re
+from typing import Iterator, Optional
 
 # Third Party Libraries
 from loguru import logger
@@ -17,6 +19,72 @@ from loguru import logger
 from eaip_parser import functions
 
 
+class ComparisonReport:
+    """
+    Streams comparison results to disk as either JSON Lines or a single JSON document. Each
+    entry is written as soon as it is added so only the summary counts are held in memory.
+    """
+
+    def __init__(self, file_path:str, output_format:str="jsonl") -> None:
+        if output_format not in ["json", "jsonl"]:
+            raise ValueError("Report format must be one of ['json', 'jsonl']")
+        self.file_path = file_path
+        self.output_format = output_format
+        self.counts = {
+            "files": 0,
+            "added": 0,
+            "removed": 0,
+            "modified": 0,
+        }
+        self._files:set = set()
+        functions.unshare(file_path)
+        self._file = open(file_path, "w", encoding="utf-8")
+        if self.output_format == "json":
+            self._file.write('{"entries": [')
+        self._first = True
+
+    def __enter__(self) -> "ComparisonReport":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def add(self, entry:dict) -> None:
+        """Write a single comparison entry to the report"""
+
+        if entry["change"] not in ["added", "removed", "modified"]:
+            raise ValueError(f"Unknown change kind {entry['change']}")
+        self.counts[entry["change"]] += 1
+        if entry["file"] not in self._files:
+            self._files.add(entry["file"])
+            self.counts["files"] += 1
+
+        if self.output_format == "json":
+            if not self._first:
+                self._file.write(", ")
+            self._file.write(json.dumps(entry))
+        else:
+            self._file.write(json.dumps({"type": "entry", **entry}) + "\n")
+        self._first = False
+
+    def summary(self) -> dict:
+        """Return the summary counts"""
+        return {**self.counts, "total": self.counts["added"] + self.counts["removed"] +
+                self.counts["modified"]}
+
+    def close(self) -> None:
+        """Write the summary and close the report"""
+
+        if self._file.closed:
+            return
+        if self.output_format == "json":
+            self._file.write(f'], "summary": {json.dumps(self.summary())}}}\n')
+        else:
+            self._file.write(json.dumps({"type": "summary", **self.summary()}) + "\n")
+        self._file.close()
+        logger.info(f"Comparison report written to {self.file_path} - {self.summary()}")
+
+
 class UkSectorFile:
     """Carry out validation of the UK Sector File"""
 
@@ -76,8 +144,55 @@ class UkSectorFile:
         with open(file_path, "r", encoding="utf-8") as file:
             return [line.rstrip() for line in file]
 
-    def compare(self, file_a:str, file_b:str):
+    @staticmethod
+    def record_id(line:str) -> str:
+        """Returns the record identifier for a line, comments are identified by the whole line"""
+        if line.startswith(";"):
+            return line
+        return line.split(maxsplit=1)[0]
+
+    def keyed_records(self, file_path:str) -> dict:
+        """Read a file into a dict of lines keyed by record id, duplicate ids are numbered"""
+        records:dict = {}
+        for line in self.read_file(file_path):
+            if not line.strip():
+                continue
+            key = self.record_id(line)
+            if key in records:
+                idx = 1
+                while f"{key}#{idx}" in records:
+                    idx += 1
+                key = f"{key}#{idx}"
+            records[key] = line
+
+        return records
+
+    def compare_records(self, file_a:str, file_b:str) -> Iterator[dict]:
+        """Yield a change entry for each record added, removed or modified between two files"""
+        records_a = self.keyed_records(file_a)
+        records_b = self.keyed_records(file_b)
+        file_name = os.path.basename(file_b)
+
+        for key, line_a in records_a.items():
+            line_b = records_b.get(key)
+            if line_b is None:
+                yield {"file": file_name, "record": key, "change": "removed",
+                       "old": line_a, "new": None}
+            elif line_a != line_b:
+                yield {"file": file_name, "record": key, "change": "modified",
+                       "old": line_a, "new": line_b}
+        for key, line_b in records_b.items():
+            if key not in records_a:
+                yield {"file": file_name, "record": key, "change": "added",
+                       "old": None, "new": line_b}
+
+    def compare(self, file_a:str, file_b:str, report:Optional[ComparisonReport]=None):
         """Compare two items"""
+        if report is not None:
+            for entry in self.compare_records(file_a, file_b):
+                report.add(entry)
+            return
+
         # Read file contents into variables
         lines_a = self.read_file(file_a)
         lines_b = self.read_file(file_b)
@@ -92,7 +207,7 @@ class UkSectorFile:
         for line in diff:
             print(line.rstrip("\n"))
 
-    def airways_rnav(self):
+    def airways_rnav(self, report:Optional[ComparisonReport]=None):
         """Run validation on rnav airways"""
 
         # Put all of the current sector file (csf) airways into a list
@@ -111,10 +226,10 @@ class UkSectorFile:
         logger.debug(scraped_rnav_upper)
 
         for file, file_path in sectorfile_rnav_lower.items():
-            self.compare(file_path, scraped_rnav_lower[file])
+            self.compare(file_path, scraped_rnav_lower[file], report)
 
-    def vor_dme_tacan(self):
+    def vor_dme_tacan(self, report:Optional[ComparisonReport]=None):
         """Run comparison on VOR DME TACAN lists"""
         file_a = os.path.join(functions.work_dir, "UK-Sector-File", "Navaids", "VOR_UK.txt")
         file_b = os.path.join(functions.work_dir, "DataFrames", "VOR_UK.txt")
-        self.compare(file_a, file_b)
+        self.compare(file_a, file_b, report)
@@ -0,0 +1,242 @@
+"""
+eAIP Parser
+Chris Parkinson (@chssn)
+"""
+
+#!/usr/bin/env python3.9
+
+# Standard Libraries
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Hashable, Iterable, Iterator, Optional, TextIO
+
+# Third Party Libraries
+from loguru import logger
+
+# Local Libraries
+from eaip_parser import functions, metrics
+
+
+def normalise(data_in:str) -> str:
+    """Collapse the whitespace in a conversion request so equal requests are spelt the same"""
+    return " ".join(str(data_in).split())
+
+def point_request(coord:str) -> str:
+    """
+    Returns the request for a single coordinate, which has to be sent twice due to 3rd party
+    limitations
+    """
+    coord = normalise(coord)
+    return f"{coord} {coord}"
+
+
+class ConversionTable:
+    """
+    Interns the result of every coordinate conversion so that each distinct request is only
+    converted once, however many stages ask for it
+    """
+
+    def __init__(self) -> None:
+        self.results:dict = {}
+        self.hits = 0
+        self.misses = 0
+        self._pending:dict = {}
+        self._lock = threading.Lock()
+        self._journal:Optional[TextIO] = None
+
+    def __len__(self) -> int:
+        return len(self.results)
+
+    def clear(self) -> None:
+        """Forget every conversion"""
+        with self._lock:
+            self.results = {}
+            self.hits = 0
+            self.misses = 0
+
+    @staticmethod
+    def read_journal(file_path:str) -> dict:
+        """Returns the conversions in a journal"""
+
+        results = {}
+        if os.path.exists(file_path):
+            with open(file_path, "r", encoding="utf-8") as file:
+                for line in file:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # The last line written before the run was killed
+                        continue
+                    results[tuple(entry["key"])] = entry["result"]
+        return results
+
+    def open_journal(self, file_path:str) -> None:
+        """
+        Write every new conversion to a file as soon as it's made, after loading those already
+        in it, so the conversions from a failed run don't have to be made again
+        """
+
+        self.close_journal()
+        results = self.read_journal(file_path)
+        with self._lock:
+            self.results.update(results)
+        functions.unshare(file_path, keep=True)
+        with self._lock:
+            # Kept open for the rest of the run
+            self._journal = open( # pylint: disable=consider-using-with
+                file_path, "a", encoding="utf-8")
+
+    def merge_journal(self, file_path:str) -> int:
+        """
+        Load the conversions from another journal, such as the previous cycle's, so only points
+        which have changed since are converted. Those loaded are written to the open journal so
+        the next cycle can use them too. Returns how many were loaded.
+        """
+
+        results = self.read_journal(file_path)
+        with self._lock:
+            new = {key: result for key, result in results.items() if key not in self.results}
+            self.results.update(new)
+            if self._journal:
+                for key, result in new.items():
+                    self._journal.write(json.dumps({"key": list(key), "result": result}) + "\n")
+                self._journal.flush()
+        return len(new)
+
+    def close_journal(self) -> None:
+        """Stop writing conversions to the journal"""
+        with self._lock:
+            if self._journal:
+                self._journal.close()
+                self._journal = None
+
+    def get(self, key:Hashable, convert:Callable[[], str]) -> str:
+        """
+        Returns the interned result for a key, calling convert if it hasn't been seen before.
+        If another thread is already converting the same key then wait for its result.
+        """
+
+        while True:
+            with self._lock:
+                if key in self.results:
+                    self.hits += 1
+                    metrics.collector.count("cache_hits")
+                    return self.results[key]
+                event = self._pending.get(key)
+                if event is None:
+                    event = self._pending[key] = threading.Event()
+                    break
+            # If the other thread failed the loop tries the conversion again
+            event.wait()
+
+        try:
+            result = convert()
+            with self._lock:
+                self.results[key] = result
+                self.misses += 1
+                if self._journal and isinstance(key, tuple):
+                    self._journal.write(json.dumps({"key": list(key), "result": result}) + "\n")
+                    self._journal.flush()
+            return result
+        finally:
+            with self._lock:
+                del self._pending[key]
+            event.set()
+
+
+class SharedConversionTable(ConversionTable):
+    """
+    A conversion table which also shares its conversions with other processes through dicts
+    held by a multiprocessing manager. The first process to claim a request converts it and the
+    others wait for its result, so a point needed by several processes is only converted once.
+
+    A claim expires after claim_ttl seconds so one left by a process which died is taken over
+    by another, and a process gives up waiting for a result after timeout seconds.
+    """
+
+    def __init__(
+            self,
+            shared:Any,
+            claims:Any,
+            poll:float=0.05,
+            claim_ttl:float=180.0,
+            timeout:float=600.0,
+            ) -> None:
+        super().__init__()
+        self.shared = shared
+        self.claims = claims
+        self.poll = poll
+        self.claim_ttl = claim_ttl
+        self.timeout = timeout
+        self.owner = uuid.uuid4().hex
+
+    def claim(self, key:Hashable) -> bool:
+        """Claim a request for this process, taking over an expired claim"""
+
+        claim = self.claims.setdefault(key, (self.owner, time.time() + self.claim_ttl))
+        if claim[0] == self.owner:
+            return True
+        if claim[1] < time.time() and self.claims.get(key) == claim:
+            # Two processes taking over the same claim at once only convert it twice
+            logger.warning(f"Taking over the expired claim on {key}")
+            self.claims[key] = (self.owner, time.time() + self.claim_ttl)
+            return True
+        return False
+
+    def release(self, key:Hashable) -> None:
+        """Give up this process's claim on a request"""
+        claim = self.claims.get(key)
+        if claim is not None and claim[0] == self.owner:
+            self.claims.pop(key, None)
+
+    def get(self, key:Hashable, convert:Callable[[], str]) -> str:
+        def convert_shared() -> str:
+            deadline = time.monotonic() + self.timeout
+            while True:
+                result = self.shared.get(key)
+                if result is not None:
+                    metrics.collector.count("cache_hits")
+                    return result
+                if self.claim(key):
+                    break
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"Gave up waiting for another process to convert {key}")
+                # Another process is converting it, or failed to and gave up its claim
+                time.sleep(self.poll)
+            try:
+                result = convert()
+                self.shared[key] = result
+            finally:
+                self.release(key)
+            return result
+
+        return super().get(key, convert_shared)
+
+
+# Shared by every builder so a point converted by one stage is served to the others
+table = ConversionTable()
+
+def prefetch(build, requests:Iterable[str], workers:int=4) -> int:
+    """
+    Convert each distinct request in bulk ahead of the stages which need them, returning how
+    many distinct requests there were
+    """
+
+    unique = list(dict.fromkeys(normalise(request) for request in requests))
+    logger.info(f"Converting {len(unique)} distinct coordinates")
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        list(executor.map(metrics.collector.bind(build.request_output), unique))
+    return len(unique)
+
+def convert_in_order(build, requests:Iterable[str], workers:int=4) -> Iterator[str]:
+    """
+    Submit every request for conversion up front and yield the results in the order they were
+    requested, each as soon as it's back, so the caller can write one while the rest convert
+    """
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        yield from executor.map(metrics.collector.bind(build.request_output), requests)
@@ -0,0 +1,162 @@
+"""
+eAIP Parser
+Chris Parkinson (@chssn)
+"""
+
+#!/usr/bin/env python3.9
+
+# Standard Libraries
+import json
+import multiprocessing
+import os
+import re
+import time
+import urllib.parse
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+# Third Party Libraries
+from loguru import logger
+
+# Local Libraries
+from eaip_parser import airac, builder, cassette, coordinates, functions, webscrape
+
+
+def save(file_path:str, data:dict) -> None:
+    """Save a merged manifest, replacing the previous one in a single rename"""
+    temp_path = f"{file_path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as file:
+        json.dump(data, file, indent=2, sort_keys=True)
+    os.replace(temp_path, file_path)
+
+def run_country(job:dict) -> dict:
+    """
+    Run a single country's pipeline in its own working directory, returning a summary of the
+    run. This is called in a worker process so any error is recorded rather than raised. If the
+    job has shared conversions they're used in place of this process's own.
+    """
+
+    start = time.perf_counter()
+    functions.work_dir = job["work_dir"]
+    os.makedirs(job["work_dir"], exist_ok=True)
+    cassette.host_limits.update(job["host_limits"])
+    if job.get("conversions"):
+        coordinates.table = coordinates.SharedConversionTable(*job["conversions"])
+    summary = {"country": job["country"], "work_dir": job["work_dir"], "status": "failed"}
+    try:
+        scrape = webscrape.Webscrape(
+            next_cycle=job["next_cycle"],
+            country_code=job["country"],
+            date_in=job["date_in"],
+            base_url=job["base_url"],
+            language=job["language"],
+            )
+        summary["cycle_url"] = scrape.cycle_url
+        scrape.run(no_build=job["no_build"], only=job["only"], workers=job["workers"])
+        summary["status"] = "ok"
+    except Exception as error: # pylint: disable=broad-exception-caught
+        logger.error(f"Unable to run {job['country']} - {error}")
+        summary["error"] = f"{type(error).__name__}: {error}"
+    summary["seconds"] = round(time.perf_counter() - start, 3)
+
+    data_dir = os.path.join(job["work_dir"], "DataFrames")
+    summary["dataframes"] = os.path.realpath(data_dir)
+    for key, file_name in [("stages", "manifest.json"), ("metrics", "metrics.json")]:
+        file_path = os.path.join(data_dir, file_name)
+        if os.path.exists(file_path):
+            with open(file_path, "r", encoding="utf-8") as file:
+                summary[key] = json.load(file)
+    return summary
+
+
+class MultiCountry:
+    """
+    Runs the pipeline for several countries at once, each in its own worker process and working
+    directory, so a full refresh takes about as long as the slowest country. Countries which
+    share a host share a limit on the requests in flight to it. What each run did is merged
+    into a single manifest, countries.json.
+    """
+
+    def __init__(
+            self,
+            countries:list,
+            root:Optional[str]=None,
+            base_urls:Optional[dict]=None,
+            languages:Optional[dict]=None,
+            host_limit:int=4,
+            processes:Optional[int]=None,
+            ) -> None:
+        self.countries = [country.upper() for country in countries]
+        for country in self.countries:
+            if not re.match(r"^[A-Z]{2}$", country):
+                raise ValueError(f"Expected a two character country code but got '{country}'")
+        if len(set(self.countries)) != len(self.countries):
+            raise ValueError("Each country can only be run once")
+        if host_limit < 1:
+            raise ValueError("The host limit must be at least 1")
+        self.root = root or functions.work_dir
+        self.base_urls = {code.upper(): url for code, url in (base_urls or {}).items()}
+        # Only the UK eAIP is published at the default url
+        missing = [country for country in self.countries
+                   if country != "EG" and country not in self.base_urls]
+        if missing:
+            raise ValueError(f"There isn't an eAIP url for {', '.join(missing)}")
+        self.languages = {code.upper(): lang for code, lang in (languages or {}).items()}
+        self.host_limit = host_limit
+        self.processes = processes or len(self.countries)
+        self.manifest_path = os.path.join(self.root, "countries.json")
+
+    def work_dir(self, country:str) -> str:
+        """Returns the working directory for a country"""
+        return os.path.join(self.root, "countries", country)
+
+    def base_url(self, country:str) -> str:
+        """Returns the eAIP publication url for a country"""
+        if country in self.base_urls:
+            return self.base_urls[country]
+        return airac.Airac().base_url
+
+    def run(
+            self,
+            no_build:bool=False,
+            only:Optional[list]=None,
+            workers:int=4,
+            next_cycle:bool=True,
+            date_in=0,
+            ) -> dict:
+        """Run every country and write the merged manifest"""
+
+        hosts = {country: urllib.parse.urlsplit(self.base_url(country)).netloc
+                 for country in self.countries}
+        # Every country converts its coordinates with the same converter
+        converter = urllib.parse.urlsplit(builder.CONVERTER_URL).netloc
+        logger.info(f"Running {', '.join(self.countries)} in {self.processes} processes")
+        context = multiprocessing.get_context("spawn")
+        with context.Manager() as manager:
+            limits = {host: manager.BoundedSemaphore(self.host_limit)
+                      for host in set(hosts.values()) | {converter}}
+            jobs = [{
+                "country": country,
+                "work_dir": self.work_dir(country),
+                "base_url": self.base_url(country),
+                "language": self.languages.get(country),
+                "host_limits": {hosts[country]: limits[hosts[country]],
+                                converter: limits[converter]},
+                "next_cycle": next_cycle,
+                "date_in": date_in,
+                "no_build": no_build,
+                "only": only,
+                "workers": workers,
+                } for country in self.countries]
+            with ProcessPoolExecutor(max_workers=self.processes, mp_context=context) as executor:
+                results = list(executor.map(run_country, jobs))
+
+        merged = {"countries": {result["country"]: result for result in results}}
+        save(self.manifest_path, merged)
+
+        failed = [result["country"] for result in results if result["status"] != "ok"]
+        for result in results:
+            logger.info(f"{result['country']} {result['status']} in {result['seconds']}s")
+        if failed:
+            raise RuntimeError(f"Unable to run {', '.join(failed)}, see {self.manifest_path}")
+        return merged
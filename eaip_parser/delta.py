@@ -0,0 +1,134 @@
+"""
+eAIP Parser
+Chris Parkinson (@chssn)
+"""
+
+#!/usr/bin/env python3.9
+
+# Standard Libraries
+import hashlib
+import json
+import os
+import re
+from typing import Iterator, Optional
+
+# Third Party Libraries
+import pandas as pd # type: ignore
+from loguru import logger
+
+# Local Libraries
+from eaip_parser.compare import ComparisonReport
+
+# Columns which identify a record within a section. Rows in any other section are identified by
+# their content, so a change to them is reported as one removal and one addition.
+record_keys = {
+    "AD-1.3": ["icao_designator"],
+    "ENR-4.1": ["id"],
+    "ENR-4.4": ["name"],
+}
+
+
+class CycleDelta:
+    """Compares the scraped tables from one AIRAC cycle with those from another, row by row"""
+
+    def __init__(self, previous_dir:str, current_dir:str) -> None:
+        self.previous_dir = previous_dir
+        self.current_dir = current_dir
+
+    @staticmethod
+    def is_table(file_name:str) -> bool:
+        """Checks if a file is a scraped table rather than processed output"""
+        return bool(re.match(r"^((AD|ENR|GEN)\-\d\.\d{1,2}(_\d+)?|[A-Z]{4}_\d+)\.csv$", file_name))
+
+    def tables(self) -> list:
+        """Returns the names of the tables in either cycle"""
+
+        names = set()
+        for directory in [self.previous_dir, self.current_dir]:
+            if os.path.exists(directory):
+                names.update(file[:-4] for file in os.listdir(directory) if self.is_table(file))
+        return sorted(names)
+
+    @staticmethod
+    def row_hash(row:dict) -> str:
+        """Returns a hash of a row's content"""
+        return hashlib.sha256(json.dumps(row, sort_keys=True).encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def load(file_path:str) -> pd.DataFrame:
+        """Load a scraped table as text, without the index written by to_csv"""
+
+        if not os.path.exists(file_path):
+            return pd.DataFrame()
+        table = pd.read_csv(file_path, dtype=str, keep_default_na=False)
+        return table.drop(columns=[col for col in table.columns if col == "Unnamed: 0"])
+
+    def keyed_rows(self, table_name:str, table:pd.DataFrame) -> dict:
+        """Returns the rows of a table by their record key along with a hash of each row"""
+
+        keys = record_keys.get(table_name.split("_")[0])
+        if keys and not set(keys) <= set(table.columns):
+            keys = None
+        rows:dict = {}
+        for row in table.to_dict("records"):
+            row_hash = self.row_hash(row)
+            key = " ".join(row[col] for col in keys) if keys else row_hash[:16]
+            # Duplicate keys are numbered in the order they appear
+            unique, count = key, 1
+            while unique in rows:
+                count += 1
+                unique = f"{key}#{count}"
+            rows[unique] = (row_hash, row)
+        return rows
+
+    def compare_table(self, table_name:str) -> Iterator[dict]:
+        """Yields the added, removed and modified records in a table"""
+
+        old = self.keyed_rows(
+            table_name, self.load(os.path.join(self.previous_dir, f"{table_name}.csv")))
+        new = self.keyed_rows(
+            table_name, self.load(os.path.join(self.current_dir, f"{table_name}.csv")))
+        for key, (row_hash, row) in new.items():
+            if key not in old:
+                yield {"file": table_name, "record": key, "change": "added",
+                       "old": None, "new": row}
+            elif old[key][0] != row_hash:
+                yield {"file": table_name, "record": key, "change": "modified",
+                       "old": old[key][1], "new": row}
+        for key, (_, row) in old.items():
+            if key not in new:
+                yield {"file": table_name, "record": key, "change": "removed",
+                       "old": row, "new": None}
+
+    def changes(self) -> Iterator[dict]:
+        """Yields every change between the two cycles"""
+        for table_name in self.tables():
+            yield from self.compare_table(table_name)
+
+    def write(self, file_path:str, output_format:str="jsonl") -> dict:
+        """Write the change list to a report and return its summary"""
+
+        with ComparisonReport(file_path, output_format) as report:
+            for change in self.changes():
+                report.add(change)
+            summary = report.summary()
+        logger.info(f"{summary['added']} added, {summary['removed']} removed and "
+                    f"{summary['modified']} modified records across {summary['files']} tables")
+        return summary
+
+
+def previous_conversions(previous_dir:Optional[str], name:str) -> dict:
+    """
+    Returns the coordinate conversions saved by a previous cycle as a dictionary keyed by the
+    record name and its unconverted coordinates
+    """
+
+    if not previous_dir:
+        return {}
+    file_path = os.path.join(previous_dir, f"{name}.csv")
+    if not os.path.exists(file_path):
+        return {}
+    table = pd.read_csv(file_path, dtype=str, keep_default_na=False)
+    if "source" not in table.columns:
+        return {}
+    return {(row["index"], row["source"]): row["lat/lon"] for row in table.to_dict("records")}
@@ -6,21 +6,30 @@ Chris Parkinson (@chssn)
 #!/usr/bin/env python3.9
 
 # Standard Libraries
+import glob
 import math
 import os
 import re
 import shutil
 import subprocess
+import threading
+import time
+from typing import Any, Optional
 
 # Third Party Libraries
-import git
+import numpy as np
+import pandas as pd # type: ignore
 from loguru import logger
 
 # Local Libraries
+from eaip_parser import lists
 
 work_dir = os.path.dirname(__file__)
 logger.debug(f"Working directory is {work_dir}")
 
+# Write buffer for the larger outputs
+WRITE_BUFFER = 1 << 16
+
 def copy_files(file:str, destination:str) -> None:
     """Copy files from A to B"""
 
@@ -30,19 +39,134 @@ def copy_files(file:str, destination:str) -> None:
 
     shutil.copy(file, destination)
 
+def unshare(file_path:str, keep:bool=False) -> None:
+    """
+    Break the hard link between a staged file and the live output before the file is rewritten,
+    so the live copy isn't changed in place. A file which is only appended to keeps its content.
+    """
+
+    try:
+        if os.stat(file_path).st_nlink < 2:
+            return
+    except FileNotFoundError:
+        return
+    if keep:
+        temp_path = f"{file_path}.tmp"
+        shutil.copy2(file_path, temp_path)
+        os.replace(temp_path, file_path)
+    else:
+        os.remove(file_path)
+
 def split(word:str) -> list:
     """Splits a word and returns as a list"""
     if isinstance(word, str):
         return list(word)
     raise ValueError("This function can only process strings.")
 
+class DirectoryIndex:
+    """
+    A listing of each directory indexed by every prefix of the section or ICAO code the files
+    start with, so finding the tables for a section or aerodrome doesn't mean scanning a
+    directory of thousands of files every time. A directory is only listed again once it has
+    changed, which costs a single stat to check.
+    """
+
+    # A listing taken this soon after the directory changed may have missed a file written
+    # within the same timestamp tick, so it's only used once
+    racy_ns = 100_000_000
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._listings:dict = {}
+
+    def clear(self) -> None:
+        """Forget every listing"""
+        with self._lock:
+            self._listings.clear()
+
+    @staticmethod
+    def key(file_name:str) -> str:
+        """The section or ICAO code a file name starts with"""
+        return file_name.split("_", maxsplit=1)[0]
+
+    def listing(self, path:str) -> dict:
+        """Returns the listing of a directory, listing it again if it has changed"""
+
+        stat = os.stat(path)
+        signature = (stat.st_dev, stat.st_ino, stat.st_mtime_ns)
+        with self._lock:
+            listing = self._listings.get(path)
+            if listing and listing["signature"] == signature and not listing["racy"]:
+                return listing
+            listed_at = time.time_ns()
+            names = os.listdir(path)
+            prefixes:dict = {}
+            for position, name in enumerate(names):
+                key = self.key(name)
+                for length in range(1, len(key) + 1):
+                    prefixes.setdefault(key[:length], []).append(position)
+            listing = {
+                "signature": signature,
+                "racy": listed_at - stat.st_mtime_ns < self.racy_ns,
+                "names": names,
+                "prefixes": prefixes,
+                }
+            self._listings[path] = listing
+            return listing
+
+    def files(self, path:str, prefix:str="", suffix:str="") -> list:
+        """Returns the files in a directory with the given prefix and suffix, in listing order"""
+
+        listing = self.listing(path)
+        if prefix in listing["prefixes"]:
+            names = [listing["names"][position] for position in listing["prefixes"][prefix]]
+        else:
+            # Only a prefix longer than the section or ICAO code needs the whole listing
+            names = [name for name in listing["names"] if name.startswith(prefix)]
+        return [name for name in names if name.endswith(suffix)]
+
+
+# Shared by every stage reading DataFrames
+directory_index = DirectoryIndex()
+
 def generate_file_names(file_start:str, file_type:str="csv") -> list:
     """Generates an incremental list of filenames"""
+    return directory_index.files(os.path.join(work_dir, "DataFrames"), file_start, file_type)
 
-    path = os.path.join(work_dir, "DataFrames")
-    enr_files = ([file for file in os.listdir(path) if
-                    file.startswith(file_start) and file.endswith(file_type)])
-    return enr_files
+def remove_files(pattern:str) -> None:
+    """Remove any files in DataFrames matching the given glob pattern"""
+    for file in glob.glob(os.path.join(work_dir, "DataFrames", pattern)):
+        os.remove(file)
+
+def section_selected(section:str, only:Optional[list]=None) -> bool:
+    """
+    Checks if a section has been selected. 'ENR-3' selects 'ENR-3.2' and 'AD-2.EGLL' selects
+    'AD-2', no selection at all selects everything
+    """
+
+    if not only:
+        return True
+    for item in only:
+        if (item == section or item.startswith(f"{section}.") or
+            section.startswith(f"{item}.") or section.startswith(f"{item}-")):
+            return True
+    return False
+
+def section_items(section:str, only:Optional[list]=None) -> Optional[list]:
+    """
+    Returns the items selected within a section, for example ['EGLL'] from 'AD-2.EGLL', or None
+    if the whole section has been selected
+    """
+
+    if not only:
+        return None
+    items = []
+    for item in only:
+        if item.startswith(f"{section}."):
+            items.append(item[len(section) + 1:])
+        elif section_selected(section, [item]):
+            return None
+    return items
 
 
 class GitActions:
@@ -124,6 +248,7 @@ class GitActions:
             logger.success(f"The repo has already been cloned to {folder}")
             return True
         logger.info(f"Cloning into {self.repo_url}")
+        import git # pylint: disable=import-outside-toplevel
         git.Repo.clone_from(self.repo_url, folder, branch=self.branch)
         logger.success("The repo has been successfully cloned")
         return False
@@ -134,6 +259,7 @@ class GitActions:
             logger.info(f"Pulling changes from {self.repo_url} to {self.git_path}")
 
             # Open the repository
+            import git # pylint: disable=import-outside-toplevel
             repo = git.Repo(self.git_path)
 
             if str(repo.active_branch) == str(self.branch):
@@ -241,48 +367,151 @@ class Geo:
     def dms2dd(lat:str, lon:str) -> dict:
         """Converts Degress, Minutes and Seconds to Decimal Degrees"""
 
-        # try and match DDD.MMM.SSS.sss latitude
-        lat_split = re.search(r"(\d{1,3})\.(\d{1,3})\.(\d{1,3}\.?\d{0,3})", lat)
-        if not lat_split:
-            # try and match DDMMSS latitude
-            lat_split = re.search(r"^(\d{2})(\d{2})(\d{2})([NS]{1})$", lat)
-        n_or_s = re.search(r"([NS]{1})", lat)
-
-        # try and match DDD.MMM.SSS.sss longitude
-        lon_split = re.search(r"(\d{1,3})\.(\d{1,3})\.(\d{1,3}\.?\d{0,3})", lon)
-        if not lon_split:
-            # try and match DDDMMSS longitude
-            lon_split = re.search(r"^(\d{3})(\d{2})(\d{2})([EW]{1})$", lon)
-        e_or_w = re.search(r"([EW]{1})", lon)
-
-        if lat_split and n_or_s and lon_split and e_or_w:
-            lat_dd = lat_split[1]
-            lat_mm = lat_split[2]
-            lat_ss = lat_split[3]
-            lat_out = int(lat_dd) + int(lat_mm) / 60 + float(lat_ss) / 3600
-
-            lon_dd = lon_split[1]
-            lon_mm = lon_split[2]
-            lon_ss = lon_split[3]
-            lon_out = int(lon_dd) + int(lon_mm) / 60 + float(lon_ss) / 3600
-
-            if n_or_s[1] == "S":
-                lat_out = lat_out - (lat_out * 2)
-            if e_or_w[1] == "W":
-                lon_out = lon_out - (lon_out * 2)
-
+        lat_out = Geo.dms_to_decimal(lat, "dms_latitude", "north_south", "S")
+        lon_out = Geo.dms_to_decimal(lon, "dms_longitude", "east_west", "W")
+        if lat_out is not None and lon_out is not None:
             return_coords = {
                 "lat": lat_out,
                 "lon": lon_out,
             }
             return return_coords
-        logger.warning(f"{lat} {lat_split}")
-        logger.warning(f"{lon} {lon_split}")
+        logger.warning(f"{lat} {lat_out}")
+        logger.warning(f"{lon} {lon_out}")
         raise ValueError(
             ("This function accepts lat/lon in the format DDD.MMM.SSS.sss"
              "or DDMMSS / DDDMMSS prefixed or suffixed by N, S, E or W")
             )
 
+    @staticmethod
+    def dms_to_decimal(value:str, pattern:str, compass:str, negative:str) -> Optional[float]:
+        """Converts a single latitude or longitude, returning None if it can't be read"""
+
+        # try and match DDD.MMM.SSS.sss
+        split = lists.patterns["dms_dotted"].search(value)
+        if not split:
+            # try and match DDMMSS(.ss) / DDDMMSS(.ss)
+            split = lists.patterns[pattern].search(value)
+        compass_point = lists.patterns[compass].search(value)
+        if not (split and compass_point):
+            return None
+        decimal = int(split[1]) + int(split[2]) / 60 + float(split[3]) / 3600
+        if compass_point[1] == negative:
+            decimal = decimal - (decimal * 2)
+        return decimal
+
+    @staticmethod
+    def dms2dd_array(lat:Any, lon:Any) -> dict:
+        """
+        Converts arrays or series of Degress, Minutes and Seconds to Decimal Degrees in bulk, in
+        the same formats and with the same results as dms2dd
+        """
+
+        return {
+            "lat": dms_array_to_decimal(lat, 2, "dms_latitude", "north_south", "NS"),
+            "lon": dms_array_to_decimal(lon, 3, "dms_longitude", "east_west", "EW"),
+        }
+
+    @staticmethod
+    def dd2dms_array(latitude:Any, longitude:Any) -> np.ndarray:
+        """
+        Converts arrays or series of Decimal Degrees to Degress, Minutes and Seconds in bulk,
+        giving the same strings as dd2dms
+        """
+
+        latitude = np.asarray(latitude, dtype=float)
+        longitude = np.asarray(longitude, dtype=float)
+        if latitude.shape != longitude.shape:
+            raise ValueError("This function expects the same number of latitudes and longitudes")
+        if not (np.isfinite(latitude).all() and np.isfinite(longitude).all()):
+            raise ValueError("This function expects floats to be passed to it.")
+
+        def convert(values:np.ndarray, positive:str, negative:str) -> zip:
+            # np.modf() splits whole number and decimal as with math.modf()
+            fraction, degrees = np.modf(values)
+            seconds, minutes = np.modf(fraction * 60)
+            return zip(
+                np.where(values < 0, negative, positive).tolist(),
+                np.abs(degrees).astype(int).tolist(),
+                np.abs(minutes).astype(int).tolist(),
+                np.abs(python_round(seconds * 60, 2)).tolist(),
+                )
+
+        return np.array([
+            (f"{n_or_s}{str(degrees_y).zfill(3)}.{str(minutes_y).zfill(2)}."
+             f"{str(seconds_y).zfill(3)} {e_or_w}{str(degrees_x).zfill(3)}."
+             f"{str(minutes_x).zfill(2)}.{str(seconds_x).zfill(3)}")
+            for (n_or_s, degrees_y, minutes_y, seconds_y), (e_or_w, degrees_x, minutes_x, seconds_x)
+            in zip(convert(latitude, "N", "S"), convert(longitude, "E", "W"))
+            ], dtype=object)
+
+
+def dms_array_to_decimal(
+        values:Any,
+        degree_digits:int,
+        pattern:str,
+        compass:str,
+        compass_points:str,
+        ) -> np.ndarray:
+    """
+    Converts an array of DDMMSS(.ss) or DDDMMSS(.ss) strings suffixed by a compass point, as
+    used throughout the eAIP, by working on the characters of every string at once. Strings in
+    any other format are converted one at a time by Geo.dms_to_decimal.
+    """
+
+    text = np.asarray(values, dtype=str).ravel()
+    width = text.dtype.itemsize // 4
+    head = degree_digits + 4
+    decimal = np.zeros(len(text))
+    packed = np.zeros(len(text), dtype=bool)
+    if len(text) and width > head:
+        # One row of unicode code points for each string, padded with zeros
+        codes = text.view(np.uint32).reshape(len(text), width)
+        last = np.count_nonzero(codes, axis=1) - 1
+        is_digit = (codes >= ord("0")) & (codes <= ord("9"))
+        digits = codes[:, :head].astype(np.int64) - ord("0")
+        point = codes[np.arange(len(text)), np.maximum(last, 0)]
+        columns = np.arange(width)
+        fraction = (columns > head) & (columns < last[:, None])
+        packed = (is_digit[:, :head].all(axis=1) &
+                  np.isin(point, [ord(char) for char in compass_points]) &
+                  ((last == head) | ((codes[:, head] == ord(".")) & (last > head + 1))) &
+                  (is_digit | ~fraction).all(axis=1))
+
+        degrees = (digits[:, :degree_digits] * 10 ** np.arange(degree_digits - 1, -1, -1)).sum(1)
+        minutes = digits[:, degree_digits] * 10 + digits[:, degree_digits + 1]
+        # The seconds are read from their text so they're rounded exactly as float() rounds them
+        seconds_codes = np.where(columns < last[:, None], codes, np.uint32(0))
+        seconds = np.ascontiguousarray(seconds_codes[:, degree_digits + 2:]).view(
+            f"U{width - degree_digits - 2}").ravel()
+        seconds = np.where(packed, seconds, "0").astype(float)
+        decimal = degrees + minutes / 60 + seconds / 3600
+        decimal = np.where(point == ord(compass_points[1]), -decimal, decimal)
+
+    for index in np.flatnonzero(~packed):
+        converted = Geo.dms_to_decimal(
+            str(text[index]), pattern, compass, compass_points[1])
+        if converted is None:
+            logger.warning(f"{text[index]}")
+            raise ValueError(
+                ("This function accepts lat/lon in the format DDD.MMM.SSS.sss"
+                 "or DDMMSS / DDDMMSS prefixed or suffixed by N, S, E or W")
+                )
+        decimal[index] = converted
+    return decimal
+
+def python_round(values:np.ndarray, ndigits:int) -> np.ndarray:
+    """
+    Rounds an array to the same values as the built in round. The two only disagree on the
+    last bit of values very close to a tie so those few are rounded one at a time.
+    """
+
+    rounded = np.round(values, ndigits)
+    scaled = values * 10 ** ndigits
+    near_tie = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    if near_tie.any():
+        rounded[near_tie] = [round(value, ndigits) for value in values[near_tie]]
+    return rounded
+
 
 class NoUrlDataFoundError(Exception):
     """Exception raised when no data has been found at the given url"""
@@ -296,6 +525,10 @@ class NoUrlDataFoundError(Exception):
 class TacanVor:
     """Converts TACAN to VOR and vice versa"""
 
+    # The VOR/ILS frequency for each TACAN channel, filled once the class is defined so
+    # threads only ever read it
+    channel_table:dict = {}
+
     @staticmethod
     def validate_tacan(tacan:str) -> tuple:
         """Validates a string to see if it is a TACAN channel"""
@@ -331,3 +564,28 @@ class TacanVor:
         else:
             raise ValueError("Channel needs to be in the range 17-59 and 70-126")
         return str(format(increment, '.2f'))
+
+    def channels_to_vor_ils(self, channels:pd.Series) -> pd.Series:
+        """
+        Converts a series of TACAN channels to VOR through a table of every channel, raising
+        if any of them aren't valid. Missing channels are left as NaN.
+        """
+
+        frequencies = channels.map(TacanVor.channel_table)
+        if (channels.notna() & frequencies.isna()).any():
+            raise ValueError("Channel needs to be in the range 17-59 and 70-126")
+        return frequencies
+
+    @classmethod
+    def build_channel_table(cls) -> dict:
+        """Returns the VOR/ILS frequency for every TACAN channel, with and without leading zeros"""
+
+        table = {}
+        for number in list(range(17, 60)) + list(range(70, 127)):
+            for suffix in ["X", "Y"]:
+                frequency = cls().tacan_to_vor_ils(f"{number}{suffix}")
+                table[f"{number}{suffix}"] = frequency
+                table[f"{number:03d}{suffix}"] = frequency
+        return table
+
+TacanVor.channel_table = TacanVor.build_channel_table()
@@ -0,0 +1,207 @@
+"""
+eAIP Parser
+Chris Parkinson (@chssn)
+"""
+
+#!/usr/bin/env python3.9
+
+# Standard Libraries
+import glob
+import os
+import re
+from typing import Optional
+
+# Third Party Libraries
+import numpy as np
+import pandas as pd # type: ignore
+from geographiclib.geodesic import Geodesic # type: ignore
+from loguru import logger
+
+# Local Libraries
+from eaip_parser import functions, lists
+
+# The WGS84 ellipsoid
+WGS84_A = 6378137.0
+WGS84_F = 1 / 298.257223563
+WGS84_B = WGS84_A * (1 - WGS84_F)
+
+METRES_PER_NM = 1852
+
+
+def inverse(lat1:np.ndarray, lon1:np.ndarray, lat2:np.ndarray, lon2:np.ndarray) -> tuple:
+    """
+    Solves the inverse geodesic problem on the WGS84 ellipsoid for whole arrays of points with
+    Vincenty's formulae. Returns the distances in metres and the azimuths at each end in
+    degrees, as geographiclib does. Any nearly antipodal pair which doesn't converge is solved
+    by geographiclib instead.
+    """
+
+    lat1, lon1, lat2, lon2 = np.broadcast_arrays(
+        *(np.asarray(value, dtype=float) for value in (lat1, lon1, lat2, lon2)))
+    reduced_1 = np.arctan((1 - WGS84_F) * np.tan(np.radians(lat1)))
+    reduced_2 = np.arctan((1 - WGS84_F) * np.tan(np.radians(lat2)))
+    sin_u1, cos_u1 = np.sin(reduced_1), np.cos(reduced_1)
+    sin_u2, cos_u2 = np.sin(reduced_2), np.cos(reduced_2)
+    longitude = np.radians(lon2 - lon1)
+
+    lam = longitude.copy()
+    converged = np.zeros(lam.shape, dtype=bool)
+    for _ in range(200):
+        sin_lam, cos_lam = np.sin(lam), np.cos(lam)
+        sin_sigma = np.hypot(cos_u2 * sin_lam, cos_u1 * sin_u2 - sin_u1 * cos_u2 * cos_lam)
+        cos_sigma = sin_u1 * sin_u2 + cos_u1 * cos_u2 * cos_lam
+        sigma = np.arctan2(sin_sigma, cos_sigma)
+        sin_alpha = np.divide(cos_u1 * cos_u2 * sin_lam, sin_sigma,
+                              out=np.zeros_like(lam), where=sin_sigma != 0)
+        cos2_alpha = 1 - sin_alpha ** 2
+        # Zero for lines along the equator
+        cos_2sigma_m = np.divide(cos_sigma * cos2_alpha - 2 * sin_u1 * sin_u2, cos2_alpha,
+                                 out=np.zeros_like(lam), where=cos2_alpha != 0)
+        correction = WGS84_F / 16 * cos2_alpha * (4 + WGS84_F * (4 - 3 * cos2_alpha))
+        previous = lam
+        lam = longitude + (1 - correction) * WGS84_F * sin_alpha * (
+            sigma + correction * sin_sigma * (
+                cos_2sigma_m + correction * cos_sigma * (-1 + 2 * cos_2sigma_m ** 2)))
+        converged = np.abs(lam - previous) < 1e-12
+        if converged.all():
+            break
+
+    sin_lam, cos_lam = np.sin(lam), np.cos(lam)
+    u_squared = cos2_alpha * (WGS84_A ** 2 - WGS84_B ** 2) / WGS84_B ** 2
+    series_a = 1 + u_squared / 16384 * (
+        4096 + u_squared * (-768 + u_squared * (320 - 175 * u_squared)))
+    series_b = u_squared / 1024 * (256 + u_squared * (-128 + u_squared * (74 - 47 * u_squared)))
+    delta_sigma = series_b * sin_sigma * (cos_2sigma_m + series_b / 4 * (
+        cos_sigma * (-1 + 2 * cos_2sigma_m ** 2) - series_b / 6 * cos_2sigma_m *
+        (-3 + 4 * sin_sigma ** 2) * (-3 + 4 * cos_2sigma_m ** 2)))
+    distance = WGS84_B * series_a * (sigma - delta_sigma)
+    azimuth_1 = np.degrees(np.arctan2(
+        cos_u2 * sin_lam, cos_u1 * sin_u2 - sin_u1 * cos_u2 * cos_lam))
+    azimuth_2 = np.degrees(np.arctan2(
+        cos_u1 * sin_lam, -sin_u1 * cos_u2 + cos_u1 * sin_u2 * cos_lam))
+
+    for index in zip(*np.nonzero(~converged)):
+        solved = Geodesic.WGS84.Inverse(lat1[index], lon1[index], lat2[index], lon2[index])
+        distance[index] = solved["s12"]
+        azimuth_1[index] = solved["azi1"]
+        azimuth_2[index] = solved["azi2"]
+    return distance, azimuth_1, azimuth_2
+
+
+class SegmentValidator:
+    """
+    Checks the published track and distance of every route segment against the geodesic
+    between its points. The published tracks are magnetic so the computed true tracks are
+    corrected by the given magnetic variation, east positive.
+    """
+
+    def __init__(
+            self,
+            track_tolerance:float=5.0,
+            distance_tolerance:float=0.2,
+            magnetic_variation:float=0.0,
+            ) -> None:
+        self.track_tolerance = track_tolerance
+        self.distance_tolerance = distance_tolerance
+        self.magnetic_variation = magnetic_variation
+
+    @staticmethod
+    def segments(table:pd.DataFrame, route:str="") -> pd.DataFrame:
+        """
+        Returns every segment of a scraped route table with its published track, reverse track
+        and distance and the coordinates of the points at each end
+        """
+
+        cells = table["coordinates_bearing"]
+        coords = lists.Regex.extract_coordinates(cells)
+        is_point = coords[0].notna()
+        track = lists.Regex.extract(cells, "enr_3_track")
+        distance = lists.Regex.extract(table["distance"], "enr_3_distance")[0].astype(float)
+        is_segment = (track[0].notna() | track[1].notna()) & distance.notna()
+        # A new route designator starts a new set of points
+        names = table["name"].astype(str)
+        route_start = (table["route"].astype(str) == names) & names.str.match(
+            lists.series_patterns["enr_3_route"])
+
+        points = pd.DataFrame({
+            "name": names[is_point],
+            "lat": coords[0][is_point],
+            "lon": coords[2][is_point],
+            "route": route_start.cumsum()[is_point],
+            }).reset_index(drop=True)
+        # Each segment runs from the point before it to the point after it
+        start = is_point.cumsum()[is_segment].to_numpy() - 1
+        valid = (start >= 0) & (start + 1 < len(points))
+        start = start[valid]
+        segments = pd.DataFrame({
+            "route": route,
+            "from": points["name"].to_numpy()[start],
+            "to": points["name"].to_numpy()[start + 1],
+            "from_lat": points["lat"].to_numpy()[start],
+            "from_lon": points["lon"].to_numpy()[start],
+            "to_lat": points["lat"].to_numpy()[start + 1],
+            "to_lon": points["lon"].to_numpy()[start + 1],
+            "track": track[0][is_segment].astype(float).to_numpy()[valid],
+            "reverse_track": track[1][is_segment].astype(float).to_numpy()[valid],
+            "distance": distance[is_segment].to_numpy()[valid],
+            })
+        same_route = (points["route"].to_numpy()[start] == points["route"].to_numpy()[start + 1])
+        return segments[same_route].reset_index(drop=True)
+
+    def check(self, segments:pd.DataFrame) -> pd.DataFrame:
+        """Adds the computed track and distance of each segment and flags any mismatches"""
+
+        segments = segments.copy()
+        start = functions.Geo.dms2dd_array(segments["from_lat"], segments["from_lon"])
+        end = functions.Geo.dms2dd_array(segments["to_lat"], segments["to_lon"])
+        distance, azimuth_1, azimuth_2 = inverse(start["lat"], start["lon"], end["lat"],
+                                                 end["lon"])
+        segments["computed_track"] = (azimuth_1 - self.magnetic_variation) % 360
+        segments["computed_reverse_track"] = (azimuth_2 + 180 - self.magnetic_variation) % 360
+        segments["computed_distance"] = distance / METRES_PER_NM
+
+        # There's no track between coincident points
+        has_track = segments["computed_distance"] >= 0.05
+
+        def angle(published:pd.Series, computed:pd.Series) -> pd.Series:
+            return ((published - computed + 180) % 360 - 180).abs().where(has_track)
+
+        segments["track_error"] = angle(segments["track"], segments["computed_track"])
+        segments["reverse_track_error"] = angle(
+            segments["reverse_track"], segments["computed_reverse_track"])
+        segments["distance_error"] = (segments["distance"] - segments["computed_distance"]).abs()
+        segments["flagged"] = ((segments["track_error"] > self.track_tolerance) |
+                               (segments["reverse_track_error"] > self.track_tolerance) |
+                               (segments["distance_error"] > self.distance_tolerance))
+        return segments
+
+    def run(self, section:str="ENR-3.2", report_path:Optional[str]=None) -> pd.DataFrame:
+        """
+        Checks every segment of the scraped route tables for a section, optionally writing
+        them all to a csv report, and returns those which have been flagged
+        """
+
+        data_dir = os.path.join(functions.work_dir, "DataFrames")
+        tables = []
+        for file_path in sorted(glob.glob(os.path.join(data_dir, f"{section}_*.csv"))):
+            table = pd.read_csv(file_path, dtype=str)
+            route = table["name"][table["name"].astype(str).str.match(
+                lists.series_patterns["enr_3_route"])]
+            tables.append(self.segments(
+                table, route.iloc[0] if len(route) else re.sub(r"\.csv$", "", file_path)))
+        segments = self.check(pd.concat(tables, ignore_index=True) if tables else
+                              self.segments(pd.DataFrame(columns=lists.column_headers_route)))
+        if report_path:
+            segments.to_csv(report_path, index=False)
+
+        flagged = segments[segments["flagged"]]
+        for segment in flagged.to_dict("records"):
+            logger.warning(
+                f"{segment['route']} {segment['from']} to {segment['to']} is published as "
+                f"{segment['track']:03.0f}° {segment['reverse_track']:03.0f}° "
+                f"{segment['distance']} NM but is {segment['computed_track']:03.0f}° "
+                f"{segment['computed_reverse_track']:03.0f}° "
+                f"{segment['computed_distance']:.1f} NM")
+        logger.info(f"{len(flagged)} of {len(segments)} {section} segments don't match their "
+                    "coordinates")
+        return flagged
@@ -9,9 +9,15 @@ Chris Parkinson (@chssn)
 import re
 from typing import Optional
 
+# Third Party Libraries
+import pandas as pd # type: ignore
+
 # A list of country codes and associated language
 country_codes = {
+    "EB": "en-GB",
     "EG": "en-GB",
+    "EH": "en-GB",
+    "EI": "en-GB",
 }
 
 # A list of sections contained in the eAIP excluding aerodrome specific pages
@@ -126,54 +132,149 @@ column_headers_ad_2_19 = [
     "remarks",
 ]
 
+# Every pattern used to search the eAIP row by row, compiled once rather than looked up on each
+# call. The Regex methods and their series variants match these from the start of the string.
+patterns = {
+    # lists.Regex
+    "flight_level": re.compile(r"(FL\s\d{2,3})"),
+    "lateral_limits": re.compile(r"^([A-Z0-9\s]+)(\s\d{6}(\.\d{2})?[NS]{1}.*)"),
+    "vertical_limits": re.compile(r"(?:Upper\slimit\:\s)(.+)(?:\s\sLower\slimit\:\s)(.+)"),
+    "frequency": re.compile(r"(\d{3}\.\d{3})"),
+    "frequency_anchored": re.compile(r"^(\d{3}\.\d{3})$"),
+    "coordinates": re.compile(r"(\d{6}(\.\d{2})?[NS])(?:\s+)(\d{7}(\.\d{2})?[EW])"),
+    "coordinates_anchored": re.compile(r"^(\d{6}(\.\d{2})?[NS])(?:\s+)(\d{7}(\.\d{2})?[EW])$"),
+    "tacan_channel": re.compile(r"(\d{2,3}[XY]{1})"),
+    "vor_dme_ndb": re.compile(r"^([A-Z\s\']+)\s\s([VORDMENB]{3}(\/[VORDMENB]{3})?)"),
+    # ENR 2
+    "enr_2_title": re.compile(
+        r"^([A-Z\s\-]+(\bFIR\b|\bUIR\b|\bTMA\b|\bCTA\b|\bCTR\b|\bATZ\b|\bFRA\b\s"
+        r"\([A-Z\s]+\))(\s\d{1,2})?)(?:\s\s)"),
+    "enr_2_boundary": re.compile(
+        r"(?<=\s\s)((\d{6}[NS]{1}\s\d{7}[EW]{1}.*)|(\bA\scircle\b.*))(?=\s+\bUpper\b)"),
+    "enr_2_limits": re.compile(
+        r"(?:\s+\bUpper\slimit\:\s\b)(\S+(\s\bFT\b\s\b(ALT|AGL)\b)?)"
+        r"(?:\s+\bLower\slimit\:\s\b)(\S+(\s\bFT\b\s\b(ALT|AGL)\b)?)"
+        r"(?:\s+\bClass\b\:\s)([A-G]{1})"),
+    "enr_2_callsign": re.compile(r"^([A-Z\s]+)(?:\s+[A-Z]{1}[a-z]+)"),
+    "enr_2_latitude": re.compile(r"\d{6}(\.\d{2})?[NS]{1}"),
+    "enr_2_area_title": re.compile(r"^([A-Z\s\/]+)"),
+    # ENR 3
+    "enr_3_route": re.compile(r"^[A-Z]{1,2}\d{1,3}$"),
+    "enr_3_limits": re.compile(r"^\(.*\)$"),
+    "enr_3_rnav": re.compile(r"^\(RNAV\)"),
+    "enr_3_track": re.compile(r"^(?:(\d{3})°|-)\s+(?:(\d{3})°|-)$"),
+    "enr_3_distance": re.compile(r"^(\d+(?:\.\d+)?)\s+NM$"),
+    "enr_3_navaid": re.compile(
+        r"^([A-Z\s]+)\s\s([VORDMENB]{3}(\/[VORDMENB]{3})?)\s+\(\s+([A-Z]{3})\s+\)$"),
+    # ENR 4
+    "navaid_id": re.compile(r"^([A-Z]{3})$"),
+    "waypoint": re.compile(r"^([A-Z]{5})$"),
+    # ENR 5
+    "enr_5_1_area": re.compile(
+        r"(EG\s[DPR]{1}\d{1,4}([A-Z]{1})?)(.*)(?<=\s\s)"
+        r"((\d{6}[NS]{1}\s\d{7}[EW]{1}.*)|(\bA\scircle\b.*))"),
+    "enr_5_area": re.compile(r"(.*)(?<=\s\s)((\d{6}[NS]{1}\s\d{7}[EW]{1}.*)|(\bA\scircle\b.*))"),
+    "enr_5_radius": re.compile(r"(\d{1,2}(\.\d{1,3})?)(?=\sNM\sradius)"),
+    # AD 2
+    "runway": re.compile(r"^(\d{1,2})([LRCXG]{1})?$"),
+    "bearing": re.compile(r"^(\d+(\.\d+)?)"),
+    # Geo
+    "dms_dotted": re.compile(r"(\d{1,3})\.(\d{1,3})\.(\d{1,3}\.?\d{0,3})"),
+    "dms_latitude": re.compile(r"^(\d{2})(\d{2})(\d{2}(?:\.\d+)?)([NS]{1})$"),
+    "dms_longitude": re.compile(r"^(\d{3})(\d{2})(\d{2}(?:\.\d+)?)([EW]{1})$"),
+    "north_south": re.compile(r"([NS]{1})"),
+    "east_west": re.compile(r"([EW]{1})"),
+}
+
+# The same patterns anchored to the start of the string, as pandas searches rather than matches
+series_patterns = {
+    name: re.compile(rf"\A(?:{pattern.pattern})") for name, pattern in patterns.items()}
+
+
 class Regex:
-    """A whole host of regex patterns"""
+    """
+    A whole host of regex patterns. Each method matches a single value, the extract variants
+    match a whole series at once.
+    """
 
     @staticmethod
     def flight_level(string_to_search:str) -> list:
         """Searches for a bunch of flight levels"""
-        return re.findall(r"(FL\s\d{2,3})", str(string_to_search))
+        return patterns["flight_level"].findall(str(string_to_search))
 
     @staticmethod
     def lateral_limits(string_to_search:str) -> Optional[re.Match[str]]:
         """Searches for lateral limits"""
-        return re.match(r"^([A-Z0-9\s]+)(\s\d{6}(\.\d{2})?[NS]{1}.*)", str(string_to_search))
+        return patterns["lateral_limits"].match(str(string_to_search))
 
     @staticmethod
     def vertical_limits(string_to_search:str) -> Optional[re.Match[str]]:
         """Searches for vertical limits"""
-        return re.match(
-            r"(?:Upper\slimit\:\s)(.+)(?:\s\sLower\slimit\:\s)(.+)", str(string_to_search))
+        return patterns["vertical_limits"].match(str(string_to_search))
 
     @staticmethod
     def frequency(string_to_search:str, anchor:bool=False) -> Optional[re.Match[str]]:
         """Searches for a frequency"""
         if anchor:
-            return re.match(r"^(\d{3}\.\d{3})$", str(string_to_search))
-        return re.match(r"(\d{3}\.\d{3})", str(string_to_search))
+            return patterns["frequency_anchored"].match(str(string_to_search))
+        return patterns["frequency"].match(str(string_to_search))
 
     @staticmethod
     def coordinates(string_to_search:str, anchor:bool=True) -> Optional[re.Match[str]]:
         """Searches for a coordinate pair"""
         if anchor:
-            return re.match(
-                    r"^(\d{6}(\.\d{2})?[NS])(?:\s+)(\d{7}(\.\d{2})?[EW])$",
-                    str(string_to_search)
-                    )
-        return re.match(
-                r"(\d{6}(\.\d{2})?[NS])(?:\s+)(\d{7}(\.\d{2})?[EW])",
-                str(string_to_search)
-                )
+            return patterns["coordinates_anchored"].match(str(string_to_search))
+        return patterns["coordinates"].match(str(string_to_search))
 
     @staticmethod
     def tacan_channel(string_to_search:str) -> Optional[re.Match[str]]:
-        """Searches for a bunch of flight levels"""
-        return re.match(r"(\d{2,3}[XY]{1})", str(string_to_search))
+        """Searches for a TACAN channel"""
+        return patterns["tacan_channel"].match(str(string_to_search))
 
     @staticmethod
     def vor_dme_ndb(string_to_search:str) -> Optional[re.Match[str]]:
         """Searches for the word(s) VOR, DME and NDB"""
-        return re.match(
-            r"^([A-Z\s\']+)\s\s([VORDMENB]{3}(\/[VORDMENB]{3})?)",
-            str(string_to_search)
-            )
+        return patterns["vor_dme_ndb"].match(str(string_to_search))
+
+    @staticmethod
+    def extract(series:pd.Series, name:str) -> pd.DataFrame:
+        """
+        Matches a registered pattern against every value in a series. Returns a dataframe with
+        a column for each group, numbered from 0, and NaN in the rows which don't match.
+        """
+        return series.astype(str).str.extract(series_patterns[name], expand=True)
+
+    @staticmethod
+    def extract_flight_levels(series:pd.Series) -> pd.Series:
+        """Returns the list of flight levels in each value of a series"""
+        return series.astype(str).str.findall(patterns["flight_level"])
+
+    @staticmethod
+    def extract_lateral_limits(series:pd.Series) -> pd.DataFrame:
+        """Lateral limits for a series"""
+        return Regex.extract(series, "lateral_limits")
+
+    @staticmethod
+    def extract_vertical_limits(series:pd.Series) -> pd.DataFrame:
+        """Vertical limits for a series"""
+        return Regex.extract(series, "vertical_limits")
+
+    @staticmethod
+    def extract_frequency(series:pd.Series, anchor:bool=False) -> pd.DataFrame:
+        """Frequencies for a series"""
+        return Regex.extract(series, "frequency_anchored" if anchor else "frequency")
+
+    @staticmethod
+    def extract_coordinates(series:pd.Series, anchor:bool=True) -> pd.DataFrame:
+        """Coordinate pairs for a series"""
+        return Regex.extract(series, "coordinates_anchored" if anchor else "coordinates")
+
+    @staticmethod
+    def extract_tacan_channel(series:pd.Series) -> pd.DataFrame:
+        """TACAN channels for a series"""
+        return Regex.extract(series, "tacan_channel")
+
+    @staticmethod
+    def extract_vor_dme_ndb(series:pd.Series) -> pd.DataFrame:
+        """VOR, DME and NDB names for a series"""
+        return Regex.extract(series, "vor_dme_ndb")
@@ -0,0 +1,268 @@
+"""
+eAIP Parser
+Chris Parkinson (@chssn)
+"""
+
+#!/usr/bin/env python3.9
+
+# Standard Libraries
+import io
+import re
+from dataclasses import dataclass
+from typing import Iterator, Optional
+
+# Third Party Libraries
+import pandas as pd # type: ignore
+from pandas.errors import EmptyDataError # type: ignore
+from pandas.io.parsers import TextParser # type: ignore
+
+# Local Libraries
+
+# The same whitespace handling as pd.read_html so both backends return identical text
+whitespace = re.compile(r"[\r\n]+|\s{2,}")
+
+def hidden(element) -> bool:
+    """Checks if an element is styled so that it isn't displayed"""
+    return "display:none" in element.get("style", "").replace(" ", "")
+
+def drop(element) -> None:
+    """Remove an element, keeping the text which follows it"""
+    parent = element.getparent()
+    if element.tail:
+        previous = element.getprevious()
+        if previous is not None:
+            previous.tail = (previous.tail or "") + element.tail
+        else:
+            parent.text = (parent.text or "") + element.tail
+    parent.remove(element)
+
+def cell_text(cell) -> str:
+    """Returns the text of a cell"""
+    return whitespace.sub(" ", "".join(cell.itertext()).strip())
+
+def expand_rows(rows:list) -> list:
+    """Returns the text of each row with any rowspan and colspan cells repeated"""
+
+    all_texts = []
+    remainder:list = []
+    for row in rows:
+        texts = []
+        next_remainder = []
+        index = 0
+        for cell in row:
+            # Cells carried down from previous rows which come before this one
+            while remainder and remainder[0][0] <= index:
+                prev_index, prev_text, prev_rowspan = remainder.pop(0)
+                texts.append(prev_text)
+                if prev_rowspan > 1:
+                    next_remainder.append((prev_index, prev_text, prev_rowspan - 1))
+                index += 1
+            text = cell_text(cell)
+            rowspan = int(cell.get("rowspan") or 1)
+            colspan = int(cell.get("colspan") or 1)
+            for _ in range(colspan):
+                texts.append(text)
+                if rowspan > 1:
+                    next_remainder.append((index, text, rowspan - 1))
+                index += 1
+        for prev_index, prev_text, prev_rowspan in remainder:
+            texts.append(prev_text)
+            if prev_rowspan > 1:
+                next_remainder.append((prev_index, prev_text, prev_rowspan - 1))
+        all_texts.append(texts)
+        remainder = next_remainder
+
+    # Rows which only exist because of a rowspan in the row above
+    while remainder:
+        next_remainder = []
+        texts = []
+        for prev_index, prev_text, prev_rowspan in remainder:
+            texts.append(prev_text)
+            if prev_rowspan > 1:
+                next_remainder.append((prev_index, prev_text, prev_rowspan - 1))
+        all_texts.append(texts)
+        remainder = next_remainder
+    return all_texts
+
+@dataclass
+class TableLocator:
+    """
+    Identifies a table by its header rather than its position on the page. The header is a
+    regex searched for in the table's header text, occurrence picks between several tables
+    with matching headers.
+    """
+    header:str
+    occurrence:int=0
+
+    def matches(self, fingerprint:str) -> bool:
+        """Checks if a table's header fingerprint matches"""
+        return bool(re.search(self.header, fingerprint, re.IGNORECASE))
+
+
+def row_cells(row) -> list:
+    """Returns the cells of a row"""
+    return [cell for cell in row if cell.tag in ["td", "th"]]
+
+def fingerprint(table) -> str:
+    """
+    Returns the header text of a table element without reading the rest of it. Tables
+    without a header use their first row.
+    """
+
+    rows = [row for thead in table.iter("thead") for row in thead if row.tag == "tr"]
+    if not rows:
+        for row in table.iter("tr"):
+            if not rows or all(cell.tag == "th" for cell in row_cells(row)):
+                rows.append(row)
+            if not all(cell.tag == "th" for cell in row_cells(row)):
+                break
+    return " | ".join(cell_text(cell) for row in rows for cell in row_cells(row))
+
+def frame_fingerprint(table:pd.DataFrame) -> str:
+    """Returns the header text of a table read by pd.read_html, to match fingerprint"""
+
+    if isinstance(table.columns, pd.RangeIndex):
+        return " | ".join(str(item) for item in table.iloc[0]) if len(table) else ""
+    if isinstance(table.columns, pd.MultiIndex):
+        return " | ".join(str(item) for level in zip(*table.columns) for item in level)
+    return " | ".join(str(item) for item in table.columns)
+
+def split_table(table) -> tuple:
+    """Returns the header, body and footer text rows of a table element"""
+
+    cells = row_cells
+    header = [cells(row) for thead in table.iter("thead") for row in thead if row.tag == "tr"]
+    body = ([cells(row) for tbody in table.iter("tbody") for row in tbody.iter("tr")] +
+            [cells(row) for row in table if row.tag == "tr"])
+    footer = [cells(row) for tfoot in table.iter("tfoot") for row in tfoot.iter("tr")]
+    if not header:
+        # Without a <thead> the rows at the top which are all <th> make up the header
+        while body and body[0] and all(cell.tag == "th" for cell in body[0]):
+            header.append(body.pop(0))
+    return expand_rows(header), expand_rows(body), expand_rows(footer)
+
+def iter_elements(page:str) -> Iterator:
+    """
+    Streams the displayed table elements in a page. Each table is released once the caller
+    has moved on to the next one.
+    """
+
+    # Imported here so lxml is only needed when this backend is used
+    from lxml import etree # pylint: disable=import-outside-toplevel
+
+    nested_tables = []
+    for _, table in etree.iterparse(
+            io.BytesIO(page.encode("utf-8")), events=("end",), tag="table", html=True,
+            recover=True, encoding="utf-8"):
+        if any(parent.tag == "table" for parent in table.iterancestors()):
+            # Nested tables are returned after the table containing them, in page order
+            nested_tables.append(table)
+            continue
+        if not hidden(table):
+            prepare(table)
+            # Hidden tables within this one have just been removed from it
+            shown = [element for element in nested_tables
+                     if any(parent is table for parent in element.iterancestors())]
+            for element in shown:
+                prepare(element)
+            yield table
+            yield from shown
+        nested_tables = []
+        table.clear()
+        while table.getprevious() is not None:
+            del table.getparent()[0]
+
+def prepare(table) -> None:
+    """Remove the hidden parts of a table and keep its line breaks as new lines"""
+
+    for element in table.xpath(".//*[@style]"):
+        if hidden(element):
+            drop(element)
+    for line_break in table.iter("br"):
+        # Those in nested tables are done separately
+        if next(line_break.iterancestors("table")) is table:
+            line_break.tail = "\n" + (line_break.tail or "")
+
+def iter_tables(page:str, match:str=".+") -> Iterator[tuple]:
+    """
+    Streams the tables in a page, yielding the header, body and footer text rows of each
+    table containing text which matches
+    """
+
+    pattern = re.compile(match)
+    for table in iter_elements(page):
+        if any(pattern.search(text) for text in table.itertext()):
+            yield split_table(table)
+
+def to_frame(header:list, body:list, footer:list) -> pd.DataFrame:
+    """Converts the text rows of a table to a DataFrame in the same way as pd.read_html"""
+
+    header_rows = None
+    if header:
+        body = header + body
+        if len(header) == 1:
+            header_rows = 0
+        else:
+            # Ignore header rows with no text at all
+            header_rows = [idx for idx, row in enumerate(header) if any(text for text in row)]
+    if footer:
+        body = body + footer
+    if not body:
+        raise EmptyDataError("The table has no rows")
+    # Pad out any ragged rows
+    width = max(len(row) for row in body)
+    body = [row + [""] * (width - len(row)) for row in body]
+    with TextParser(body, header=header_rows, skiprows=0, parse_dates=False, thousands=",",
+                    decimal=".", keep_default_na=True) as parser:
+        return parser.read()
+
+def read_tables(page:str, match:str=".+") -> list:
+    """Reads every table in a page which matches, using lxml instead of bs4"""
+
+    tables = []
+    for header, body, footer in iter_tables(page, match):
+        try:
+            tables.append(to_frame(header, body, footer))
+        except EmptyDataError:
+            # An empty table
+            continue
+    if not tables:
+        raise ValueError(f"No tables found matching regex {repr(match)}")
+    return tables
+
+def missing_error(locators:list, found:list) -> ValueError:
+    """Returns the error raised when a located table isn't on the page"""
+    missing = [f"{locator.header} ({locator.occurrence})"
+               for locator, table in zip(locators, found) if table is None]
+    return ValueError(f"No tables found matching the headers {', '.join(missing)}")
+
+def locate_tables(page:str, locators:list) -> list:
+    """
+    Returns the tables matching each locator in turn. Only the matching tables are converted
+    to DataFrames and the page stops being read once they've all been found.
+    """
+
+    found:list[Optional[pd.DataFrame]] = [None] * len(locators)
+    seen = [0] * len(locators)
+    for table in iter_elements(page):
+        header_text = fingerprint(table)
+        for idx, locator in enumerate(locators):
+            if found[idx] is None and locator.matches(header_text):
+                if seen[idx] == locator.occurrence:
+                    found[idx] = to_frame(*split_table(table))
+                seen[idx] += 1
+        if all(table is not None for table in found):
+            return found
+    raise missing_error(locators, found)
+
+def locate_frames(tables:list, locators:list) -> list:
+    """Picks the tables matching each locator from tables which have already been read"""
+
+    found:list[Optional[pd.DataFrame]] = [None] * len(locators)
+    for idx, locator in enumerate(locators):
+        matching = [table for table in tables if locator.matches(frame_fingerprint(table))]
+        if len(matching) > locator.occurrence:
+            found[idx] = matching[locator.occurrence]
+    if any(table is None for table in found):
+        raise missing_error(locators, found)
+    return found
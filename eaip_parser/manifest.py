@@ -0,0 +1,153 @@
+"""
+eAIP Parser
+Chris Parkinson (@chssn)
+"""
+
+#!/usr/bin/env python3.9
+
+# Standard Libraries
+import dataclasses
+import glob
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Callable, Optional
+
+# Third Party Libraries
+from loguru import logger
+
+# Local Libraries
+import eaip_parser
+from eaip_parser import functions, metrics, staging
+
+
+class Manifest:
+    """
+    Records a content hash of the inputs and settings used by each stage so that a stage can be
+    skipped when nothing it depends on has changed. Given the previous cycle's DataFrames, a
+    stage whose inputs are the same as they were then reuses that cycle's outputs.
+    """
+
+    def __init__(
+            self,
+            file_path:Optional[str]=None,
+            skip_unchanged:bool=True,
+            previous_dir:Optional[str]=None,
+            ) -> None:
+        if file_path is None:
+            file_path = os.path.join(functions.work_dir, "DataFrames", "manifest.json")
+        self.file_path = file_path
+        # If not set, stages are always run but their hashes are still recorded
+        self.skip_unchanged = skip_unchanged
+        self.stages = self.load(self.file_path)
+        self.previous_dir = previous_dir
+        self.previous_stages = self.load(os.path.join(previous_dir, "manifest.json")
+                                         if previous_dir else "")
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def load(file_path:str) -> dict:
+        """Load the stage hashes from a manifest, if there is one"""
+        if not os.path.exists(file_path):
+            return {}
+        with open(file_path, "r", encoding="utf-8") as file:
+            return json.load(file)
+
+    @staticmethod
+    def digest(files:list, settings:Any=None) -> str:
+        """Returns a hash of the given files and settings"""
+
+        sha = hashlib.sha256()
+        # Changing the parser version should always trigger a rebuild
+        sha.update(json.dumps([eaip_parser.__VERSION__, settings], sort_keys=True,
+                              default=Manifest._encode).encode("utf-8"))
+        for file_path in sorted(files):
+            sha.update(os.path.basename(file_path).encode("utf-8"))
+            with open(file_path, "rb") as file:
+                sha.update(hashlib.sha256(file.read()).digest())
+        return sha.hexdigest()
+
+    @staticmethod
+    def _encode(value:Any) -> Any:
+        """Makes dataclasses such as BuildSettings serialisable"""
+        if dataclasses.is_dataclass(value):
+            return dataclasses.asdict(value)
+        return str(value)
+
+    def unchanged(self, stage:str, digest:str) -> bool:
+        """Checks if a stage was last run with the same inputs"""
+        with self._lock:
+            return self.stages.get(stage) == digest
+
+    def update(self, stage:str, digest:str) -> None:
+        """Record the inputs a stage was run with"""
+        with self._lock:
+            self.stages[stage] = digest
+            self.save()
+
+    def forget(self, stage:str) -> None:
+        """Remove a stage so that it is always run next time"""
+        with self._lock:
+            if self.stages.pop(stage, None) is not None:
+                self.save()
+
+    def reuse(self, stage:str, digest:str, outputs:list) -> bool:
+        """Link the previous cycle's outputs for a stage if it was run with the same inputs"""
+
+        if not self.previous_dir or self.previous_stages.get(stage) != digest:
+            return False
+        path = os.path.join(functions.work_dir, "DataFrames")
+        for pattern in outputs:
+            for file in glob.glob(os.path.join(path, pattern)):
+                os.remove(file)
+            for file in glob.glob(os.path.join(self.previous_dir, pattern)):
+                staging.link_or_copy(file, os.path.join(path, os.path.basename(file)))
+        logger.info(f"Reusing the previous cycle's output for {stage}")
+        return True
+
+    def save(self) -> None:
+        """Save the manifest"""
+        directory = os.path.dirname(self.file_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        temp_path = f"{self.file_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump(self.stages, file, indent=2, sort_keys=True)
+        os.replace(temp_path, self.file_path)
+
+    def stage(
+            self,
+            stage:str,
+            func:Callable,
+            inputs:list,
+            settings:Any=None,
+            outputs:Optional[list]=None,
+            ) -> Callable:
+        """
+        Wraps a stage so that it only runs if its inputs have changed. Inputs and outputs are
+        glob patterns within DataFrames, stale outputs are deleted before the stage is rerun.
+        """
+
+        def run(*args, **kwargs) -> None:
+            path = os.path.join(functions.work_dir, "DataFrames")
+            files = {file for pattern in inputs for file in glob.glob(os.path.join(path, pattern))}
+            digest = self.digest(list(files), settings)
+            if self.skip_unchanged and self.unchanged(stage, digest):
+                logger.info(f"Skipping {stage} as its inputs haven't changed")
+                with metrics.collector.stage("cache", stage):
+                    metrics.collector.count("cache_hits")
+                return
+            if self.reuse(stage, digest, outputs or []):
+                with metrics.collector.stage("cache", stage):
+                    metrics.collector.count("cache_hits")
+                self.update(stage, digest)
+                return
+            for pattern in outputs or []:
+                for file in glob.glob(os.path.join(path, pattern)):
+                    os.remove(file)
+            # Forget the old hash first so a failed run is retried next time
+            self.forget(stage)
+            func(*args, **kwargs)
+            self.update(stage, digest)
+        return run
@@ -0,0 +1,176 @@
+"""
+eAIP Parser
+Chris Parkinson (@chssn)
+"""
+
+#!/usr/bin/env python3.9
+
+# Standard Libraries
+import functools
+import json
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Iterator
+
+# Third Party Libraries
+from loguru import logger
+
+# Local Libraries
+from eaip_parser import functions
+
+
+@dataclass
+class StageMetrics:
+    """Metrics recorded against a single stage and section"""
+    stage:str
+    section:str=""
+    calls:int=0
+    wall_time:float=0.0
+    cpu_time:float=0.0
+    rows:int=0
+    http_requests:int=0
+    bytes_downloaded:int=0
+    cache_hits:int=0
+
+
+class Metrics:
+    """Collects timings and work counters for each stage of a run"""
+
+    # Counters which can be incremented with count()
+    counters = ["rows", "http_requests", "bytes_downloaded", "cache_hits"]
+
+    def __init__(self) -> None:
+        self.stages:dict = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _stack(self) -> list:
+        """Returns the stack of stages active on the current thread"""
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    def reset(self) -> None:
+        """Clear all recorded metrics"""
+        with self._lock:
+            self.stages = {}
+
+    def get(self, stage:str, section:str="") -> StageMetrics:
+        """Returns the metrics for a stage and section, creating them if required"""
+        with self._lock:
+            key = (stage, section)
+            if key not in self.stages:
+                self.stages[key] = StageMetrics(stage, section)
+            return self.stages[key]
+
+    def bind(self, func:Callable) -> Callable:
+        """
+        Returns func bound to the stages active on this thread, so that anything it counts on a
+        worker thread is also attributed to them
+        """
+
+        parents = list(self._stack())
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            stack = self._stack()
+            depth = len(stack)
+            stack.extend(parents)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                del stack[depth:]
+        return wrapper
+
+    @contextmanager
+    def stage(self, stage:str, section:str="") -> Iterator[StageMetrics]:
+        """
+        Time a stage, counters are attributed to every stage active on this thread and to those
+        a worker thread was bound to
+        """
+
+        record = self.get(stage, section)
+        stack = self._stack()
+        stack.append(record)
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            yield record
+        finally:
+            wall = time.perf_counter() - wall_start
+            cpu = time.thread_time() - cpu_start
+            stack.pop()
+            with self._lock:
+                record.calls += 1
+                record.wall_time += wall
+                record.cpu_time += cpu
+            logger.debug(f"{stage} {section} took {wall:.3f}s (CPU {cpu:.3f}s)")
+
+    def count(self, counter:str, value:int=1) -> None:
+        """Increment a counter for every stage active on the current thread"""
+
+        if counter not in self.counters:
+            raise ValueError(f"Counter must be one of {self.counters}")
+        with self._lock:
+            for record in self._stack():
+                setattr(record, counter, getattr(record, counter) + value)
+
+    def to_dict(self) -> dict:
+        """Returns all recorded metrics as a dict"""
+        with self._lock:
+            return {"stages": [asdict(record) for record in self.stages.values()]}
+
+    def write_json(self, file_path:str) -> None:
+        """Export the metrics as JSON"""
+        functions.unshare(file_path)
+        with open(file_path, "w", encoding="utf-8") as file:
+            json.dump(self.to_dict(), file, indent=2)
+        logger.info(f"Metrics written to {file_path}")
+
+    def to_prometheus(self) -> str:
+        """Returns the metrics in the Prometheus text exposition format"""
+
+        families = [
+            ("calls", "counter", "Number of times the stage has run"),
+            ("wall_time", "gauge", "Wall time spent in the stage in seconds"),
+            ("cpu_time", "gauge", "CPU time spent in the stage in seconds"),
+            ("rows", "counter", "Number of rows processed by the stage"),
+            ("http_requests", "counter", "Number of HTTP requests made by the stage"),
+            ("bytes_downloaded", "counter", "Number of bytes downloaded by the stage"),
+            ("cache_hits", "counter", "Number of cache hits during the stage"),
+        ]
+        records = self.to_dict()["stages"]
+        lines = []
+        for field, metric_type, description in families:
+            name = f"eaip_parser_stage_{field}"
+            if metric_type == "counter":
+                name = f"{name}_total"
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for record in records:
+                labels = f'stage="{record["stage"]}",section="{record["section"]}"'
+                lines.append(f"{name}{{{labels}}} {record[field]}")
+
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, file_path:str) -> None:
+        """Export the metrics as a Prometheus text format file"""
+        with open(file_path, "w", encoding="utf-8") as file:
+            file.write(self.to_prometheus())
+        logger.info(f"Prometheus metrics written to {file_path}")
+
+
+# Metrics for the current process
+collector = Metrics()
+
+def timed(stage:str, section:str="") -> Any:
+    """A decorator to record metrics for the given stage"""
+    def decorator_func(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with collector.stage(stage, section):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator_func
@@ -0,0 +1,129 @@
+"""
+eAIP Parser
+Chris Parkinson (@chssn)
+"""
+
+#!/usr/bin/env python3.9
+
+# Standard Libraries
+import concurrent.futures
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+# Third Party Libraries
+from loguru import logger
+
+# Local Libraries
+from eaip_parser import metrics
+
+
+@dataclass
+class Task:
+    """A unit of work in the pipeline along with the data it reads and writes"""
+    name:str
+    func:Callable
+    inputs:list=field(default_factory=list)
+    outputs:list=field(default_factory=list)
+    duration:float=0.0
+
+
+class Pipeline:
+    """
+    Runs a set of tasks in dependency order. A task depends on every task which outputs one of
+    its inputs, inputs which no task outputs are assumed to already exist. Independent tasks are
+    run concurrently on a pool of worker threads.
+    """
+
+    def __init__(self, tasks:Optional[list]=None) -> None:
+        self.tasks:dict = {}
+        for task in tasks or []:
+            self.add(task)
+
+    def add(self, task:Task) -> None:
+        """Add a task to the pipeline"""
+
+        if task.name in self.tasks:
+            raise ValueError(f"A task called {task.name} already exists")
+        for other in self.tasks.values():
+            clash = set(task.outputs) & set(other.outputs)
+            if clash:
+                raise ValueError(f"{task.name} and {other.name} both output {sorted(clash)}")
+        self.tasks[task.name] = task
+
+    def dependencies(self, name:str) -> set:
+        """Returns the names of the tasks which the given task depends on"""
+
+        inputs = set(self.tasks[name].inputs)
+        return {other.name for other in self.tasks.values()
+                if other.name != name and inputs & set(other.outputs)}
+
+    def order(self) -> list:
+        """Returns the task names in an order which satisfies every dependency"""
+
+        remaining = {name: self.dependencies(name) for name in self.tasks}
+        ordered:list = []
+        while remaining:
+            ready = [name for name, deps in remaining.items() if not deps - set(ordered)]
+            if not ready:
+                raise ValueError(f"The pipeline has a dependency cycle between {sorted(remaining)}")
+            for name in ready:
+                ordered.append(name)
+                del remaining[name]
+        return ordered
+
+    def run(self, workers:int=4) -> None:
+        """Run every task, starting each one as soon as all of its dependencies have finished"""
+
+        dependencies = {name: self.dependencies(name) for name in self.order()}
+        done:set = set()
+        running:dict = {}
+
+        # Anything a task counts is also counted against the stages the pipeline is run in
+        @metrics.collector.bind
+        def timed(task:Task) -> None:
+            start = time.perf_counter()
+            try:
+                task.func()
+            finally:
+                task.duration = time.perf_counter() - start
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            while len(done) < len(dependencies):
+                for name, deps in dependencies.items():
+                    if name not in done and name not in running.values() and deps <= done:
+                        logger.debug(f"Starting {name}")
+                        running[executor.submit(timed, self.tasks[name])] = name
+                finished, _ = concurrent.futures.wait(
+                    running, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    error = future.exception()
+                    if error:
+                        # Let anything already running finish but don't start anything new
+                        logger.error(f"{name} failed - {error}")
+                        concurrent.futures.wait(running)
+                        raise error
+                    logger.debug(f"Finished {name} in {self.tasks[name].duration:.2f}s")
+                    done.add(name)
+
+        path = self.critical_path()
+        logger.info(f"Critical path: {' > '.join(path)} "
+                    f"({sum(self.tasks[name].duration for name in path):.2f}s)")
+
+    def critical_path(self) -> list:
+        """Returns the chain of dependent tasks with the longest combined duration"""
+
+        finish:dict = {}
+        previous:dict = {}
+        for name in self.order():
+            deps = self.dependencies(name)
+            before = max(deps, key=lambda dep: finish[dep]) if deps else None
+            finish[name] = self.tasks[name].duration + (finish[before] if before else 0.0)
+            previous[name] = before
+        if not finish:
+            return []
+        path = [max(finish, key=lambda name: finish[name])]
+        while previous[path[0]]:
+            path.insert(0, previous[path[0]])
+        return path
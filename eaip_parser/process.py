@@ -16,7 +16,7 @@ import pandas as pd # type: ignore
 from loguru import logger
 
 # Local Libraries
-from eaip_parser import functions, lists
+from eaip_parser import functions, lists, metrics
 
 # This is needed to supress 'xml as html' warnings with bs4
 warnings.filterwarnings("ignore", category=UserWarning)
@@ -28,6 +28,7 @@ class ProcessAerodromes:
     def __init__(self) -> None:
         pass
 
+    @metrics.timed("process", "AD-2")
     def run(self) -> None:
         """Run the full process"""
 
@@ -35,63 +36,80 @@ class ProcessAerodromes:
         df_to_load = os.path.join(functions.work_dir, "DataFrames", "AD-1.3.csv")
         df_ad_1_3 = pd.read_csv(df_to_load)
 
-        data = {}
-        data["obstacles"] = pd.DataFrame(columns=lists.column_headers_ad_2_10)
-        data["runways"] = pd.DataFrame(columns=lists.column_headers_ad_2_12)
-        data["ats"] = pd.DataFrame(columns=lists.column_headers_ad_2_17)
-        data["comms"] = pd.DataFrame(columns=lists.column_headers_ad_2_18)
-        data["navaids"] = pd.DataFrame(columns=lists.column_headers_ad_2_19)
-        file = {}
-
+        data = self.empty_tables()
         # For each aerodrome defined in AD 1.3 do this
         for index, row in df_ad_1_3.iterrows():
             logger.info(f"Processing {row['icao_designator']} ({index})")
-            # Find all the tables relating to the specified aerodrome
-            data["aero_tables"] = functions.generate_file_names(row["icao_designator"])
-            # Iterate over that list of tables
-            for table in data["aero_tables"]:
-                data["df_path"] = os.path.join(functions.work_dir, "DataFrames", table)
-                data["table"] = pd.read_csv(data["df_path"])
-                # Search for the table containing AD 2.2
-                file["check"] = self.ad_2_2(data["table"])
-                if file["check"]:
-                    file["basic"] = file["check"]
-                # Search for the table containing AD 2.10 and concat to obstacle df
-                data["obstacles"] = pd.concat([
-                    data["obstacles"],
-                    self.ad_2_10(data["table"], row["icao_designator"])
-                    ], ignore_index=True)
-
-                # Search for the other tables
-                data["search"] = [
-                    # AD 2.12
-                    ("runways", "Designations RWY Number", lists.column_headers_ad_2_12, [0]),
-                    # AD 2.17
-                    ("ats", "Designation and lateral limits", lists.column_headers_ad_2_17, [0]),
-                    # AD 2.18
-                    ("comms", "Service Designation", lists.column_headers_ad_2_18, [0]),
-                    # AD 2.19
-                    ("navaids", "Type of Aid CAT", lists.column_headers_ad_2_19, [0]),
-                ]
-                for idt, srch, columns, drop in data["search"]:
-                    table_out = self.ad_2_generic(
-                        data["table"],
-                        row["icao_designator"],
-                        srch,
-                        columns,
-                        drop
-                        )
-                    data[idt] = pd.concat([data[idt], table_out], ignore_index=True)
+            self.combine(data, self.process_aerodrome(row["icao_designator"]))
+        self.save(data)
+
+    @staticmethod
+    def empty_tables() -> dict:
+        """Returns an empty set of the combined aerodrome tables"""
+        return {
+            "obstacles": pd.DataFrame(columns=lists.column_headers_ad_2_10),
+            "runways": pd.DataFrame(columns=lists.column_headers_ad_2_12),
+            "ats": pd.DataFrame(columns=lists.column_headers_ad_2_17),
+            "comms": pd.DataFrame(columns=lists.column_headers_ad_2_18),
+            "navaids": pd.DataFrame(columns=lists.column_headers_ad_2_19),
+        }
+
+    @staticmethod
+    def combine(data:dict, aerodrome:dict) -> None:
+        """Add the tables for a single aerodrome to the combined tables"""
+        for item, dataframe in aerodrome.items():
+            data[item] = pd.concat([data[item], dataframe], ignore_index=True)
+
+    def process_aerodrome(self, icao:str) -> dict:
+        """Returns the tables for a single aerodrome"""
+
+        data = self.empty_tables()
+        file = {}
+        # Find all the tables relating to the specified aerodrome
+        aero_tables = functions.generate_file_names(icao)
+        # Iterate over that list of tables
+        for table_name in aero_tables:
+            df_path = os.path.join(functions.work_dir, "DataFrames", table_name)
+            table = pd.read_csv(df_path)
+            metrics.collector.count("rows", len(table))
+            # Search for the table containing AD 2.2
+            file["check"] = self.ad_2_2(table)
+            if file["check"]:
+                file["basic"] = file["check"]
+            # Search for the table containing AD 2.10 and concat to obstacle df
+            data["obstacles"] = pd.concat([
+                data["obstacles"],
+                self.ad_2_10(table, icao)
+                ], ignore_index=True)
+
+            # Search for the other tables
+            search = [
+                # AD 2.12
+                ("runways", "Designations RWY Number", lists.column_headers_ad_2_12, [0]),
+                # AD 2.17
+                ("ats", "Designation and lateral limits", lists.column_headers_ad_2_17, [0]),
+                # AD 2.18
+                ("comms", "Service Designation", lists.column_headers_ad_2_18, [0]),
+                # AD 2.19
+                ("navaids", "Type of Aid CAT", lists.column_headers_ad_2_19, [0]),
+            ]
+            for idt, srch, columns, drop in search:
+                table_out = self.ad_2_generic(table, icao, srch, columns, drop)
+                data[idt] = pd.concat([data[idt], table_out], ignore_index=True)
+        return data
+
+    @staticmethod
+    def save(data:dict) -> None:
+        """Save the combined tables"""
 
         # Do some house cleaning before commiting
         for item, dataframe in data.items():
-            if (item not in ["table", "aero_tables", "search"] and
-                isinstance(dataframe, pd.DataFrame)):
-                del dataframe["id"]
-                data["df_path"] = os.path.join(
-                    functions.work_dir, "DataFrames", f"AA - {str(item).upper()}.csv"
-                    )
-                dataframe.to_csv(data["df_path"])
+            del dataframe["id"]
+            df_path = os.path.join(
+                functions.work_dir, "DataFrames", f"AA - {str(item).upper()}.csv"
+                )
+            functions.unshare(df_path)
+            dataframe.to_csv(df_path)
 
     @staticmethod
     def ad_2_generic(
@@ -0,0 +1,176 @@
+"""
+eAIP Parser
+Chris Parkinson (@chssn)
+"""
+
+#!/usr/bin/env python3.9
+
+# Standard Libraries
+import os
+import shutil
+import time
+from typing import Optional
+
+# Third Party Libraries
+from loguru import logger
+
+# Local Libraries
+from eaip_parser import functions
+
+# The staged output currently being written, if any
+active:Optional["StagedOutput"] = None
+
+
+def paths(root:Optional[str]=None) -> tuple:
+    """Returns the live DataFrames, staging and generations paths for a working directory"""
+    if root is None:
+        root = functions.work_dir
+    return (
+        os.path.join(root, "DataFrames"),
+        os.path.join(root, ".staging"),
+        os.path.join(root, ".generations"),
+        )
+
+def generations(root:Optional[str]=None) -> list:
+    """Returns the published generations, oldest first"""
+    generations_dir = paths(root)[2]
+    if not os.path.isdir(generations_dir):
+        return []
+    return sorted(
+        os.path.normpath(os.path.join(generations_dir, name))
+        for name in os.listdir(generations_dir) if name.startswith("DataFrames-"))
+
+def current(root:Optional[str]=None) -> Optional[str]:
+    """Returns the generation the live DataFrames directory points to"""
+    live = paths(root)[0]
+    if not os.path.islink(live):
+        return None
+    return os.path.normpath(os.path.join(os.path.dirname(live), os.readlink(live)))
+
+def link_or_copy(source:str, destination:str) -> None:
+    """Hard link a file into the staged output, copying it where links aren't available"""
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copy2(source, destination)
+
+def new_generation(root:Optional[str]=None) -> str:
+    """Returns the path for a new generation, which sorts after every existing one"""
+    stamp = time.time_ns()
+    while os.path.exists(os.path.join(paths(root)[2], f"DataFrames-{stamp}")):
+        stamp += 1
+    return os.path.normpath(os.path.join(paths(root)[2], f"DataFrames-{stamp}"))
+
+def swap(target:str, root:Optional[str]=None) -> None:
+    """
+    Point the live DataFrames directory at a generation. Where symlinks are available the link
+    is replaced in a single rename, otherwise the live directory is moved out of the way and
+    the generation moved into place.
+    """
+
+    live, _, generations_dir = paths(root)
+    if os.path.isdir(live) and not os.path.islink(live):
+        # The live directory is kept as a generation rather than replaced
+        os.makedirs(generations_dir, exist_ok=True)
+        os.replace(live, new_generation(root))
+    link = f"{live}.tmp"
+    if os.path.lexists(link):
+        os.unlink(link)
+    try:
+        os.symlink(os.path.relpath(target, os.path.dirname(live)), link,
+                   target_is_directory=True)
+    except OSError:
+        logger.warning("Symlinks aren't available, the output will be swapped by moving it")
+        os.replace(target, live)
+        return
+    os.replace(link, live)
+
+def rollback(root:Optional[str]=None) -> str:
+    """Point the live DataFrames directory back at the previous generation"""
+
+    live = paths(root)[0]
+    now = current(root)
+    older = [generation for generation in generations(root)
+             if now is None or generation < now]
+    if not older:
+        raise ValueError("There isn't a previous generation to roll back to")
+    swap(older[-1], root)
+    logger.info(f"Rolled {live} back to {older[-1]}")
+    return older[-1]
+
+
+class StagedOutput:
+    """
+    Writes everything a run outputs to a staging copy of the DataFrames directory and swaps it
+    into place once the run succeeds, so anything reading the output never sees a partial tree.
+    The generation which was live before is kept so the swap can be rolled back.
+
+    The staging copy hard links the live files rather than copying them, so anything which
+    writes to a staged file has to call functions.unshare on it first.
+
+    A failed run leaves the staging directory behind for a resumed run to carry on with.
+    Staging is entered once, so a staged method called from within a staged run is part of it.
+    """
+
+    def __init__(self, copy:bool=True, resume:bool=False, root:Optional[str]=None) -> None:
+        self.root = root
+        self.copy = copy
+        self.resume = resume
+        self.nested = False
+        self._work_dir = ""
+
+    def __enter__(self) -> "StagedOutput":
+        global active # pylint: disable=global-statement
+        if active is not None:
+            self.nested = True
+            return self
+        if self.root is None:
+            self.root = functions.work_dir
+        live, staging_root, _ = paths(self.root)
+        staging = os.path.join(staging_root, "DataFrames")
+        if self.resume and os.path.isdir(staging):
+            logger.info(f"Carrying on with the staged output in {staging}")
+        else:
+            if os.path.exists(staging_root):
+                shutil.rmtree(staging_root)
+            os.makedirs(staging_root)
+            if self.copy and os.path.isdir(live):
+                shutil.copytree(live, staging, copy_function=link_or_copy)
+            else:
+                os.makedirs(staging)
+        self._work_dir = functions.work_dir
+        functions.work_dir = staging_root
+        active = self
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        global active # pylint: disable=global-statement
+        if self.nested:
+            return
+        functions.work_dir = self._work_dir
+        active = None
+        if exc_type is None:
+            self.publish()
+        else:
+            logger.warning(f"The staged output has been left in {paths(self.root)[1]}")
+
+    def publish(self) -> str:
+        """Swap the staged output into place, keeping the previous generation"""
+
+        live, staging_root, generations_dir = paths(self.root)
+        os.makedirs(generations_dir, exist_ok=True)
+        previous = current(self.root)
+        if os.path.isdir(live) and not os.path.islink(live):
+            # A directory written before staging was used is kept as the previous generation
+            previous = new_generation(self.root)
+            os.replace(live, previous)
+        generation = new_generation(self.root)
+        os.replace(os.path.join(staging_root, "DataFrames"), generation)
+        shutil.rmtree(staging_root)
+        swap(generation, self.root)
+        # Only the new and previous generations are kept
+        for old in generations(self.root):
+            if old not in (generation, previous):
+                shutil.rmtree(old)
+        logger.info(f"Published {generation} to {live}")
+        return generation
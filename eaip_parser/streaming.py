@@ -0,0 +1,128 @@
+"""
+eAIP Parser
+Chris Parkinson (@chssn)
+"""
+
+#!/usr/bin/env python3.9
+
+# Standard Libraries
+import os
+import queue
+import threading
+from typing import Iterator, Optional
+
+# Third Party Libraries
+import pandas as pd # type: ignore
+from loguru import logger
+
+# Local Libraries
+from eaip_parser import functions, metrics
+
+
+class TableStream:
+    """
+    A bounded queue of scraped tables waiting to be processed. Tables are passed by the name
+    they were saved under so the queue itself stays small, the bound stops the scrapers from
+    running too far ahead of the processors.
+    """
+
+    _closed = object()
+
+    def __init__(self, maxsize:int=16) -> None:
+        self._queue:queue.Queue = queue.Queue(maxsize=maxsize)
+
+    def put(self, section:str, name:str) -> None:
+        """Add a table to the stream, waiting for space if the stream is full"""
+        self._queue.put((section, name))
+
+    def close(self, consumers:int) -> None:
+        """Tell each of the consumers that there is nothing more to come"""
+        for _ in range(consumers):
+            self._queue.put(self._closed)
+
+    def __iter__(self) -> Iterator[tuple]:
+        while True:
+            item = self._queue.get()
+            if item is self._closed:
+                return
+            yield item
+
+
+class StreamProcessor:
+    """Processes scraped tables as they arrive on a TableStream"""
+
+    def __init__(self, proc, proc_a, no_build:bool=False) -> None:
+        self.proc = proc
+        self.proc_a = proc_a
+        self.no_build = no_build
+        self.enr_3:dict = {}
+        self.aerodromes:dict = {}
+        self.errors:list = []
+        self._lock = threading.Lock()
+
+    def consume(self, stream:TableStream) -> None:
+        """Process tables until the stream is closed"""
+
+        for section, name in stream:
+            if self.errors:
+                # Keep draining the stream so the scrapers don't block
+                continue
+            try:
+                with metrics.collector.stage("process", section):
+                    self.process(section, name)
+            except Exception as error: # pylint: disable=broad-exception-caught
+                logger.error(f"Unable to process {name} - {error}")
+                with self._lock:
+                    self.errors.append(error)
+
+    def process(self, section:str, name:str) -> None:
+        """Process a single table"""
+
+        if section in ["ENR-2.1", "ENR-2.2"]:
+            if name in self.proc.enr_2_tables:
+                self.proc.process_enr_2_table(name, no_build=self.no_build)
+        elif section in ["ENR-3.2", "ENR-3.3"]:
+            result = self.proc.process_enr_3_table(name)
+            with self._lock:
+                self.enr_3[name] = result
+        elif section in ["ENR-4.1", "ENR-4.4"]:
+            self.proc.process_enr_4_table(name, no_build=self.no_build)
+        elif section in ["ENR-5.1", "ENR-5.2", "ENR-5.3"]:
+            self.proc.process_enr_5_table(name, no_build=self.no_build)
+        elif section == "AD-2":
+            result = self.proc_a.process_aerodrome(name)
+            with self._lock:
+                self.aerodromes[name] = result
+
+    def finish(self, only:Optional[list]=None) -> None:
+        """Complete the processing which needs every table, such as coordinate conversion"""
+
+        if self.errors:
+            raise self.errors[0]
+
+        if functions.section_selected("ENR-3", only):
+            with metrics.collector.stage("process", "ENR-3"):
+                vor_dme:dict = {}
+                nav_aid:dict = {}
+                # Combine in the same order as a normal run, including tables not scraped now
+                for file_name in functions.generate_file_names("ENR-3"):
+                    name = file_name[:-4]
+                    if name in self.enr_3:
+                        result = self.enr_3[name]
+                    else:
+                        result = self.proc.process_enr_3_table(name)
+                    vor_dme.update(result[0])
+                    nav_aid.update(result[1])
+                self.proc.convert_enr_3(vor_dme, nav_aid, no_build=self.no_build)
+
+        if functions.section_selected("AD-2", only):
+            with metrics.collector.stage("process", "AD-2"):
+                df_ad_1_3 = pd.read_csv(
+                    os.path.join(functions.work_dir, "DataFrames", "AD-1.3.csv"))
+                data = self.proc_a.empty_tables()
+                for icao in df_ad_1_3["icao_designator"]:
+                    if icao in self.aerodromes:
+                        self.proc_a.combine(data, self.aerodromes[icao])
+                    else:
+                        self.proc_a.combine(data, self.proc_a.process_aerodrome(icao))
+                self.proc_a.save(data)
@@ -0,0 +1,515 @@
+"""
+eAIP Parser
+Chris Parkinson (@chssn)
+"""
+
+#!/usr/bin/env python3.9
+
+# Standard Libraries
+import html
+import math
+import os
+import random
+import threading
+from dataclasses import dataclass, fields
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+# Third Party Libraries
+from geographiclib.geodesic import Geodesic # type: ignore
+from loguru import logger
+
+# Local Libraries
+from eaip_parser import functions, lists
+
+LETTERS = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+
+@dataclass
+class SyntheticSettings:
+    """Number of records to generate for each section"""
+    aerodromes:int=20
+    routes:int=40
+    points_per_route:int=8
+    navaids:int=50
+    fixes:int=1000
+    airspace:int=30
+    areas:int=60
+    seed:int=0
+
+    def scaled(self, factor:int) -> "SyntheticSettings":
+        """Returns a copy of the settings with every record count multiplied by factor"""
+        scaled = {}
+        for field in fields(self):
+            value = getattr(self, field.name)
+            if field.name not in ["points_per_route", "seed"]:
+                value = value * factor
+            scaled[field.name] = value
+        return SyntheticSettings(**scaled)
+
+
+def cell(*parts:str) -> str:
+    """
+    Join the parts of a cell so that pd.read_html returns them separated by two spaces, which
+    is how the NATS eAIP renders multi-line cells
+    """
+    return "\n ".join(parts)
+
+def word(index:int, length:int=5) -> str:
+    """Returns a unique upper case word for the given index"""
+    letters = []
+    for _ in range(length):
+        index, remainder = divmod(index, 26)
+        letters.append(LETTERS[remainder])
+    return "".join(reversed(letters))
+
+def dms(value:float, is_lat:bool, decimals:bool=True) -> str:
+    """Formats decimal degrees as DDMMSS.ss[NS] or DDDMMSS.ss[EW]"""
+    if is_lat:
+        hemisphere = "N" if value >= 0 else "S"
+    else:
+        hemisphere = "E" if value >= 0 else "W"
+    value = abs(value)
+    degrees = int(value)
+    minutes = int((value - degrees) * 60)
+    seconds = round(((value - degrees) * 60 - minutes) * 60, 2)
+    if seconds >= 60:
+        seconds = 0
+        minutes += 1
+    if minutes >= 60:
+        minutes = 0
+        degrees += 1
+    seconds_out = f"{seconds:05.2f}" if decimals else f"{int(seconds):02d}"
+    return f"{degrees:0{2 if is_lat else 3}d}{minutes:02d}{seconds_out}{hemisphere}"
+
+def table_html(rows:list, header:Optional[list]=None) -> str:
+    """Renders a list of rows as an html table"""
+    out = ["<table>"]
+    if header:
+        out.append("<thead><tr>")
+        out.extend(f"<th>{html.escape(str(item))}</th>" for item in header)
+        out.append("</tr></thead>")
+    out.append("<tbody>")
+    for row in rows:
+        out.append("<tr>")
+        out.extend(f"<td>{html.escape(str(item))}</td>" for item in row)
+        out.append("</tr>")
+    out.append("</tbody></table>")
+    return "".join(out)
+
+def page_html(title:str, tables:list) -> str:
+    """Renders a full page"""
+    return (f"<!DOCTYPE html><html><head><meta charset=\"utf-8\"><title>{html.escape(title)}"
+            f"</title></head><body>{''.join(tables)}</body></html>")
+
+
+class SyntheticAip:
+    """
+    Generates an eAIP in the same shape as the NATS publication, with the number of
+    aerodromes, routes, navaids, fixes, airspace and ENR 5 areas set by SyntheticSettings
+    """
+
+    def __init__(
+            self,
+            settings:SyntheticSettings=SyntheticSettings(),
+            country_code:str="EG",
+            ) -> None:
+        self.settings = settings
+        self.country = country_code.upper()
+        self.language = lists.country_codes[self.country]
+        self.rand = random.Random(settings.seed)
+        self._pages:dict = {}
+        self._lock = threading.Lock()
+
+        # Shared points so that routes, navaids and fixes reference each other
+        self.fixes = [(word(idx + 1000), self.point()) for idx in range(settings.fixes)]
+        self.navaids = [(word(idx + 500, 3), self.point()) for idx in range(settings.navaids)]
+        self.aerodromes = [
+            (f"{word(idx + 2000, 4)}FORD", f"{self.country}{word(idx, 2)}")
+            for idx in range(settings.aerodromes)
+            ]
+
+    def point(self) -> tuple:
+        """Returns a random point within the bounds of the United Kingdom"""
+        return (round(self.rand.uniform(49.9, 60.5), 6), round(self.rand.uniform(-7.9, 1.7), 6))
+
+    def frequency(self) -> str:
+        """Returns a random VHF communications frequency"""
+        return f"{self.rand.randint(118, 135)}.{self.rand.randint(0, 199) * 5:03d} MHz"
+
+    def coords(self, point:tuple, decimals:bool=True) -> str:
+        """Formats a point with two spaces between the lat and lon"""
+        return cell(dms(point[0], True, decimals), dms(point[1], False, decimals))
+
+    def polygon(self, decimals:bool=False) -> str:
+        """Returns a closed polygon around a random point"""
+        centre = self.point()
+        size = self.rand.uniform(0.05, 0.5)
+        corners = [
+            (centre[0] + size, centre[1] - size),
+            (centre[0] + size, centre[1] + size),
+            (centre[0] - size, centre[1] + size),
+            (centre[0] - size, centre[1] - size),
+            ]
+        corners.append(corners[0])
+        return " - ".join(
+            f"{dms(lat, True, decimals)} {dms(lon, False, decimals)}" for lat, lon in corners)
+
+    def circle(self, radius:float=2) -> str:
+        """Returns a circle around a random point"""
+        centre = self.point()
+        return (f"A circle, {radius:g} NM radius, centred at {dms(centre[0], True, False)} "
+                f"{dms(centre[1], False, False)}")
+
+    def file_name(self, section:str) -> str:
+        """Returns the file name for a section, matching Webscrape.url_suffix"""
+        return f"{self.country}-{section}-{self.language}.html"
+
+    def sections(self) -> list:
+        """Returns a list of every section which can be generated"""
+        sections = [
+            "AD-1.3",
+            "ENR-2.1",
+            "ENR-2.2",
+            "ENR-3.2",
+            "ENR-3.3",
+            "ENR-4.1",
+            "ENR-4.4",
+            "ENR-5.1",
+            "ENR-5.2",
+            "ENR-5.3",
+            ]
+        sections.extend(f"AD-2.{icao}" for _, icao in self.aerodromes)
+        return sections
+
+    def page(self, file_name:str) -> Optional[str]:
+        """Returns the html for the given file name, or None if it doesn't exist"""
+
+        with self._lock:
+            if file_name not in self._pages:
+                for section in self.sections():
+                    if self.file_name(section) == file_name:
+                        self._pages[file_name] = self.render(section)
+                        break
+                else:
+                    return None
+            return self._pages[file_name]
+
+    def render(self, section:str) -> str:
+        """Render a section"""
+
+        # Seed each page from its name so pages are stable whatever order they are requested in
+        self.rand = random.Random(f"{self.settings.seed}-{section}")
+        renderers = {
+            "AD-1.3": self.ad_1_3,
+            "ENR-2.1": self.enr_2_1,
+            "ENR-2.2": self.enr_2_2,
+            "ENR-3.2": self.enr_3_2,
+            "ENR-3.3": self.enr_3_3,
+            "ENR-4.1": self.enr_4_1,
+            "ENR-4.4": self.enr_4_4,
+            "ENR-5.1": self.enr_5_1,
+            "ENR-5.2": self.enr_5_2,
+            "ENR-5.3": self.enr_5_3,
+            }
+        if section.startswith("AD-2."):
+            tables = self.ad_2(section.split(".", maxsplit=1)[1])
+        else:
+            tables = renderers[section]()
+        return page_html(section, tables)
+
+    def write(self, path:str) -> None:
+        """Write every page to the given directory"""
+        if not os.path.exists(path):
+            os.makedirs(path)
+        for section in self.sections():
+            file_name = self.file_name(section)
+            with open(os.path.join(path, file_name), "w", encoding="utf-8") as file:
+                file.write(self.page(file_name))
+
+    def ad_1_3(self) -> list:
+        """AD 1.3 - INDEX TO AERODROMES AND HELIPORTS"""
+        header = ["Aerodrome / Heliport name", "ICAO Location Indicator", "Type of traffic",
+                  "IFR / VFR", "S / NS / P", "Reference to AD Section"]
+        rows = [[name, icao, "INTL", "IFR/VFR", "S", f"AD 2-{icao}"]
+                for name, icao in self.aerodromes]
+        return [table_html(rows, header)]
+
+    def ad_2(self, icao:str) -> list:
+        """AD 2 - AERODROMES"""
+
+        name = {code: name for name, code in self.aerodromes}[icao]
+        arp = self.point()
+        tables = []
+
+        # AD 2.2 - AERODROME GEOGRAPHICAL AND ADMINISTRATIVE DATA
+        tables.append(table_html([
+            ["1", "ARP coordinates and site at AD",
+             cell(f"{dms(arp[0], True, False)} {dms(arp[1], False, False)}", "Mid point of RWY")],
+            ["2", "Direction and distance from city", "5 NM N of City"],
+            ["3", "Elevation / Reference temperature / Mean Low Temperature",
+             f"{self.rand.randint(0, 900)} FT / 21°C"],
+            ["4", "Geoid undulation at AD ELEV PSN", "160 FT"],
+            ["5", "Magnetic Variation / Annual Change", "0.50°W (2022) / 0.17°E"],
+            ]))
+
+        # AD 2.10 - AERODROME OBSTACLES
+        obstacles = [
+            ["In Approach/Take-off areas", "", "", "", "", "", ""],
+            ["Obstacle ID / Designation", "Obstacle type", "Obstacle position", "Elevation",
+             "Height", "Markings / Lighting", "Remarks"],
+            ]
+        for idx in range(3):
+            position = self.point()
+            obstacles.append([f"{icao}OB{idx}", "Mast", self.coords(position, False),
+                              f"{self.rand.randint(100, 900)} FT", "100 FT", "Lgtd", "NIL"])
+        tables.append(table_html(obstacles))
+
+        # AD 2.12 - RUNWAY PHYSICAL CHARACTERISTICS
+        heading = self.rand.randint(1, 17)
+        bearing = heading * 10 + self.rand.uniform(-4, 4)
+        far_end = (arp[0] + 0.01 * math.cos(math.radians(bearing)),
+                   arp[1] + 0.016 * math.sin(math.radians(bearing)))
+        tables.append(table_html([
+            ["Designations RWY Number", "TRUE BRG", "Dimensions of RWY", "Surface",
+             "THR coordinates", "THR elevation", "Slope"],
+            [f"{heading:02d}L", f"{bearing:06.2f}°", "2000 x 45 M", "Asphalt",
+             self.coords(arp), "THR 200 FT", "0.1%"],
+            [f"{heading + 18:02d}R", f"{bearing + 180:06.2f}°", "2000 x 45 M", "Asphalt",
+             self.coords(far_end), "THR 210 FT", "0.1%"],
+            ]))
+
+        # AD 2.17 - AIR TRAFFIC SERVICES AIRSPACE
+        tables.append(table_html([
+            ["Designation and lateral limits", "Vertical limits", "Airspace classification",
+             "ATS unit call sign", "Transition altitude", "Hours of applicability",
+             "Remarks"],
+            [cell(f"{name} ATZ", f"{self.circle()} on longest notified runway"),
+             cell("Upper limit: 2000 FT AGL", "Lower limit: SFC"), "G",
+             f"{name} TOWER", "6000 FT", "H24", "NIL"],
+            ]))
+
+        # AD 2.18 - AIR TRAFFIC SERVICES COMMUNICATION FACILITIES
+        tables.append(table_html([
+            ["Service Designation", "Call sign", "Channel", "SATVOICE", "Logon address",
+             "Hours of operation", "Remarks"],
+            ["APP", f"{name} RADAR", self.frequency(), "NIL", "NIL", "H24", "NIL"],
+            ["TWR", f"{name} TOWER", self.frequency(), "NIL", "NIL", "H24", "NIL"],
+            ["ATIS", f"{name} INFORMATION", self.frequency(), "NIL", "NIL", "H24", "NIL"],
+            ]))
+
+        # AD 2.19 - RADIO NAVIGATION AND LANDING AIDS
+        tables.append(table_html([
+            ["Type of Aid CAT of ILS", "ID", "Frequency", "Hours of operation",
+             "Position of transmitting antenna coordinates", "Elevation", "Remarks"],
+            ["ILS/LOC", f"I{icao[1:]}", "110.500 MHz", "H24", self.coords(arp), "NIL", "NIL"],
+            ]))
+
+        return tables
+
+    def airspace_row(self, name:str, unit:str) -> list:
+        """Returns a single row for an ENR 2 airspace table"""
+        return [
+            cell(name, self.polygon(), "Upper limit: FL245", "Lower limit: FL105", "Class: C"),
+            f"{unit} ACC",
+            cell(f"{unit} CONTROL", "English", "H24"),
+            self.frequency(),
+            "NIL",
+            ]
+
+    def enr_2_1(self) -> list:
+        """ENR 2.1 - FIR, UIR, TMA AND CTA"""
+        header = ["Name Lateral limits Vertical limits Class of airspace", "Unit providing service",
+                  "Call sign Languages Hours of service", "Frequency Purpose", "Remarks"]
+        areas = [self.airspace_row(f"{word(idx + 3000)} CTA {idx % 9 + 1}", "LONDON")
+                 for idx in range(self.settings.airspace)]
+        ctrs = [self.airspace_row(f"{name} CTR", name) for name, _ in self.aerodromes]
+        return [table_html(areas, header), table_html(ctrs, header)]
+
+    def enr_2_2(self) -> list:
+        """ENR 2.2 - OTHER REGULATED AIRSPACE"""
+        header = ["Name Lateral limits Vertical limits Class of airspace", "Unit providing service",
+                  "Call sign Languages Hours of service", "Frequency Purpose", "Remarks"]
+        atz = []
+        for name, _ in self.aerodromes:
+            atz.append([
+                cell(f"{name} ATZ", f"{self.circle()} on longest notified runway",
+                     "Upper limit: 2000 FT AGL", "Lower limit: SFC", "Class: G"),
+                name, cell(f"{name} TOWER", "English", "H24"), self.frequency(), "NIL"])
+        tables = [table_html(atz, header)]
+
+        # Tables 1 to 25 are of no interest to the parser but shift the indices of the rest
+        for idx in range(1, 26):
+            tables.append(table_html(
+                [[f"{word(idx + 4000)} AREA", "SFC - FL 100", "NIL"]],
+                ["Name", "Vertical limits", "Remarks"]))
+
+        # Free route airspace
+        fra = [[f"EGNPZ{idx + 1} {word(idx + 5000)} {self.polygon(True)}",
+                "Upper Limit: FL 660 Lower Limit: FL 255", "NIL"]
+               for idx in range(max(1, self.settings.airspace // 5))]
+        tables.append(table_html(fra, ["Lateral limits", "Vertical limits", "Remarks"]))
+
+        # Channel Islands airspace
+        cia = [[self.polygon(), "[TMA] FL 80 - FL 195 Class A Airspace", "NIL"]
+               for _ in range(max(1, self.settings.airspace // 10))]
+        tables.append(table_html(cia, ["Lateral limits", "Vertical limits", "Remarks"]))
+        return tables
+
+    def route_table(self, route:str) -> str:
+        """Returns a single route table"""
+
+        upper, lower = self.rand.choice([(460, 245), (245, 105), (460, 155)])
+        points = []
+        for _ in range(self.settings.points_per_route):
+            if self.navaids and self.rand.random() < 0.1:
+                ident, position = self.rand.choice(self.navaids)
+                points.append((cell(word(self.rand.randint(0, 10000), 6), "DME", "(", ident, ")"),
+                               position))
+            else:
+                points.append(self.rand.choice(self.fixes))
+
+        empty = [""] * 6
+        rows = [[route, route, "Route availability:", "Route availability:", "", "", "", "",
+                 "", ""]]
+        for idx, (name, position) in enumerate(points):
+            coords = self.coords(position)
+            rows.append(["∆", name, coords, coords, "", "", "", "", "", ""])
+            if idx + 1 < len(points):
+                next_position = points[idx + 1][1]
+                inverse = Geodesic.WGS84.Inverse(
+                    position[0], position[1], next_position[0], next_position[1])
+                track = round(inverse["azi1"]) % 360
+                back = round(inverse["azi2"] + 180) % 360
+                distance = inverse["s12"] / 1852
+                rows.append(["(RNAV 5)", "(RNAV 5)", cell(f"{track:03d}°", f"{back:03d}°"),
+                             f"{distance:.1f} NM", cell(f"FL {upper}", f"FL {lower}"), *empty[:5]])
+        header = ["Route Designator", "Name of significant points", "Coordinates",
+                  "Distance", "Upper limit Lower limit", "Direction of cruising levels", "",
+                  "Remarks", "", ""]
+        return table_html(rows, header)
+
+    def enr_3_2(self) -> list:
+        """ENR 3.2 - AREA NAVIGATION ROUTES"""
+        prefixes = ["L", "M", "N", "P", "Q", "T", "Y", "UL", "UN"]
+        return [self.route_table(f"{prefixes[idx % len(prefixes)]}{idx // len(prefixes) + 1}")
+                for idx in range(self.settings.routes)]
+
+    def enr_3_3(self) -> list:
+        """ENR 3.3 - OTHER ROUTES"""
+        return [self.route_table(f"Z{idx + 1}")
+                for idx in range(max(1, self.settings.routes // 10))]
+
+    def enr_4_1(self) -> list:
+        """ENR 4.1 - RADIO NAVIGATION AIDS - EN-ROUTE"""
+        header = ["Name of station (VAR)", "ID", "Frequency", "Hours of operation",
+                  "Coordinates", "Elevation", "FRA", "Remarks"]
+        tacan_vor = functions.TacanVor()
+        rows = []
+        for ident, position in self.navaids:
+            channel = self.rand.choice(list(range(17, 60)) + list(range(70, 127)))
+            channel_code = f"{channel}{self.rand.choice('XY')}"
+            frequency = tacan_vor.tacan_to_vor_ils(channel_code)
+            if self.rand.random() < 0.5:
+                name = cell(f"{word(self.rand.randint(0, 10000), 6)}", "VOR/DME 0.95°W (2022)")
+                freq_cell = cell(f"{frequency}0 MHz", channel_code)
+            else:
+                name = cell(f"{word(self.rand.randint(0, 10000), 6)}", "DME 0.55°E (2022)")
+                freq_cell = cell(channel_code, f"{frequency}0 MHz")
+            rows.append([name, ident, freq_cell, "H24", self.coords(position), "500 FT", "Y",
+                         "NIL"])
+        return [table_html(rows, header)]
+
+    def enr_4_4(self) -> list:
+        """ENR 4.4 - NAME-CODE DESIGNATORS FOR SIGNIFICANT POINTS"""
+        header = ["Name-code designator", "Coordinates", "ATS route or other route", "FRA",
+                  "Remarks"]
+        rows = [[name, self.coords(position), "NIL", "NIL", "NIL"]
+                for name, position in sorted(self.fixes)]
+        return [table_html(rows, header)]
+
+    def area(self, name:str) -> str:
+        """Returns the lateral limits of an ENR 5 area"""
+        if self.rand.random() < 0.5:
+            return cell(name, self.polygon())
+        return cell(name, self.circle(self.rand.choice([0.5, 2, 5])))
+
+    def enr_5_1(self) -> list:
+        """ENR 5.1 - PROHIBITED, RESTRICTED AND DANGER AREAS"""
+        header = ["Identification, name and lateral limits", "Upper/lower limit", "Remarks"]
+        rows = [[self.area(f"EG {'DPR'[idx % 3]}{idx + 1:03d} {word(idx + 6000)}"),
+                 "FL 100 SFC", "NIL"] for idx in range(self.settings.areas)]
+        return [table_html(rows, header)]
+
+    def enr_5_2(self) -> list:
+        """ENR 5.2 - MILITARY EXERCISE AND TRAINING AREAS"""
+        header = ["Name and lateral limits", "Upper/lower limit", "Remarks"]
+        rows = [[self.area(f"{word(idx + 7000)} AIAA"), "FL 195 SFC", "NIL"]
+                for idx in range(max(1, self.settings.areas // 2))]
+        return [table_html(rows, header)]
+
+    def enr_5_3(self) -> list:
+        """ENR 5.3 - OTHER ACTIVITIES OF A DANGEROUS NATURE"""
+        header = ["Name and lateral limits", "Upper/lower limit", "Advisory measures",
+                  "Authority", "Remarks"]
+        ranges = [[self.area(f"{word(idx + 8000)} RANGE"), "500 FT SFC", "NIL", "NIL", "NIL"]
+                  for idx in range(3)]
+        rows = [[self.area(f"{word(idx + 9000)} ACTIVITY"), "FL 50 SFC", "NIL", "NIL", "NIL"]
+                for idx in range(max(1, self.settings.areas // 2))]
+        return [table_html(ranges, header), table_html(rows, header)]
+
+
+class SyntheticServer:
+    """A local HTTP stand-in for the eAIP host, serving pages from a SyntheticAip"""
+
+    def __init__(self, aip:SyntheticAip, host:str="127.0.0.1", port:int=0) -> None:
+        self.aip = aip
+
+        class Handler(BaseHTTPRequestHandler):
+            """Serve every request by file name, ignoring the AIRAC cycle in the path"""
+
+            def do_GET(self) -> None:
+                """Handle a GET request"""
+                page = aip.page(self.path.rsplit("/", maxsplit=1)[-1])
+                if page is None:
+                    self.send_error(404)
+                    return
+                content = page.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, fmt, *args) -> None:
+                """Send request logs to loguru"""
+                logger.trace(fmt % args)
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self._thread:Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        """The base url to pass to Airac or Webscrape"""
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self) -> "SyntheticServer":
+        """Start serving in a background thread"""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        logger.info(f"Serving a synthetic eAIP at {self.base_url}")
+        return self
+
+    def stop(self) -> None:
+        """Stop serving"""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self) -> "SyntheticServer":
+        return self.start()
+
+    def __exit__(self, *args) -> None:
+        self.stop()
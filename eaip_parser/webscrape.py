@@ -6,97 +6,323 @@ Chris Parkinson (@chssn)
 #!/usr/bin/env python3.9
 
 # Standard Libraries
+import contextlib
+import functools
+import importlib.util
+import io
 import os
 import re
 import shutil
+import threading
 import urllib.error
 import warnings
 from typing import Any, Optional
 
 # Third Party Libraries
 import pandas as pd # type: ignore
+import requests # type: ignore
 from loguru import logger
 
 # Local Libraries
-from eaip_parser import airac, builder, functions, lists, process
+from eaip_parser import (
+    airac, builder, cassette, coordinates, delta, functions, lists, lxml_tables, metrics, process,
+    staging)
+from eaip_parser.archive import Archive, cycle_name
+from eaip_parser.area_file import AreaFile
+from eaip_parser.checkpoint import Checkpoint
+from eaip_parser.manifest import Manifest
+from eaip_parser.pipeline import Pipeline, Task
+from eaip_parser.streaming import StreamProcessor, TableStream
 
 # This is needed to supress 'xml as html' warnings with bs4
 warnings.filterwarnings("ignore", category=UserWarning)
 
-def parse_table(section:str, match:str=".+") -> Any:
-    """A decorator to parse the given section"""
+def parse_table(section:str, match:str=".+", locate:Optional[list]=None) -> Any:
+    """
+    A decorator to parse the given section. If locators are given the function is passed only
+    the tables they match, in the same order.
+    """
     def decorator_func(func):
         def wrapper(self, *args, **kwargs):
             logger.info(f"Parsing {section} data...")
-            tables = self.get_table(section, match)
-            if tables:
-                dataframe = func(self, tables=tables, *args, **kwargs)
-                if isinstance(dataframe, pd.DataFrame):
-                    # If a single dataframe is passed
-                    df_path = os.path.join(functions.work_dir, "DataFrames", f"{section}.csv")
-                    dataframe.to_csv(df_path)
-                elif isinstance(dataframe, list):
-                    # If a list of dataframes are passed
-                    for idx, dfl in enumerate(dataframe):
-                        dfl_path = os.path.join(
-                            functions.work_dir,
-                            "DataFrames",
-                            f"{section}_{idx}.csv"
-                            )
-                        dfl.to_csv(dfl_path)
+            with metrics.collector.stage("scrape", section):
+                tables = self.get_table(section, match, locate)
+                if tables:
+                    dataframe = func(self, tables=tables, *args, **kwargs)
+                    if isinstance(dataframe, pd.DataFrame):
+                        # If a single dataframe is passed
+                        metrics.collector.count("rows", len(dataframe))
+                        df_path = os.path.join(
+                            functions.work_dir, "DataFrames", f"{section}.csv")
+                        functions.unshare(df_path)
+                        dataframe.to_csv(df_path)
+                        if self.stream:
+                            self.stream.put(section, section)
+                    elif isinstance(dataframe, list):
+                        # If a list of dataframes are passed, replacing any from a previous run
+                        functions.remove_files(f"{section}_*.csv")
+                        for idx, dfl in enumerate(dataframe):
+                            metrics.collector.count("rows", len(dfl))
+                            dfl_path = os.path.join(
+                                functions.work_dir,
+                                "DataFrames",
+                                f"{section}_{idx}.csv"
+                                )
+                            functions.unshare(dfl_path)
+                            dfl.to_csv(dfl_path)
+                            if self.stream:
+                                self.stream.put(section, f"{section}_{idx}")
+                    else:
+                        raise TypeError("No pandas dataframe or list was found")
                 else:
-                    raise TypeError("No pandas dataframe or list was found")
-            else:
-                raise functions.NoUrlDataFoundError(section)
+                    raise functions.NoUrlDataFoundError(section)
         return wrapper
     return decorator_func
 
 class Webscrape:
     """Class to scrape data from the given AIRAC eAIP URL"""
 
+    # The sections read with lxml when the html backend is 'auto', these are the pages with
+    # hundreds of tables where bs4 is slowest
+    lxml_sections = ["ENR-3.2", "ENR-3.3"]
+
     def __init__(
             self,
             next_cycle:bool=True,
             country_code:str="EG",
             date_in=0,
+            base_url:Optional[str]=None,
+            html_backend:str="auto",
+            language:Optional[str]=None,
             ) -> None:
-        airac_cycle = airac.Airac()
+        if base_url:
+            airac_cycle = airac.Airac(base_url=base_url)
+        else:
+            airac_cycle = airac.Airac()
         self.cycle_url = airac_cycle.url(next_cycle=next_cycle, date_in=date_in)
 
         # Validate the entry for country_code
         if re.match(r"^[A-Z]{2}$", country_code.upper()):
             self.country = country_code.upper()
-            self.language = lists.country_codes[self.country]
+            self.language = language or lists.country_codes[self.country]
         else:
             raise ValueError("Expected a two character country code such as 'EG'")
 
         # Set the date
         self.date_in = date_in
+        if html_backend not in ["auto", "bs4", "lxml"]:
+            raise ValueError("The html backend must be one of 'auto', 'bs4' or 'lxml'")
+        self.html_backend = html_backend
         # Setup the processors
         self.proc = ProcessData()
         self.proc_a = process.ProcessAerodromes()
+        self.manifest:Optional[Manifest] = None
+        self.checkpoint:Optional[Checkpoint] = None
+        # Scraped tables are passed straight to the processors when streaming
+        self.stream:Optional[TableStream] = None
 
-    def run(self, download_first:bool=True, no_build:bool=False, clean_start:bool=True) -> None:
-        """Runs the full webscrape"""
+    def run(
+            self,
+            download_first:bool=True,
+            no_build:bool=False,
+            clean_start:bool=True,
+            prometheus_path:Optional[str]=None,
+            only:Optional[list]=None,
+            workers:int=4,
+            incremental:bool=False,
+            previous_dir:Optional[str]=None,
+            streaming:bool=False,
+            resume:bool=False,
+            archive:Optional[Archive]=None,
+            ) -> None:
+        """
+        Runs the full webscrape, or only the given sections. An incremental run keeps the
+        previous output and skips any stage whose inputs haven't changed. If the DataFrames
+        directory from the previous cycle is given, the changes since then are written to
+        DataFrames/delta.jsonl, a stage whose tables haven't changed reuses that cycle's output
+        and only coordinates which have changed are converted. A streaming
+        run processes each table as soon as it has been scraped. A resumed run carries on from
+        where an interrupted run for the same cycle stopped. The output is staged and only
+        replaces DataFrames once the run has succeeded, after which it's saved to the archive
+        if one is given.
+        """
+
+        if streaming and (incremental or resume):
+            raise ValueError("A streaming run can't be incremental or resumed")
+        metrics.collector.reset()
+        # Everything is written to a staged copy of DataFrames which replaces it on success
+        with staging.StagedOutput(copy=not clean_start or incremental or resume, resume=resume):
+            if clean_start and not (incremental or resume):
+                self.clean_start()
+            self.manifest = Manifest(
+                skip_unchanged=incremental or resume, previous_dir=previous_dir)
+            self.checkpoint = Checkpoint(self.cycle_url, resume=resume)
+            self.proc.previous_dir = previous_dir
+            self.proc.workers = workers
+            # Keep every conversion so they aren't lost if the run fails
+            coordinates.table.open_journal(
+                os.path.join(functions.work_dir, "DataFrames", "conversions.jsonl"))
+            if previous_dir:
+                # Only points which have changed since the previous cycle are converted
+                coordinates.table.merge_journal(os.path.join(previous_dir, "conversions.jsonl"))
+            try:
+                with metrics.collector.stage("run"):
+                    if streaming and download_first:
+                        self.run_streaming(no_build=no_build, only=only, workers=workers)
+                        if previous_dir:
+                            self.write_delta(previous_dir)
+                    else:
+                        pipe = self.pipeline(
+                            download_first=download_first, no_build=no_build, only=only)
+                        if previous_dir:
+                            # Work out the changes once everything has been scraped
+                            pipe.add(Task(
+                                "delta",
+                                functools.partial(self.write_delta, previous_dir),
+                                [task_output for task in pipe.tasks.values()
+                                 for task_output in task.outputs
+                                 if not task_output.endswith(" processed")],
+                                ["delta"]
+                                ))
+                        pipe.run(workers=workers)
+            finally:
+                coordinates.table.close_journal()
+
+            # Export the metrics for this run
+            metrics.collector.write_json(
+                os.path.join(functions.work_dir, "DataFrames", "metrics.json"))
+
+        if archive:
+            archive.save(cycle_name(self.cycle_url))
+        if prometheus_path:
+            metrics.collector.write_prometheus(prometheus_path)
+
+    def run_streaming(
+            self,
+            no_build:bool=False,
+            only:Optional[list]=None,
+            workers:int=4,
+            maxsize:int=16,
+            ) -> None:
+        """Scrape and process at the same time, passing tables through a bounded queue"""
+
+        self.stream = TableStream(maxsize=maxsize)
+        consumer = StreamProcessor(self.proc, self.proc_a, no_build=no_build)
+        threads = [threading.Thread(target=metrics.collector.bind(consumer.consume),
+                                    args=(self.stream,))
+                   for _ in range(workers)]
+        for thread in threads:
+            thread.start()
+        try:
+            self.scrape(only=only, workers=workers)
+        finally:
+            self.stream.close(len(threads))
+            for thread in threads:
+                thread.join()
+            self.stream = None
+        consumer.finish(only=only)
 
-        if clean_start:
-            self.clean_start()
+    @staticmethod
+    def write_delta(previous_dir:str) -> None:
+        """Write the changes since the previous cycle to DataFrames/delta.jsonl"""
+        current_dir = os.path.join(functions.work_dir, "DataFrames")
+        delta.CycleDelta(previous_dir, current_dir).write(os.path.join(current_dir, "delta.jsonl"))
+
+    def scrape(
+            self,
+            only:Optional[list]=None,
+            workers:int=4,
+            resume:bool=False,
+            clean:bool=False,
+            ) -> None:
+        """
+        Scrape every section, or only the given sections, optionally starting from scratch. A
+        resumed scrape skips the sections and aerodromes already scraped by an interrupted
+        scrape of the same cycle.
+        """
+        with staging.StagedOutput(copy=not clean, resume=resume):
+            if clean:
+                self.clean_start()
+            self.checkpoint = Checkpoint(self.cycle_url, resume=resume)
+            self.pipeline(only=only, process_data=False).run(workers=workers)
+
+    def pipeline(
+            self,
+            download_first:bool=True,
+            no_build:bool=False,
+            only:Optional[list]=None,
+            process_data:bool=True,
+            ) -> Pipeline:
+        """Returns the scrape and process tasks for the given sections"""
+
+        tasks = []
         if download_first:
-            self.parse_ad_2()
-            self.parse_enr_2_1()
-            self.parse_enr_2_2()
-            self.parse_enr_3_2()
-            self.parse_enr_3_3()
-            self.parse_enr_4_1()
-            self.parse_enr_4_4()
-            self.parse_enr_5_1()
-            self.parse_enr_5_2()
-            self.parse_enr_5_3()
-        self.proc.process_enr_2(no_build=no_build)
-        self.proc.process_enr_3(no_build=no_build)
-        self.proc.process_enr_4(no_build=no_build)
-        self.proc.process_enr_5(no_build=no_build)
-        self.proc_a.run()
+            # AD 1.3 lists the aerodromes so is scraped as the first part of AD 2
+            if functions.section_selected("AD-2", only):
+                icao_filter = functions.section_items("AD-2", only)
+                # Each aerodrome is checkpointed as it's scraped
+                tasks.append(Task(
+                    "scrape AD-2",
+                    functools.partial(self.parse_ad_2, icao_filter=icao_filter),
+                    [],
+                    ["AD-1.3", "AD-2"]
+                    ))
+            elif only and "AD-1.3" in only:
+                tasks.append(Task("scrape AD-1.3", self.parse_ad_1_3, [], ["AD-1.3"]))
+            scrapers = [
+                ("ENR-2.1", self.parse_enr_2_1),
+                ("ENR-2.2", self.parse_enr_2_2),
+                ("ENR-3.2", self.parse_enr_3_2),
+                ("ENR-3.3", self.parse_enr_3_3),
+                ("ENR-4.1", self.parse_enr_4_1),
+                ("ENR-4.4", self.parse_enr_4_4),
+                ("ENR-5.1", self.parse_enr_5_1),
+                ("ENR-5.2", self.parse_enr_5_2),
+                ("ENR-5.3", self.parse_enr_5_3),
+            ]
+            for section, scraper in scrapers:
+                if functions.section_selected(section, only):
+                    if self.checkpoint:
+                        scraper = self.checkpoint.stage(f"scrape {section}", scraper)
+                    tasks.append(Task(f"scrape {section}", scraper, [], [section]))
+
+        if process_data:
+            settings = {
+                "kilojuliett": self.proc.build.request_settings,
+                "airway_split": self.proc.airway_split,
+                "consolidate_enr_5": self.proc.consolidate_enr_5,
+                "no_build": no_build,
+            }
+            # Each processor with the scraped sections it reads, the files those sections are
+            # saved as and the files it writes
+            processors = [
+                ("ENR-2", self.proc.process_enr_2, ["ENR-2.1", "ENR-2.2"],
+                 ["ENR-2.1_*.csv", "ENR-2.2_*.csv"], ["ENR-2.*_AIRSPACE.sct"]),
+                ("ENR-3", self.proc.process_enr_3, ["ENR-3.2", "ENR-3.3"],
+                 ["ENR-3*.csv"], ["ENR-3.2-*.txt", "VOR_DME.csv", "NAV_AID.csv"]),
+                ("ENR-4", self.proc.process_enr_4, ["ENR-4.1", "ENR-4.4"],
+                 ["ENR-4.1.csv", "ENR-4.4.csv"], ["VOR_UK.txt", "FIXES_UK.txt"]),
+                ("ENR-5", self.proc.process_enr_5, ["ENR-5.1", "ENR-5.2", "ENR-5.3"],
+                 ["ENR-5.1.csv", "ENR-5.2.csv", "ENR-5.3.csv"],
+                 ["ENR-5.*-*.txt", "ENR-5.?.txt", "ENR-5.?.index.json"]),
+            ]
+            for section, processor, inputs, files_in, files_out in processors:
+                if functions.section_selected(section, only):
+                    func = functools.partial(processor, no_build=no_build)
+                    if self.manifest:
+                        func = self.manifest.stage(
+                            f"process {section}", func, files_in, settings, files_out)
+                    tasks.append(Task(f"process {section}", func, inputs,
+                                      [f"{section} processed"]))
+            if functions.section_selected("AD-2", only):
+                func = self.proc_a.run
+                if self.manifest:
+                    func = self.manifest.stage(
+                        "process AD-2", func, ["AD-1.3.csv", "[A-Z][A-Z][A-Z][A-Z]_*.csv"],
+                        outputs=["AA - *.csv"])
+                tasks.append(Task("process AD-2", func, ["AD-2"], ["AD-2 processed"]))
+
+        return Pipeline(tasks)
 
     @staticmethod
     def clean_start():
@@ -118,7 +344,23 @@ class Webscrape:
             return str(f"{self.country}-{section}-{self.language}.html")
         raise ValueError(f"{section} is in an unexpected format!")
 
-    def get_table(self, section:str, match:str=".+") -> Optional[list]:
+    @staticmethod
+    def fetch(address:str) -> str:
+        """Downloads the given address and returns the page content"""
+
+        with cassette.host_limit(address):
+            response = cassette.request("GET", address, timeout=30)
+        metrics.collector.count("http_requests")
+        metrics.collector.count("bytes_downloaded", len(response.content))
+        response.raise_for_status()
+        return response.content.decode("utf-8")
+
+    def get_table(
+            self,
+            section:str,
+            match:str=".+",
+            locate:Optional[list]=None,
+            ) -> Optional[list]:
         """Gets a table from the given url as a list of dataframes"""
 
         # Combine the airac cycle url with the page being scraped
@@ -127,7 +369,8 @@ class Webscrape:
 
         try:
             # Read the full address into a list of dataframes
-            tables = pd.read_html(address, flavor="bs4", match=match)
+            page = self.fetch(address)
+            tables = self.read_tables(section, page, match, locate)
 
             # If there is a least one table
             if len(tables) > 0:
@@ -135,10 +378,36 @@ class Webscrape:
             raise functions.NoUrlDataFoundError(address)
         except ValueError as error:
             logger.warning(f"{error} for {address}")
-        except urllib.error.HTTPError as error:
+        except (urllib.error.HTTPError, requests.exceptions.HTTPError) as error:
             logger.warning(f"{error} for {address}")
         return None
 
+    def read_tables(
+            self,
+            section:str,
+            page:str,
+            match:str=".+",
+            locate:Optional[list]=None,
+            ) -> list:
+        """
+        Reads the tables from a page using the selected html backend. Located tables are picked
+        out while the page is read so none of the others are converted.
+        """
+
+        backend = self.html_backend
+        if backend == "auto":
+            lxml_installed = importlib.util.find_spec("lxml") is not None
+            backend = ("lxml" if (section in self.lxml_sections or locate) and lxml_installed
+                       else "bs4")
+        if backend == "lxml":
+            if locate:
+                return lxml_tables.locate_tables(page, locate)
+            return lxml_tables.read_tables(page, match)
+        tables = pd.read_html(io.StringIO(page), flavor="bs4", match=match)
+        if locate:
+            return lxml_tables.locate_frames(tables, locate)
+        return tables
+
     @parse_table("AD-1.3")
     def parse_ad_1_3(self, **kwargs) -> pd.DataFrame:
         """Process data from AD 1.3 - INDEX TO AERODROMES AND HELIPORTS"""
@@ -169,32 +438,35 @@ class Webscrape:
 
         return tdf
 
-    @parse_table("ENR-2.1")
+    @parse_table("ENR-2.1", locate=[
+        # FIR, UIR, TMA and CTA
+        lxml_tables.TableLocator("Unit providing service"),
+        # CTR
+        lxml_tables.TableLocator("Unit providing service", occurrence=1),
+        ])
     def parse_enr_2_1(self, **kwargs) -> list:
         """Pull data from ENR 2.1 - AIR TRAFFIC SERVICES AIRSPACE"""
 
         logger.debug(f"{self.date_in} - ENR2.1")
-        # The data object table[0] is for FIR, UIR, TMA and CTA
-        fir_uir_tma_cta = kwargs["tables"][0]
-        # The data object table[1] is for CTR
-        ctr = kwargs["tables"][1]
+        fir_uir_tma_cta, ctr = kwargs["tables"]
         # Modify header row
         fir_uir_tma_cta.columns = lists.column_headers_airspace
         ctr.columns = lists.column_headers_airspace
 
         return [fir_uir_tma_cta, ctr]
 
-    @parse_table("ENR-2.2")
+    @parse_table("ENR-2.2", locate=[
+        # ATZ
+        lxml_tables.TableLocator("Unit providing service"),
+        # FRA, followed by the Channel Islands Airspace which has the same header
+        lxml_tables.TableLocator("^Lateral limits"),
+        lxml_tables.TableLocator("^Lateral limits", occurrence=1),
+        ])
     def parse_enr_2_2(self, **kwargs) -> list:
         """Pull data from ENR 2.2 - OTHER REGULATED AIRSPACE"""
 
         logger.debug(f"{self.date_in} - ENR2.2")
-        # The data object table[0] is for ATZ
-        atz = kwargs["tables"][0]
-        # The data object table[27] is for FRA
-        fra = kwargs["tables"][26]
-        # The data object table[28] is for Channel Islands Airspace
-        cia = kwargs["tables"][27]
+        atz, fra, cia = kwargs["tables"]
 
         # Modify header rows
         column_headers = [
@@ -324,14 +596,13 @@ class Webscrape:
 
         return nwt
 
-    @parse_table("ENR-5.3")
+    # The first table relates exclusively to small arms ranges with an upper limit of 500ft
+    @parse_table("ENR-5.3", locate=[lxml_tables.TableLocator("Advisory measures", occurrence=1)])
     def parse_enr_5_3(self, **kwargs) -> pd.DataFrame:
         """Pull data from ENR 5.1 - PROHIBITED, RESTRICTED AND DANGER AREAS"""
 
         logger.debug(f"{self.date_in} - ENR5.3")
-        # The data object is table[1] - table[0] relates exclusively to small arms ranges with an
-        # upper limit of 500ft
-        nwt = kwargs["tables"][1]
+        nwt = kwargs["tables"][0]
 
         # Modify header row
         nwt.columns = [
@@ -347,28 +618,41 @@ class Webscrape:
 
         return nwt
 
-    def parse_ad_2(self) -> None:
-        """Pull data from AD 2 - AERODROMES"""
+    def parse_ad_2(self, icao_filter:Optional[list]=None) -> None:
+        """Pull data from AD 2 - AERODROMES, optionally only for the given aerodromes"""
 
         # Get a list of aerodromes which exist in the AIP
         self.parse_ad_1_3()
         # Load the list of aerodromes
         df_to_load = os.path.join(functions.work_dir, "DataFrames", "AD-1.3.csv")
         df_ad_1_3 = pd.read_csv(df_to_load)
+        if icao_filter:
+            df_ad_1_3 = df_ad_1_3[df_ad_1_3["icao_designator"].isin(icao_filter)]
 
         for index, row in df_ad_1_3.iterrows():
             logger.trace(index)
+            if self.checkpoint and self.checkpoint.done("scrape AD-2", row["icao_designator"]):
+                logger.info(f"Skipping AD-2.{row['icao_designator']} as it's already scraped")
+                continue
             logger.info(f"Parsing AD-2.{row['icao_designator']} ({row['location']})")
-            df_list = self.get_table(f"AD-2.{row['icao_designator']}")
+            with metrics.collector.stage("scrape", f"AD-2.{row['icao_designator']}"):
+                df_list = self.get_table(f"AD-2.{row['icao_designator']}")
 
-            if df_list is not None:
-                for idx, dfl in enumerate(df_list):
-                    dfl_path = os.path.join(
-                        functions.work_dir,
-                        "DataFrames",
-                        f"{row['icao_designator']}_{idx}.csv"
-                        )
-                    dfl.to_csv(dfl_path)
+                if df_list is not None:
+                    functions.remove_files(f"{row['icao_designator']}_*.csv")
+                    for idx, dfl in enumerate(df_list):
+                        metrics.collector.count("rows", len(dfl))
+                        dfl_path = os.path.join(
+                            functions.work_dir,
+                            "DataFrames",
+                            f"{row['icao_designator']}_{idx}.csv"
+                            )
+                        functions.unshare(dfl_path)
+                        dfl.to_csv(dfl_path)
+                    if self.stream:
+                        self.stream.put("AD-2", row["icao_designator"])
+                    if self.checkpoint:
+                        self.checkpoint.complete("scrape AD-2", row["icao_designator"])
 
 
 class ProcessData:
@@ -381,6 +665,12 @@ class ProcessData:
         self.build.settings()
         # Define at which FL an airway should be marked as 'upper'
         self.airway_split = 245
+        # The DataFrames directory from the previous cycle, if there is one
+        self.previous_dir:Optional[str] = None
+        # The number of coordinate conversions to run at once
+        self.workers = 4
+        # Write each ENR 5 section to a single indexed file rather than one file per area
+        self.consolidate_enr_5 = False
 
     def search_enr_2_x(self, df_enr_2:pd.DataFrame, file_name:str, no_build:bool=False):
         """Generic ENR 2 search actions"""
@@ -402,7 +692,7 @@ class ProcessData:
                     logger.debug(limits_class[lat_lim[1]])
             elif file_name == "ENR-2.2_2":
                 # Special case for Channel Islands Airspace
-                if re.search(r"\d{6}(\.\d{2})?[NS]{1}", row["lateral_limits"]):
+                if lists.patterns["enr_2_latitude"].search(row["lateral_limits"]):
                     title = f"CHANNEL ISLANDS {index}"
                     areas[title] = row["lateral_limits"]
                     limits_class[title] = row["vertical_limits"]
@@ -410,30 +700,19 @@ class ProcessData:
                     logger.debug(row["vertical_limits"])
             else:
                 # Check to see if this row contains an area name
-                title_b = re.match(
-                    r"^([A-Z\s\-]+(\bFIR\b|\bUIR\b|\bTMA\b|\bCTA\b|\bCTR\b|\bATZ\b|\bFRA\b\s"
-                    r"\([A-Z\s]+\))(\s\d{1,2})?)(?:\s\s)",
-                    str(row["data"])
-                    )
+                title_b = lists.patterns["enr_2_title"].match(str(row["data"]))
                 if title_b:
                     logger.debug(title_b[1])
                     # Find the boundary of the area
-                    coords = re.search(
-                        r"(?<=\s\s)((\d{6}[NS]{1}\s\d{7}[EW]{1}.*)|(\bA\scircle\b.*))"
-                        r"(?=\s+\bUpper\b)", row["data"]
-                        )
+                    coords = lists.patterns["enr_2_boundary"].search(row["data"])
                     if coords:
                         areas[title_b[1]] = coords[1]
                         logger.debug(areas[title_b[1]])
 
                     # Find the lateral limits
-                    limits = re.search(
-                        r"(?:\s+\bUpper\slimit\:\s\b)(\S+(\s\bFT\b\s\b(ALT|AGL)\b)?)"
-                        r"(?:\s+\bLower\slimit\:\s\b)(\S+(\s\bFT\b\s\b(ALT|AGL)\b)?)"
-                        r"(?:\s+\bClass\b\:\s)([A-G]{1})", str(row["data"])
-                    )
+                    limits = lists.patterns["enr_2_limits"].search(str(row["data"]))
                     # Cleanup the callsign
-                    callsign = re.match(r"^([A-Z\s]+)(?:\s+[A-Z]{1}[a-z]+)", str(row['callsign']))
+                    callsign = lists.patterns["enr_2_callsign"].match(str(row['callsign']))
                     # Cleanup the frequency
                     frequency = lists.Regex.frequency(row["frequency"])
 
@@ -463,7 +742,7 @@ class ProcessData:
             # Only look at rows which have something in the 3rd column
             # This will filter out all the short rows which are of little value
             if pd.notna(row["coordinates_bearing"]):
-                if row["route"] == row["name"] and re.match(r"^[A-Z]{1,2}\d{1,3}$", row["name"]):
+                if row["route"] == row["name"] and lists.patterns["enr_3_route"].match(row["name"]):
                     # Check to see if this is a route name
                     route_name = row["name"]
                     scraped_data["upper"] = route_name
@@ -480,10 +759,11 @@ class ProcessData:
                     logger.debug(f"{route_name} - {row['name']} - {scraped_data['coord_grp']}")
                     scraped_data["p_count"] += 1
                     scraped_data["last_point"] = scraped_data["point"]
-                elif row["route"] == row["name"] and re.match(r"^\(.*\)$", row["name"]):
+                elif (row["route"] == row["name"] and
+                      lists.patterns["enr_3_limits"].match(row["name"])):
                     # Check vertical limts
                     scraped_data.update(self.vertical_limits_enr_3(scraped_data, row))
-            elif re.match(r"^\(RNAV\)", row["route"]):
+            elif lists.patterns["enr_3_rnav"].match(row["route"]):
                 if scraped_data["uplo"] == 0:
                     scraped_data["upper"] = f"{scraped_data['upper']} NCS!"
                 elif scraped_data["uplo"] == 1:
@@ -499,95 +779,108 @@ class ProcessData:
 
         return [vor_dme, nav_point]
 
-    def search_enr_4_1(self, df_enr_4:pd.DataFrame, no_build:bool=False) -> list:
-        """ENR 4.1 search actions"""
+    @staticmethod
+    def match_enr_4_1(df_enr_4:pd.DataFrame) -> pd.DataFrame:
+        """
+        Matches the name, id, frequency, TACAN channel and coordinates of every ENR 4.1 navaid
+        at once, returning those with a match for everything
+        """
+
+        names = lists.Regex.extract_vor_dme_ndb(df_enr_4["name"])
+        navaids = pd.DataFrame({
+            "name": names[0],
+            "type": names[1],
+            "id": lists.Regex.extract(df_enr_4["id"], "navaid_id")[0],
+            "frequency": lists.Regex.extract_frequency(df_enr_4["frequency"])[0],
+            "tacan": lists.Regex.extract_tacan_channel(df_enr_4["frequency"])[0],
+            "coordinates": df_enr_4["coordinates"],
+            })
+        matched = (navaids["name"].notna() & navaids["id"].notna() &
+                   (navaids["frequency"].notna() | navaids["tacan"].notna()) &
+                   lists.Regex.extract_coordinates(df_enr_4["coordinates"])[0].notna())
+        return navaids[matched]
 
-        # Start the iterator
-        tacan_vor = functions.TacanVor()
-        output = []
-        scraped_data = {}
-        for index, row in df_enr_4.iterrows():
-            logger.trace(index)
-            scraped_data["name"] = lists.Regex.vor_dme_ndb(row["name"])
-            scraped_data["rid"] = re.match(r"^([A-Z]{3})$", row["id"])
-            scraped_data["freq"] = lists.Regex.frequency(row["frequency"])
-            scraped_data["tacan"] = lists.Regex.tacan_channel(row["frequency"])
-            scraped_data["coords"] = lists.Regex.coordinates(row["coordinates"])
-
-            # If there is match for everything on this record
-            if (scraped_data["name"] and
-                scraped_data["rid"] and
-                (scraped_data["freq"] or scraped_data["tacan"])
-                and scraped_data["coords"]):
-                if no_build:
-                    coord_out = row["coordinates"]
-                else:
-                    # Needs to be sent as double coords due to 3rd party limitations
-                    coord_xform = self.build.request_output(
-                        f'{row["coordinates"]} {row["coordinates"]}')
-                    xform_split = coord_xform.split(" ")
-                    coord_out = f"{xform_split[0]} {xform_split[1]}"
+    @staticmethod
+    def match_enr_4_4(df_enr_4:pd.DataFrame) -> pd.DataFrame:
+        """Matches the name and coordinates of every ENR 4.4 fix at once"""
 
-                if scraped_data["name"][2] == "DME":
-                    dme = "(DME)"
-                else:
-                    dme = ""
-
-                if scraped_data["freq"] and scraped_data["tacan"]:
-                    freq_out = scraped_data["freq"][1]
-                    # Quick sanity check that the given TACAN ch == the given frequency
-                    if freq_out != tacan_vor.tacan_to_vor_ils(scraped_data["tacan"][1]):
-                        raise ValueError(
-                            f"The given TACAN channel {scraped_data['tacan'][1]} doesn't match"
-                            f"the given frequency {freq_out}")
-                elif scraped_data["tacan"]:
-                    freq_out = tacan_vor.tacan_to_vor_ils(scraped_data["tacan"][1])
-                elif scraped_data["freq"]:
-                    freq_out = scraped_data["freq"][1]
-
-                # Applying formatting to the returned frequency
-                freq_format = format(float(freq_out), '.3f')
-
-                # Output format is ID FREQ LAT LON ; Name
-                # Ignore any NDB fixes for now
-                if scraped_data["name"][2] != "NDB":
-                    line = (f"{scraped_data['rid'][1]} {freq_format} {coord_out} ; "
-                            f"{str(scraped_data['name'][1]).title()} {dme}")
-                    output.append(line)
-                    logger.debug(line.rstrip())
+        fixes = pd.DataFrame({
+            "name": lists.Regex.extract(df_enr_4["name"], "waypoint")[0],
+            "coordinates": df_enr_4["coordinates"],
+            })
+        return fixes[fixes["name"].notna() &
+                     lists.Regex.extract_coordinates(df_enr_4["coordinates"])[0].notna()]
+
+    def convert_point(self, coord:str) -> str:
+        """Converts a single coordinate, which is sent as a pair due to 3rd party limitations"""
+        return self.build.request_output(f"{coord} {coord}")
+
+    def search_enr_4_1(self, df_enr_4:pd.DataFrame, no_build:bool=False) -> list:
+        """ENR 4.1 search actions"""
 
+        navaids = self.match_enr_4_1(df_enr_4)
+        # Validates every TACAN channel
+        tacan_freq = functions.TacanVor().channels_to_vor_ils(navaids["tacan"])
+        # Quick sanity check that any given TACAN ch == the given frequency
+        mismatched = (navaids["frequency"].notna() & navaids["tacan"].notna() &
+                      (navaids["frequency"] != tacan_freq))
+        if mismatched.any():
+            first = navaids[mismatched].iloc[0]
+            raise ValueError(
+                f"The given TACAN channel {first['tacan']} doesn't match"
+                f"the given frequency {first['frequency']}")
+        # Applying formatting to the returned frequency
+        freq_format = navaids["frequency"].fillna(tacan_freq).astype(float).map("{:.3f}".format)
+
+        # Ignore any NDB fixes for now
+        vor_dme = navaids["type"] != "NDB"
+        navaids = navaids[vor_dme]
+        if navaids.empty:
+            return []
+        if no_build:
+            coord_out = navaids["coordinates"]
+        else:
+            coord_out = pd.Series(
+                [" ".join(self.convert_point(coord).split(" ")[:2])
+                 for coord in navaids["coordinates"]],
+                index=navaids.index, dtype=object)
+        dme = (navaids["type"] == "DME").map({True: "(DME)", False: ""})
+
+        # Output format is ID FREQ LAT LON ; Name
+        output = (navaids["id"] + " " + freq_format[vor_dme] + " " + coord_out + " ; " +
+                  navaids["name"].str.title() + " " + dme).tolist()
+        logger.debug(f"Found {len(output)} VOR/DME navaids")
         return output
 
     def search_enr_4_4(self, df_enr_4:pd.DataFrame, no_build:bool=False) -> list:
         """ENR 4.4 search actions"""
 
-        # Start the iterator
-        output = []
-        for index, row in df_enr_4.iterrows():
-            logger.trace(index)
-            name = re.match(r"^([A-Z]{5})$", row["name"])
-            coords = lists.Regex.coordinates(row["coordinates"])
-
-            # If there is match for everything on this record
-            if name and coords:
-                if no_build:
-                    coord_out = row["coordinates"]
-                else:
-                    # Needs to be sent as double coords due to 3rd party limitations
-                    coord_xform = self.build.request_output(
-                        f'{row["coordinates"]} {row["coordinates"]}')
-                    if coord_xform != "NUK":
-                        xform_split = coord_xform.split(" ")
-                        coord_out = f"{xform_split[0]} {xform_split[1]}"
-
-                # Output format is ID FREQ LAT LON ; Name
-                line = f"{name[1]} {coord_out}"
-                output.append(line)
-                logger.debug(line.rstrip())
+        fixes = self.match_enr_4_4(df_enr_4)
+        if no_build:
+            coord_out = list(fixes["coordinates"])
+        else:
+            coord_out = []
+            last_coord = None
+            for coord in fixes["coordinates"]:
+                coord_xform = self.convert_point(coord)
+                # A fix outside the UK is given the coordinates of the one before it
+                if coord_xform != "NUK":
+                    xform_split = coord_xform.split(" ")
+                    last_coord = f"{xform_split[0]} {xform_split[1]}"
+                coord_out.append(last_coord)
 
+        # Output format is ID FREQ LAT LON ; Name
+        output = [f"{name} {coord}" for name, coord in zip(fixes["name"], coord_out)]
+        logger.debug(f"Found {len(output)} fixes")
         return output
 
-    def search_enr_5_x(self, df_enr_5:pd.DataFrame, file_name:str, no_build:bool=False) -> None:
+    def search_enr_5_x(
+            self,
+            df_enr_5:pd.DataFrame,
+            file_name:str,
+            no_build:bool=False,
+            area_file:Optional[AreaFile]=None,
+            ) -> None:
         """ENR 5.1 search actions"""
 
         # Start the iterator
@@ -598,23 +891,19 @@ class ProcessData:
             logger.trace(index)
             # Search for relevant data
             if file_name == "ENR-5.1":
-                data_store["data"] = re.match(
-                    r"(EG\s[DPR]{1}\d{1,4}([A-Z]{1})?)(.*)(?<=\s\s)"
-                    r"((\d{6}[NS]{1}\s\d{7}[EW]{1}.*)|(\bA\scircle\b.*))", row["area"])
+                data_store["data"] = lists.patterns["enr_5_1_area"].match(row["area"])
                 if data_store["data"]:
                     data_store["eid"] = data_store["data"][1]
                     data_store["name"] = str(data_store["eid"][3]).strip()
                     data_store["coords"] = data_store["data"][4]
             elif file_name == "ENR-5.2":
-                data_store["data"] = re.match(
-                    r"(.*)(?<=\s\s)((\d{6}[NS]{1}\s\d{7}[EW]{1}.*)|(\bA\scircle\b.*))", row["area"])
+                data_store["data"] = lists.patterns["enr_5_area"].match(row["area"])
                 if data_store["data"]:
                     data_store["eid"] = f"META {str(index).zfill(3)}"
                     data_store["name"] = str(data_store["data"][1]).strip()
                     data_store["coords"] = data_store["data"][2]
             elif file_name == "ENR-5.3":
-                data_store["data"] = re.match(
-                    r"(.*)(?<=\s\s)((\d{6}[NS]{1}\s\d{7}[EW]{1}.*)|(\bA\scircle\b.*))", row["area"])
+                data_store["data"] = lists.patterns["enr_5_area"].match(row["area"])
                 if data_store["data"]:
                     data_store["eid"] = f"OADN {str(index).zfill(3)}"
                     data_store["name"] = str(data_store["data"][1]).strip()
@@ -626,139 +915,201 @@ class ProcessData:
                         continue
                     # If a radius less than or equal to 1NM is returned then this can also be
                     # filtered for the same reason.
-                    radius_check = re.match(
-                        r"(\d{1,2}(\.\d{1,3})?)(?=\sNM\sradius)", data_store["coords"])
+                    radius_check = lists.patterns["enr_5_radius"].match(data_store["coords"])
                     if radius_check:
                         if float(radius_check[1]) <= 1:
                             continue
-            self.write_enr_5(data_store)
+            self.write_enr_5(data_store, area_file)
 
+    def process(self, no_build:bool=False, only:Optional[list]=None) -> None:
+        """Process every ENR section, or only the given sections"""
+
+        processors = [
+            ("ENR-2", self.process_enr_2),
+            ("ENR-3", self.process_enr_3),
+            ("ENR-4", self.process_enr_4),
+            ("ENR-5", self.process_enr_5),
+        ]
+        for section, processor in processors:
+            if functions.section_selected(section, only):
+                processor(no_build=no_build)
+
+    # The ENR 2 tables which are processed
+    enr_2_tables = ["ENR-2.1_0", "ENR-2.1_1", "ENR-2.2_0", "ENR-2.2_1", "ENR-2.2_2"]
+
+    @staticmethod
+    def load_table(file_name:str) -> pd.DataFrame:
+        """Load a scraped table from DataFrames"""
+        df_out_path = os.path.join(functions.work_dir, "DataFrames", f"{file_name}.csv")
+        df_out = pd.read_csv(df_out_path)
+        metrics.collector.count("rows", len(df_out))
+        return df_out
+
+    @metrics.timed("process", "ENR-2")
     def process_enr_2(self, no_build:bool=False) -> None:
         """Process ENR 2 data"""
 
         logger.info("Processing ENR 2 data...")
+        for proc in self.enr_2_tables:
+            self.process_enr_2_table(proc, no_build=no_build)
 
-        def run_process(file_name:str) -> None:
-            df_out_path = os.path.join(functions.work_dir, "DataFrames", f"{file_name}.csv")
-            df_out = pd.read_csv(df_out_path)
-            self.search_enr_2_x(df_out, file_name, no_build=no_build)
-
-        file_names = ["ENR-2.1_0","ENR-2.1_1","ENR-2.2_0","ENR-2.2_1","ENR-2.2_2"]
-        for proc in file_names:
-            run_process(proc)
+    def process_enr_2_table(self, file_name:str, no_build:bool=False) -> None:
+        """Process a single ENR 2 table"""
+        self.search_enr_2_x(self.load_table(file_name), file_name, no_build=no_build)
 
+    @metrics.timed("process", "ENR-3")
     def process_enr_3(self, no_build:bool=False) -> None:
         """Process ENR 3 data"""
 
         logger.info("Processing ENR 3 data...")
 
-        def run_process(file_name:str) -> list:
-            df_out_path = os.path.join(functions.work_dir, "DataFrames", f"{file_name}")
-            df_out = pd.read_csv(df_out_path)
-            search_results = self.search_enr_3_x(df_out)
-            return search_results
-
-        def convert_coords_dump_df(coord_in:dict, name:str) -> None:
-            for coord in coord_in.items():
-                # The coordinates need passing twice to work with the builder
-                # This is a 3rd party api limitation
-                xform = self.build.request_output(f"{coord[1]} {coord[1]}")
-                if xform != "NUK":
-                    split_xform = xform.split(" ")
-                    # Then we only need to return the first 2/4 results as they're duplicated
-                    # This is an artifact from the api limitation already mentioned
-                    coord_in[coord[0]] = f"{split_xform[0]} {split_xform[1]}"
-                    logger.debug(f"{coord[0]} - {coord[1]} to {split_xform[0]} {split_xform[1]}")
-            # Save as a csv df
-            df_cc = pd.DataFrame.from_dict(coord_in, orient="index", columns=["lat/lon"])
-            df_cc = df_cc.reset_index()
-            df_out_path = os.path.join(functions.work_dir, "DataFrames", f"{name}.csv")
-            df_cc.to_csv(df_out_path)
-
-        vor_dme = {}
-        nav_aid = {}
+        vor_dme:dict = {}
+        nav_aid:dict = {}
         file_names = functions.generate_file_names("ENR-3")
         for proc in file_names:
-            rpp = run_process(proc)
+            rpp = self.process_enr_3_table(proc[:-4])
             vor_dme.update(rpp[0])
             nav_aid.update(rpp[1])
+        self.convert_enr_3(vor_dme, nav_aid, no_build=no_build)
+
+    def process_enr_3_table(self, file_name:str) -> list:
+        """Process a single ENR 3 table, returning the navaids and points it uses"""
+        return self.search_enr_3_x(self.load_table(file_name))
+
+    def convert_enr_3(self, vor_dme:dict, nav_aid:dict, no_build:bool=False) -> None:
+        """Convert the coordinates of the navaids and points used by ENR 3 routes"""
 
         if no_build:
             logger.warning("The 'no build' option has been set!")
             print(vor_dme)
             print(nav_aid)
         else:
-            convert_coords_dump_df(vor_dme, "VOR_DME")
-            convert_coords_dump_df(nav_aid, "NAV_AID")
-
+            self.convert_coords_dump_df(vor_dme, "VOR_DME")
+            self.convert_coords_dump_df(nav_aid, "NAV_AID")
+
+    def convert_coords_dump_df(self, coord_in:dict, name:str) -> None:
+        """Convert a dictionary of coordinates and save them as a csv"""
+
+        # Points which haven't changed since the previous cycle don't need converting again
+        previous = delta.previous_conversions(self.previous_dir, name)
+        source = dict(coord_in)
+        coordinates.prefetch(self.build, [coordinates.point_request(coord[1])
+                                          for coord in source.items() if coord not in previous],
+                             workers=self.workers)
+        for coord in source.items():
+            if coord in previous:
+                coord_in[coord[0]] = previous[coord]
+                metrics.collector.count("cache_hits")
+                continue
+            # The coordinates need passing twice to work with the builder
+            # This is a 3rd party api limitation
+            xform = self.build.request_output(f"{coord[1]} {coord[1]}")
+            if xform != "NUK":
+                split_xform = xform.split(" ")
+                # Then we only need to return the first 2/4 results as they're duplicated
+                # This is an artifact from the api limitation already mentioned
+                coord_in[coord[0]] = f"{split_xform[0]} {split_xform[1]}"
+                logger.debug(f"{coord[0]} - {coord[1]} to {split_xform[0]} {split_xform[1]}")
+        # Save as a csv df, keeping the unconverted coordinates for the next cycle
+        df_cc = pd.DataFrame.from_dict(coord_in, orient="index", columns=["lat/lon"])
+        df_cc["source"] = pd.Series(source)
+        df_cc = df_cc.reset_index()
+        df_out_path = os.path.join(functions.work_dir, "DataFrames", f"{name}.csv")
+        functions.unshare(df_out_path)
+        df_cc.to_csv(df_out_path)
+
+    @metrics.timed("process", "ENR-4")
     def process_enr_4(self, no_build:bool=False) -> None:
         """Process ENR 4 data"""
 
         logger.info("Processing ENR 4 data...")
+        for file_name in ["ENR-4.1", "ENR-4.4"]:
+            self.process_enr_4_table(file_name, no_build=no_build)
+
+    def process_enr_4_table(self, file_name:str, no_build:bool=False) -> None:
+        """Process a single ENR 4 table"""
+
+        df_out = self.load_table(file_name)
+        if not no_build:
+            coordinates.prefetch(self.build, self.enr_4_points(df_out, file_name),
+                                 workers=self.workers)
+        if file_name == "ENR-4.1":
+            file_out = "VOR_UK.txt"
+            output = self.search_enr_4_1(df_out, no_build=no_build)
+        elif file_name == "ENR-4.4":
+            file_out = "FIXES_UK.txt"
+            output = self.search_enr_4_4(df_out, no_build=no_build)
+        else:
+            raise ValueError(f"{file_name} is not an ENR 4 table which can be processed")
 
-        file_names = [
-            ("ENR-4.1.csv", "VOR_UK.txt", "1"),
-            ("ENR-4.4.csv", "FIXES_UK.txt", "4"),
-        ]
-        for file_in, file_out, sub_section in file_names:
-            df_out_path = os.path.join(functions.work_dir, "DataFrames", f"{file_in}")
-            df_out = pd.read_csv(df_out_path)
-            if sub_section == "1":
-                output = self.search_enr_4_1(df_out, no_build=no_build)
-            elif sub_section == "4":
-                output = self.search_enr_4_4(df_out, no_build=no_build)
-
-            file_path = os.path.join(functions.work_dir, "DataFrames", file_out)
-            logger.debug(file_path)
-            with open(file_path, "w", encoding="utf-8") as file:
-                for line in output:
-                    file.write(f"{str(line).rstrip()}\n")
+        file_path = os.path.join(functions.work_dir, "DataFrames", file_out)
+        logger.debug(file_path)
+        functions.unshare(file_path)
+        with open(file_path, "w", encoding="utf-8") as file:
+            file.write("".join(f"{str(line).rstrip()}\n" for line in output))
+
+    @staticmethod
+    def enr_4_points(df_enr_4:pd.DataFrame, file_name:str) -> list:
+        """Gathers the coordinate requests which an ENR 4 table will need converting"""
 
+        if file_name == "ENR-4.1":
+            names = lists.Regex.extract_vor_dme_ndb(df_enr_4["name"])
+            # NDBs aren't output so don't need converting
+            wanted = names[0].notna() & (names[1] != "NDB")
+        else:
+            wanted = lists.Regex.extract(df_enr_4["name"], "waypoint")[0].notna()
+        wanted &= lists.Regex.extract_coordinates(df_enr_4["coordinates"])[0].notna()
+        return [coordinates.point_request(coord) for coord in df_enr_4["coordinates"][wanted]]
+
+    @metrics.timed("process", "ENR-5")
     def process_enr_5(self, no_build:bool=False) -> None:
         """Process ENR 5 data"""
 
         logger.info("Processing ENR 5 data...")
+        for proc in ["ENR-5.1", "ENR-5.2", "ENR-5.3"]:
+            self.process_enr_5_table(proc, no_build=no_build)
 
-        def run_process(file_name:str) -> None:
-            df_out_path = os.path.join(functions.work_dir, "DataFrames", f"{file_name}.csv")
-            df_out = pd.read_csv(df_out_path)
-            self.search_enr_5_x(df_out, file_name, no_build=no_build)
-
-        file_names = ["ENR-5.1", "ENR-5.2", "ENR-5.3"]
-        for proc in file_names:
-            run_process(proc)
+    def process_enr_5_table(self, file_name:str, no_build:bool=False) -> None:
+        """Process a single ENR 5 table"""
+        area_file = AreaFile(file_name) if self.consolidate_enr_5 else None
+        with area_file or contextlib.nullcontext():
+            self.search_enr_5_x(
+                self.load_table(file_name), file_name, no_build=no_build, area_file=area_file)
 
     def write_enr_2(self, areas:dict, file_name:str, no_build:bool, limits_class:dict) -> None:
-        """Write ENR 2 files"""
+        """
+        Write ENR 2 files. Every conversion is submitted up front and each area is written as
+        soon as its own conversion is back.
+        """
+
+        # Group the areas under their titles, in the order each title is first seen
+        titles:dict = {}
+        for idx, loc in areas.items():
+            this_title = lists.patterns["enr_2_area_title"].match(str(idx))
+            if this_title:
+                titles.setdefault(this_title[1], []).append((idx, loc))
+        locations = [loc for group in titles.values() for _, loc in group]
+
+        # Request data
+        if no_build:
+            sct_data = iter(f"The 'no build' option has been selected...\n{loc}"
+                            for loc in locations)
+        else:
+            sct_data = coordinates.convert_in_order(self.build, locations, workers=self.workers)
 
-        output = ""
-        last_title = None
         file_path = os.path.join(functions.work_dir, "DataFrames", f"{file_name}_AIRSPACE.sct")
-        with open(file_path, "w", encoding="utf-8") as file:
-            for idx, loc in areas.items():
-                # Request data
-                if no_build:
-                    sct_data = f"The 'no build' option has been selected...\n{loc}"
-                else:
-                    sct_data = self.build.request_output(loc)
-
+        functions.unshare(file_path)
+        with open(file_path, "w", encoding="utf-8", buffering=functions.WRITE_BUFFER) as file:
+            for title, group in titles.items():
                 # Add comments into the sct output
-                this_title = re.match(r"^([A-Z\s\/]+)", str(idx))
-                if this_title:
-                    if this_title[1] != last_title:
-                        file.write(output)
-                        output = ""
-                        output = f"{output}\n; {this_title[1]}"
-
+                file.write(f"\n; {title}")
+                for (idx, _), data in zip(group, sct_data):
                     try:
                         lco = limits_class[idx]
                     except KeyError as error:
                         logger.warning(f"Unable to locate limits and class for {error}")
                         lco = "WARNING! Unable to locate limits and class"
-
-                    output = f"{output}\n; {idx} - {lco}\n{sct_data}\n"
-                    last_title = this_title[1]
-            file.write(output)
+                    file.write(f"\n; {idx} - {lco}\n{data}\n")
 
     @staticmethod
     def write_enr_3(route:str, is_upper:bool) -> None:
@@ -781,6 +1132,7 @@ class ProcessData:
             f"ENR-3.2-{uorl}-{split_route[0]}.txt"
             )
         line_one_passed = False
+        functions.unshare(file_path)
         with open(file_path, "w", encoding="utf-8") as file:
             for idx in range(start, route_len-1, 1):
                 if (idx + 1) < route_len:
@@ -808,32 +1160,35 @@ class ProcessData:
                             file.write(f"{line_to_write}\n")
                 line_one_passed = True
 
-    def write_enr_5(self, data_store:dict):
-        """Write ENR 5 files"""
+    def write_enr_5(self, data_store:dict, area_file:Optional[AreaFile]=None) -> None:
+        """Write ENR 5 files, or add the area to a consolidated file if one is given"""
 
         if data_store["data"]:
+            # Request data
+            if data_store["no_build"]:
+                sct_data = ("The 'no build' option has been selected...\n"
+                            f"{data_store['coords']}")
+            else:
+                sct_data = self.build.request_output(data_store["coords"])
+
+            id_split = str(data_store["eid"]).split(" ", maxsplit=2)
+            # Add comments into the sct output
+            output = [f";{id_split[0]}{id_split[1]} - {data_store['name']}"]
+            # Add the returned coords
+            for crd in sct_data.split("\n"):
+                output.append(f"{id_split[0]}{id_split[1]}\t{crd}")
+
+            if area_file:
+                area_file.add(str(data_store["eid"]), "\n".join(output))
+                return
             file_path = os.path.join(
                 functions.work_dir,
                 "DataFrames",
                 f"{data_store['file_name']}-{data_store['eid']}.txt"
                 )
+            functions.unshare(file_path)
             with open(file_path, "w", encoding="utf-8") as file:
-                # Request data
-                if data_store["no_build"]:
-                    sct_data = ("The 'no build' option has been selected...\n"
-                                f"{data_store['coords']}")
-                else:
-                    sct_data = self.build.request_output(data_store["coords"])
-
-                id_split = str(data_store["eid"]).split(" ", maxsplit=2)
-                # Add comments into the sct output
-                output = f";{id_split[0]}{id_split[1]} - {data_store['name']}"
-                file.write(output)
-                # Add the returned coords
-                coords_split = sct_data.split("\n")
-                for crd in coords_split:
-                    output = f"\n{id_split[0]}{id_split[1]}\t{crd}"
-                    file.write(output)
+                file.write("\n".join(output))
 
     def route_check_enr_3(self, row:dict, scraped_data:dict, vor_dme:dict, nav_point:dict) -> dict:
         """Check to see if this is a significant point"""
@@ -844,11 +1199,7 @@ class ProcessData:
         else:
             raise ValueError(f"No coordinates match for {row['coordinates_bearing']}")
 
-        scraped_data["vordmendb"] = re.match(
-            r"^([A-Z\s]+)\s\s([VORDMENB]{3}(\/[VORDMENB]{3})?)"
-            r"\s+\(\s+([A-Z]{3})\s+\)$",
-            row["name"]
-            )
+        scraped_data["vordmendb"] = lists.patterns["enr_3_navaid"].match(row["name"])
         if scraped_data["vordmendb"]:
             # Check to see if this is a VOR/DME/NDB point
             vor_dme[scraped_data["vordmendb"][4]] = scraped_data["coord_grp"]
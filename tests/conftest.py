@@ -0,0 +1,20 @@
+"""
+eAIP Parser
+Chris Parkinson (@chssn)
+"""
+
+#!/usr/bin/env python3.9
+
+# Third Party Libraries
+import pytest
+
+# Local Libraries
+from eaip_parser import functions
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """Point the working directory somewhere temporary"""
+    monkeypatch.setattr(functions, "work_dir", str(tmp_path))
+    path = tmp_path / "DataFrames"
+    path.mkdir()
+    return path
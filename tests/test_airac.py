@@ -65,6 +65,14 @@ def test_cycle_known_date_next_cycle():
     assert airac.cycle(next_cycle=True, date_in="2023-12-26") == date(2023, 12, 28)
     assert airac.cycle(next_cycle=True, date_in="2023-12-27") == date(2024, 1, 25)
 
+def test_cycles():
+    """cycles"""
+    assert airac.cycles("2024-01-01", "2024-03-31") == [
+        date(2023, 12, 28), date(2024, 1, 25), date(2024, 2, 22), date(2024, 3, 21)]
+    assert airac.cycles("2023-12-28", "2023-12-28") == [date(2023, 12, 28)]
+    with pytest.raises(ValueError):
+        airac.cycles("2024-03-31", "2024-01-01")
+
 def test_url_known_date():
     """url"""
     for input_date, expected_result in stc.test_url_current:
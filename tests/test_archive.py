@@ -0,0 +1,59 @@
+"""
+eAIP Parser
+Chris Parkinson (@chssn)
+"""
+
+#!/usr/bin/env python3.9
+
+# Standard Libraries
+import os
+import pathlib
+
+# Third Party Libraries
+import pytest
+
+# Local Libraries
+from eaip_parser import staging
+from eaip_parser.archive import Archive, cycle_name
+from eaip_parser.synthetic import SyntheticAip, SyntheticServer, SyntheticSettings
+from eaip_parser.webscrape import Webscrape
+
+def contents(path) -> dict:
+    """Every file below a directory"""
+    return {str(file_path.relative_to(path)): file_path.read_bytes()
+            for file_path in pathlib.Path(path).rglob("*") if file_path.is_file()}
+
+def test_deduplicated(data_dir, tmp_path):
+    """A file which is the same in two cycles is stored once and both can be written out"""
+    (data_dir / "VOR_UK.txt").write_text("unchanged", encoding="utf-8")
+    (data_dir / "NDB_UK.txt").write_text("first", encoding="utf-8")
+    (data_dir / "ENR-5.1").mkdir()
+    (data_dir / "ENR-5.1" / "EG D001.txt").write_text("unchanged", encoding="utf-8")
+    archive = Archive()
+    archive.save("2024-01-25")
+    first = contents(data_dir)
+    (data_dir / "NDB_UK.txt").write_text("second", encoding="utf-8")
+    archive.save("2024-02-22")
+
+    assert archive.cycles() == ["2024-01-25", "2024-02-22"]
+    blobs = [name for _, _, names in os.walk(archive.objects_dir) for name in names]
+    assert len(blobs) == 3
+    assert contents(archive.materialise("2024-01-25", str(tmp_path / "old"))) == first
+    with pytest.raises(ValueError):
+        archive.load("2023-12-28")
+
+    archive.restore("2024-01-25")
+    assert contents(data_dir) == first
+    assert staging.current() is not None
+
+def test_run_archive(data_dir):
+    """A run saves its output as its cycle"""
+    aip = SyntheticAip(SyntheticSettings(
+        aerodromes=1, routes=1, navaids=3, fixes=5, airspace=1, areas=1))
+    with SyntheticServer(aip) as server:
+        scrape = Webscrape(base_url=server.base_url)
+        archive = Archive()
+        scrape.run(no_build=True, only=["ENR-4"], archive=archive)
+    cycle = cycle_name(scrape.cycle_url)
+    assert archive.cycles() == [cycle]
+    assert set(archive.load(cycle)) == set(contents(data_dir))
@@ -0,0 +1,54 @@
+"""
+eAIP Parser
+Chris Parkinson (@chssn)
+"""
+
+#!/usr/bin/env python3.9
+
+# Standard Libraries
+import os
+
+# Third Party Libraries
+import pytest
+
+# Local Libraries
+from eaip_parser import cli
+from eaip_parser.area_file import AreaFile
+from eaip_parser.synthetic import SyntheticAip, SyntheticServer, SyntheticSettings
+from eaip_parser.webscrape import Webscrape
+
+def area_files(path) -> dict:
+    """The contents of each per area ENR 5 file"""
+    return {name: (path / name).read_bytes() for name in os.listdir(path)
+            if name.startswith("ENR-5.") and "-" in name[6:]}
+
+def test_consolidated(data_dir):
+    """The consolidated output holds exactly what the per area files do"""
+    aip = SyntheticAip(SyntheticSettings(
+        aerodromes=1, routes=1, navaids=1, fixes=5, airspace=1, areas=30))
+    with SyntheticServer(aip) as server:
+        Webscrape(base_url=server.base_url).run(no_build=True, only=["ENR-5"])
+    expected = area_files(data_dir)
+    assert len(expected) > 30
+    for name in expected:
+        os.remove(data_dir / name)
+
+    cli.main(["process", "--only", "ENR-5", "--no-build", "--consolidate-enr-5"])
+    assert not area_files(data_dir)
+    area_file = AreaFile("ENR-5.1")
+    area_id = next(iter(area_file.load()))
+    assert area_file.read(area_id).encode("utf-8") == expected[f"ENR-5.1-{area_id}.txt"]
+    with pytest.raises(ValueError):
+        area_file.read("EG D000")
+
+    cli.main(["explode"])
+    assert area_files(data_dir) == expected
+
+def test_duplicate_ids(tmp_path):
+    """A repeated id is read back as the last area written"""
+    with AreaFile("ENR-5.1", str(tmp_path)) as area_file:
+        area_file.add("EG D001", ";EGD001 - FIRST")
+        area_file.add("EG D001", ";EGD001 - SECOND")
+    assert AreaFile("ENR-5.1", str(tmp_path)).read("EG D001") == ";EGD001 - SECOND"
+    assert (tmp_path / "ENR-5.1.txt").read_text(encoding="utf-8") == (
+        ";EGD001 - FIRST\n;EGD001 - SECOND")
@@ -0,0 +1,88 @@
+"""
+eAIP Parser
+Chris Parkinson (@chssn)
+"""
+
+#!/usr/bin/env python3.9
+
+# Standard Libraries
+import json
+import multiprocessing
+import os
+import threading
+import time
+
+# Third Party Libraries
+import pytest
+
+# Local Libraries
+from eaip_parser import cli, functions
+from eaip_parser.coordinates import SharedConversionTable
+from eaip_parser.synthetic import SyntheticAip, SyntheticServer, SyntheticSettings
+
+def test_shared_table():
+    """A request is converted once however many tables share it"""
+    with multiprocessing.Manager() as manager:
+        shared, claims = manager.dict(), manager.dict()
+        tables = [SharedConversionTable(shared, claims, poll=0.01) for _ in range(4)]
+        calls = []
+
+        def convert():
+            calls.append(1)
+            time.sleep(0.05)
+            return "converted"
+
+        threads = [threading.Thread(target=table.get, args=(("key",), convert))
+                   for table in tables]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(calls) == 1
+        assert all(table.results == {("key",): "converted"} for table in tables)
+
+        def broken():
+            raise RuntimeError("no connection")
+
+        # A failed conversion gives up its claim for another table to try
+        with pytest.raises(RuntimeError):
+            tables[0].get(("other",), broken)
+        assert tables[1].get(("other",), lambda: "second try") == "second try"
+        assert dict(shared) == {("key",): "converted", ("other",): "second try"}
+        assert not dict(claims)
+
+def test_expired_claim():
+    """A claim left by a process which died is taken over once it expires"""
+    with multiprocessing.Manager() as manager:
+        shared, claims = manager.dict(), manager.dict()
+        claims[("key",)] = ("dead", time.time() + 0.1)
+        table = SharedConversionTable(shared, claims, poll=0.01)
+        assert table.get(("key",), lambda: "converted") == "converted"
+        assert dict(shared) == {("key",): "converted"}
+
+        # A process which waits too long gives up
+        claims[("other",)] = ("slow", time.time() + 60)
+        table = SharedConversionTable(shared, claims, poll=0.01, timeout=0.1)
+        with pytest.raises(TimeoutError):
+            table.get(("other",), lambda: "converted")
+
+def test_backfill(tmp_path, monkeypatch):
+    """Every cycle in the range is processed into its own store"""
+    monkeypatch.setattr(functions, "work_dir", str(tmp_path))
+    # Conversions kept from an earlier backfill are carried forward
+    (tmp_path / "conversions.jsonl").write_text(
+        json.dumps({"key": ["url", "{}", "A"], "result": "converted"}) + "\n", encoding="utf-8")
+    aip = SyntheticAip(SyntheticSettings(
+        aerodromes=1, routes=1, navaids=3, fixes=5, airspace=1, areas=1))
+    with SyntheticServer(aip) as server:
+        cli.main(["backfill", "2024-01-01", "2024-03-01", "--base-url", server.base_url,
+                  "--only", "ENR-4", "--no-build"])
+
+    with open(tmp_path / "backfill.json", "r", encoding="utf-8") as file:
+        merged = json.load(file)["cycles"]
+    assert sorted(merged) == ["2023-12-28", "2024-01-25", "2024-02-22"]
+    for cycle, result in merged.items():
+        assert result["status"] == "ok"
+        assert f"{cycle}-AIRAC" in result["cycle_url"]
+        assert "VOR_UK.txt" in os.listdir(tmp_path / "cycles" / cycle / "DataFrames")
+    assert (tmp_path / "conversions.jsonl").read_text(encoding="utf-8").count("converted") == 1
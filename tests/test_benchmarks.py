@@ -0,0 +1,260 @@
+"""
+eAIP Parser
+Chris Parkinson (@chssn)
+
+Throughput benchmarks for the parse and process hot paths. These are skipped unless the
+EAIP_BENCHMARK environment variable is set. Each benchmark is timed by the median of
+EAIP_BENCHMARK_REPEAT runs (default 11) after a warm up run. The first run records a baseline
+for each benchmark, later runs fail if throughput drops by more than EAIP_BENCHMARK_THRESHOLD
+(default 0.5). A benchmark whose number of rows has changed since its baseline was recorded is
+recorded again. Set EAIP_BENCHMARK_UPDATE to overwrite the stored baseline.
+"""
+
+#!/usr/bin/env python3.9
+
+# Standard Libraries
+import io
+import json
+import os
+import statistics
+import sys
+import time
+
+# Third Party Libraries
+import pandas as pd
+import pytest
+from loguru import logger
+
+# Local Libraries
+from eaip_parser import geodesy, lists, lxml_tables, process
+from eaip_parser.synthetic import SyntheticAip, SyntheticSettings
+from eaip_parser.webscrape import ProcessData
+
+work_dir = os.path.dirname(__file__)
+test_data = os.path.join(work_dir, "test_data")
+baseline_path = os.environ.get(
+    "EAIP_BENCHMARK_BASELINE", os.path.join(work_dir, "benchmarks", "baseline.json"))
+threshold = float(os.environ.get("EAIP_BENCHMARK_THRESHOLD", "0.5"))
+repeats = int(os.environ.get("EAIP_BENCHMARK_REPEAT", "11"))
+
+pytestmark = pytest.mark.skipif(
+    not os.environ.get("EAIP_BENCHMARK"), reason="Set EAIP_BENCHMARK=1 to run the benchmarks")
+
+
+def load_baseline() -> dict:
+    """Load the stored baseline"""
+    if os.path.exists(baseline_path):
+        with open(baseline_path, "r", encoding="utf-8") as file:
+            return json.load(file)
+    return {}
+
+def save_baseline(baseline:dict) -> None:
+    """Save the baseline"""
+    os.makedirs(os.path.dirname(baseline_path), exist_ok=True)
+    with open(baseline_path, "w", encoding="utf-8") as file:
+        json.dump(baseline, file, indent=2, sort_keys=True)
+
+def median_time(func, repeat:int) -> float:
+    """Returns the median of a number of runs, after a warm up run which isn't timed"""
+    func()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+@pytest.fixture
+def benchmark():
+    """Time a function, compare its throughput against the baseline and record it"""
+
+    # Logging every row would dominate the timings
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+    def run(name:str, func, rows:int, repeat:int=0) -> float:
+        throughput = rows / median_time(func, repeat or repeats)
+        print(f"{name}: {throughput:,.0f} rows/s")
+        baseline = load_baseline()
+        if name in baseline and baseline[name]["rows"] != rows:
+            # A different workload isn't comparable, so it's treated as a new benchmark
+            print(f"{name}: workload changed from {baseline[name]['rows']:,} rows, "
+                  "recording a new baseline")
+            del baseline[name]
+        if name not in baseline or os.environ.get("EAIP_BENCHMARK_UPDATE"):
+            baseline[name] = {"rows": rows, "throughput": throughput}
+            save_baseline(baseline)
+            return throughput
+        expected = baseline[name]["throughput"]
+        assert throughput >= expected * (1 - threshold), (
+            f"{name} regressed to {throughput:,.0f} rows/s from a baseline of "
+            f"{expected:,.0f} rows/s")
+        return throughput
+
+    yield run
+    logger.remove()
+    logger.add(sys.stderr)
+
+def load_test_data(file_name:str) -> pd.DataFrame:
+    """Load a csv from the test data"""
+    return pd.read_csv(os.path.join(test_data, file_name))
+
+def enr_5_data(section:str, count:int) -> pd.DataFrame:
+    """Generate ENR 5 area rows"""
+    coords = ("504500N 0012800E - 503800N 0011500E - 503600N 0011900E - 504500N 0012800E")
+    circle = "A circle, 2 NM radius, centred at 525747N 0003337W"
+    if section == "ENR-5.1":
+        areas = [f"EG D{idx} AREA {idx}  {coords if idx % 2 else circle}" for idx in range(count)]
+    else:
+        areas = [f"AREA {idx}  {coords if idx % 2 else circle}" for idx in range(count)]
+    return pd.DataFrame({"area": areas})
+
+def ad_2_data(path, count:int) -> None:
+    """Generate AD 1.3 and a pair of AD 2 tables for a number of aerodromes"""
+    aerodromes = [(f"AERODROME {idx}", f"EX{idx:02d}") for idx in range(count)]
+    pd.DataFrame(aerodromes, columns=["location", "icao_designator"]).to_csv(
+        path / "AD-1.3.csv")
+    for _, icao in aerodromes:
+        pd.DataFrame([
+            ["1", "ARP coordinates and site at AD", "512839N 0002742W Mid point of RWY"],
+            ["2", "Direction and distance from city", "12 NM W of City"],
+            ["3", "Elevation / Reference temperature / Mean Low Temperature", "83 FT / 23°C"],
+            ["4", "Geoid undulation at AD ELEV PSN", "151 FT"],
+            ["5", "Magnetic Variation / Annual Change", "0.22°W (2022) / 0.17°E"],
+        ]).to_csv(path / f"{icao}_0.csv")
+        pd.DataFrame([
+            ["Designations RWY Number", "TRUE BRG", "Dimensions of RWY", "Surface",
+             "THR coordinates", "THR elevation", "Slope"],
+            ["09L", "089.67°", "3902 x 50 M", "Grooved Asphalt",
+             "512839.00N 0002905.97W", "THR 78.3 FT", "0.07%"],
+            ["27R", "269.71°", "3902 x 50 M", "Grooved Asphalt",
+             "512839.63N 0002559.75W", "THR 77.8 FT", "0.07%"],
+        ]).to_csv(path / f"{icao}_1.csv")
+
+
+def test_search_enr_2_x(benchmark, data_dir):
+    """search_enr_2_x"""
+    proc = ProcessData()
+    file_names = ["ENR-2.1_0", "ENR-2.1_1", "ENR-2.2_0", "ENR-2.2_1", "ENR-2.2_2"]
+    tables = [(file_name, load_test_data(f"{file_name}.csv")) for file_name in file_names]
+
+    def run():
+        for file_name, table in tables:
+            proc.search_enr_2_x(table, file_name, no_build=True)
+
+    benchmark("search_enr_2_x", run, sum(len(table) for _, table in tables))
+
+def test_search_enr_3_x(benchmark, data_dir):
+    """search_enr_3_x"""
+    proc = ProcessData()
+    tables = [load_test_data(file_name) for file_name in os.listdir(test_data)
+              if file_name.startswith("ENR-3.2_")]
+
+    def run():
+        for table in tables:
+            proc.search_enr_3_x(table)
+
+    benchmark("search_enr_3_x", run, sum(len(table) for table in tables))
+
+def test_search_enr_4_1(benchmark, data_dir):
+    """search_enr_4_1"""
+    proc = ProcessData()
+    table = load_test_data("ENR-4.1.csv")
+    benchmark("search_enr_4_1", lambda: proc.search_enr_4_1(table, no_build=True), len(table))
+
+def test_search_enr_4_4(benchmark, data_dir):
+    """search_enr_4_4"""
+    proc = ProcessData()
+    table = load_test_data("ENR-4.4.csv")
+    benchmark("search_enr_4_4", lambda: proc.search_enr_4_4(table, no_build=True), len(table))
+
+def test_search_enr_5_x(benchmark, data_dir):
+    """search_enr_5_x"""
+    proc = ProcessData()
+    tables = [(section, enr_5_data(section, 200)) for section in ["ENR-5.1", "ENR-5.2", "ENR-5.3"]]
+
+    def run():
+        for section, table in tables:
+            proc.search_enr_5_x(table, section, no_build=True)
+
+    benchmark("search_enr_5_x", run, sum(len(table) for _, table in tables))
+
+def test_process_aerodromes(benchmark, data_dir):
+    """ProcessAerodromes"""
+    ad_2_data(data_dir, 50)
+    # Slow enough that fewer runs still give a stable median
+    benchmark("process_aerodromes", process.ProcessAerodromes().run, 50, repeat=5)
+
+def test_regex(benchmark):
+    """lists.Regex"""
+    enr_4_1 = load_test_data("ENR-4.1.csv")
+    coordinates = list(load_test_data("ENR-4.4.csv")["coordinates"]) + list(enr_4_1["coordinates"])
+    frequencies = list(enr_4_1["frequency"])
+    names = list(enr_4_1["name"])
+    limits = ["Upper limit: FL 245  Lower limit: FL 105"] * 1000
+
+    def run():
+        for item in coordinates:
+            lists.Regex.coordinates(item)
+        for item in frequencies:
+            lists.Regex.frequency(item)
+            lists.Regex.tacan_channel(item)
+        for item in names:
+            lists.Regex.vor_dme_ndb(item)
+        for item in limits:
+            lists.Regex.vertical_limits(item)
+            lists.Regex.flight_level(item)
+
+    rows = len(coordinates) + len(frequencies) + len(names) + len(limits)
+    benchmark("regex", run, rows)
+
+def test_regex_batch(benchmark):
+    """lists.Regex row by row against the series variants"""
+    table = pd.concat([load_test_data("ENR-4.1.csv")] * 20, ignore_index=True)
+
+    def per_row():
+        for _, row in table.iterrows():
+            lists.Regex.vor_dme_ndb(row["name"])
+            lists.Regex.frequency(row["frequency"])
+            lists.Regex.tacan_channel(row["frequency"])
+            lists.Regex.coordinates(row["coordinates"])
+
+    def batch():
+        lists.Regex.extract_vor_dme_ndb(table["name"])
+        lists.Regex.extract_frequency(table["frequency"])
+        lists.Regex.extract_tacan_channel(table["frequency"])
+        lists.Regex.extract_coordinates(table["coordinates"])
+
+    single = benchmark("regex_per_row", per_row, len(table))
+    series = benchmark("regex_batch", batch, len(table))
+    print(f"The series variants are {series / single:.1f}x faster")
+
+def test_validate_segments(benchmark):
+    """geodesy.SegmentValidator across the whole route network"""
+    tables = [load_test_data(file_name).astype(str) for file_name in os.listdir(test_data)
+              if file_name.startswith("ENR-3.2_")]
+    validator = geodesy.SegmentValidator()
+    segments = pd.concat([validator.segments(table) for table in tables] * 50,
+                         ignore_index=True)
+
+    def run():
+        validator.check(segments)
+
+    benchmark("validate_segments", run, len(segments))
+
+@pytest.fixture(scope="module")
+def enr_3_2_page():
+    """A synthetic ENR 3.2 page with a few hundred route tables"""
+    aip = SyntheticAip(SyntheticSettings(routes=300, navaids=20, fixes=400))
+    page = aip.page(aip.file_name("ENR-3.2"))
+    rows = sum(len(table) for table in lxml_tables.read_tables(page, "Route Designator"))
+    return page, rows
+
+def test_read_html_lxml(benchmark, enr_3_2_page):
+    """lxml_tables.read_tables against pd.read_html with bs4"""
+    page, rows = enr_3_2_page
+    lxml = benchmark("read_html_lxml", lambda: lxml_tables.read_tables(
+        page, "Route Designator"), rows, repeat=5)
+    bs4 = benchmark("read_html_bs4", lambda: pd.read_html(
+        io.StringIO(page), flavor="bs4", match="Route Designator"), rows, repeat=5)
+    print(f"lxml is {lxml / bs4:.1f}x faster than bs4")
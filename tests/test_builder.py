@@ -6,6 +6,8 @@ Chris Parkinson (@chssn)
 #!/usr/bin/env python3.9
 
 # Standard Libraries
+import threading
+import time
 
 # Third Party Libraries
 import pytest
@@ -14,6 +16,7 @@ from loguru import logger
 from unittest.mock import MagicMock, patch
 
 # Local Libraries
+from eaip_parser import cassette, coordinates
 from eaip_parser.builder import KiloJuliett, BuildSettings, ArcSettings, BuildAirports
 
 def test_init():
@@ -297,6 +300,62 @@ N052.26.56.556 E000.32.24.066 N052.27.02.052 E000.33.01.560"""),
             kj_test.base_url = "https://www.aurora.nats.co.uk/non_existant_page.html"
             kj_test.request_output("any string will do")
 
+def test_request_output_threads():
+    """Concurrent calls each send their own input"""
+    def fake_request(method, url, data, **kwargs):
+        text = '{"txt": "N051.00.00.000 W001.00.00.000 %s"}' % data["input"]
+        return MagicMock(status_code=200, content=text.encode(), text=text)
+
+    kj_test = KiloJuliett()
+    kj_test.settings()
+    results = {}
+    with patch("requests.request", side_effect=fake_request), \
+            patch.object(kj_test, "check_in_uk", return_value=True):
+        threads = [threading.Thread(
+            target=lambda idx=idx: results.update({idx: kj_test.request_output(str(idx))}))
+            for idx in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    assert results == {idx: f"N051.00.00.000 W001.00.00.000 {idx}" for idx in range(20)}
+    assert kj_test.rate_limit == 20
+    assert "input" not in kj_test.request_settings
+
+def test_request_output_normalised():
+    """Every spelling of a request sends and gets the normalised request's conversion"""
+    kj_test = KiloJuliett()
+    kj_test.settings()
+    convert = MagicMock(side_effect=lambda data_in: f"CONVERTED {data_in}")
+    with patch.object(kj_test, "convert", convert):
+        assert kj_test.request_output(" 515923N  0000342E\n515923N 0000342E ") == (
+            "CONVERTED 515923N 0000342E 515923N 0000342E")
+        assert kj_test.request_output("515923N 0000342E 515923N 0000342E") == (
+            "CONVERTED 515923N 0000342E 515923N 0000342E")
+    convert.assert_called_once_with("515923N 0000342E 515923N 0000342E")
+
+def test_converter_limit(monkeypatch):
+    """No more conversions are in flight than the converter's host limit"""
+    in_flight = []
+    lock = threading.Lock()
+
+    def fake_request(method, url, data, **kwargs):
+        with lock:
+            in_flight.append(in_flight[-1] + 1 if in_flight else 1)
+        time.sleep(0.01)
+        with lock:
+            in_flight.append(in_flight[-1] - 1)
+        text = '{"txt": "N051.00.00.000 W001.00.00.000 %s"}' % data["input"]
+        return MagicMock(status_code=200, content=text.encode(), text=text)
+
+    kj_test = KiloJuliett()
+    kj_test.settings()
+    monkeypatch.setitem(cassette.host_limits, "kilojuliett.ch", threading.BoundedSemaphore(1))
+    with patch("requests.request", side_effect=fake_request), \
+            patch.object(kj_test, "check_in_uk", return_value=True):
+        coordinates.prefetch(kj_test, [f"limit {idx}" for idx in range(8)], workers=4)
+    assert max(in_flight) == 1
+
 def test_runway_flip_flop():
     """runway_flip_flop"""
 
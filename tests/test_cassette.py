@@ -0,0 +1,90 @@
+"""
+eAIP Parser
+Chris Parkinson (@chssn)
+"""
+
+#!/usr/bin/env python3.9
+
+# Standard Libraries
+import time
+from unittest.mock import MagicMock
+
+# Third Party Libraries
+import pytest
+import requests
+
+# Local Libraries
+from eaip_parser import cassette
+from eaip_parser.builder import KiloJuliett
+from eaip_parser.synthetic import SyntheticAip, SyntheticServer, SyntheticSettings
+from eaip_parser.webscrape import Webscrape
+
+small = SyntheticSettings(aerodromes=2, routes=3, navaids=5, fixes=20, airspace=2, areas=2)
+
+def test_mode():
+    """Cassette only accepts known modes"""
+    with pytest.raises(ValueError):
+        cassette.Cassette("cassette.jsonl.gz", mode="rewind")
+
+def test_key():
+    """key"""
+    key = cassette.Cassette.key
+    assert key("get", "http://a/") == key("GET", "http://a/")
+    assert key("POST", "http://a/", {"a": 1, "b": 2}) == key("POST", "http://a/", {"b": 2, "a": 1})
+    assert key("POST", "http://a/", {"a": 1}) != key("POST", "http://a/", {"a": 2})
+
+def test_record_replay_tables(tmp_path):
+    """Tables replayed from a cassette match those fetched live"""
+    file_path = str(tmp_path / "eaip.jsonl.gz")
+    aip = SyntheticAip(small)
+    with SyntheticServer(aip) as server:
+        scrape = Webscrape(base_url=server.base_url)
+        with cassette.Cassette(file_path, mode="record"):
+            recorded = scrape.get_table("ENR-4.4")
+            assert scrape.get_table("GEN-0.1") is None
+
+    with cassette.Cassette(file_path) as replay:
+        replayed = scrape.get_table("ENR-4.4")
+        assert scrape.get_table("GEN-0.1") is None
+        with pytest.raises(cassette.CassetteMissError):
+            scrape.get_table("ENR-4.1")
+    assert cassette.active is None
+    assert len(replay.exchanges) == 2
+    assert recorded[0].equals(replayed[0])
+
+def test_replay_kilojuliett(tmp_path, monkeypatch):
+    """KiloJuliett exchanges, including retries, are replayed in the order they were recorded"""
+    file_path = str(tmp_path / "kj.jsonl.gz")
+    responses = [
+        MagicMock(status_code=500, content=b"", text=""),
+        MagicMock(status_code=200, content=b'{"txt": "N051.00.00.000 W001.00.00.000"}',
+                  text='{"txt": "N051.00.00.000 W001.00.00.000"}'),
+        ]
+    monkeypatch.setattr(requests, "request", MagicMock(side_effect=responses))
+    monkeypatch.setattr(time, "sleep", lambda _: None)
+
+    kj_test = KiloJuliett()
+    kj_test.settings()
+    with cassette.Cassette(file_path, mode="record") as record:
+        assert kj_test.request_output("510000N 0010000W") == "N051.00.00.000 W001.00.00.000"
+    assert sum(len(exchanges) for exchanges in record.exchanges.values()) == 2
+
+    monkeypatch.setattr(requests, "request", MagicMock(side_effect=AssertionError))
+    with cassette.Cassette(file_path):
+        assert kj_test.request_output("510000N 0010000W") == "N051.00.00.000 W001.00.00.000"
+
+def test_latency(tmp_path):
+    """Replayed exchanges are delayed by the configured latency"""
+    file_path = tmp_path / "latency.jsonl.gz"
+    record = cassette.Cassette(str(file_path), mode="record")
+    key = record.key("GET", "http://example/")
+    record.exchanges[key] = [{
+        "key": key, "method": "GET", "url": "http://example/", "status": 200, "text": "hello"}]
+    record.save()
+
+    with cassette.Cassette(str(file_path), latency=0.05):
+        start = time.perf_counter()
+        response = cassette.request("GET", "http://example/")
+        assert time.perf_counter() - start >= 0.05
+    assert response.status_code == 200
+    assert response.text == "hello"
@@ -0,0 +1,83 @@
+"""
+eAIP Parser
+Chris Parkinson (@chssn)
+"""
+
+#!/usr/bin/env python3.9
+
+# Standard Libraries
+import os
+
+# Third Party Libraries
+import pytest
+
+# Local Libraries
+from eaip_parser import coordinates, functions
+from eaip_parser.checkpoint import Checkpoint
+from eaip_parser.coordinates import ConversionTable
+from eaip_parser.synthetic import SyntheticAip, SyntheticServer, SyntheticSettings
+from eaip_parser.webscrape import Webscrape
+
+small = SyntheticSettings(aerodromes=3, routes=3, navaids=5, fixes=20, airspace=2, areas=2)
+
+def test_checkpoint(data_dir):
+    """Completed stages and items are only kept when resuming the same run"""
+    checkpoint = Checkpoint("2024-01-25")
+    checkpoint.complete("scrape ENR-4.1")
+    checkpoint.complete("scrape AD-2", "EGLL")
+    assert checkpoint.done("scrape ENR-4.1")
+    assert not checkpoint.done("scrape AD-2")
+    assert checkpoint.done("scrape AD-2", "EGLL")
+    assert not checkpoint.done("scrape AD-2", "EGKK")
+
+    resumed = Checkpoint("2024-01-25", resume=True)
+    assert resumed.done("scrape ENR-4.1")
+    assert resumed.done("scrape AD-2", "EGLL")
+    resumed.complete("scrape AD-2")
+    assert resumed.done("scrape AD-2", "EGKK")
+
+    assert not Checkpoint("2024-02-22", resume=True).done("scrape ENR-4.1")
+    assert os.path.exists(data_dir / "checkpoint.json")
+
+def test_journal(tmp_path):
+    """Conversions are kept in the journal as they're made"""
+    file_path = str(tmp_path / "conversions.jsonl")
+    table = ConversionTable()
+    table.open_journal(file_path)
+    table.get(("url", "{}", "A"), lambda: "converted")
+    table.close_journal()
+    with open(file_path, "a", encoding="utf-8") as file:
+        file.write('{"key": ["url", "{}", "B"], "res')
+
+    reloaded = ConversionTable()
+    reloaded.open_journal(file_path)
+    reloaded.close_journal()
+    assert reloaded.results == {("url", "{}", "A"): "converted"}
+
+def test_resume(data_dir, monkeypatch):
+    """A resumed run only scrapes what the interrupted run didn't"""
+    aip = SyntheticAip(small)
+    page = aip.page
+    requested = []
+
+    def broken_page(file_name):
+        requested.append(file_name)
+        if "ENR-5.1" in file_name or aip.aerodromes[1][1] in file_name:
+            return None
+        return page(file_name)
+
+    monkeypatch.setattr(aip, "page", broken_page)
+    with SyntheticServer(aip) as server:
+        with pytest.raises(functions.NoUrlDataFoundError):
+            Webscrape(base_url=server.base_url).run(no_build=True, workers=1)
+
+        monkeypatch.setattr(aip, "page", lambda file_name: requested.append(file_name) or
+                            page(file_name))
+        requested.clear()
+        Webscrape(base_url=server.base_url).run(no_build=True, resume=True)
+
+    # AD 1.3 is read again to find the aerodromes which are left
+    assert sorted(name.split("-en-GB")[0] for name in requested) == sorted(
+        ["EG-AD-1.3", f"EG-AD-2.{aip.aerodromes[1][1]}", "EG-ENR-5.1"])
+    assert "VOR_UK.txt" in os.listdir(data_dir)
+    coordinates.table.clear()
@@ -0,0 +1,59 @@
+"""
+eAIP Parser
+Chris Parkinson (@chssn)
+"""
+
+#!/usr/bin/env python3.9
+
+# Standard Libraries
+import os
+import subprocess
+import sys
+
+# Third Party Libraries
+import pytest
+
+# Local Libraries
+from eaip_parser import cli
+from eaip_parser.synthetic import SyntheticAip, SyntheticServer, SyntheticSettings
+
+small = SyntheticSettings(aerodromes=3, routes=3, navaids=5, fixes=20, airspace=2, areas=2)
+
+def test_sections():
+    """sections"""
+    assert cli.sections("enr-3.2, AD-2.EGLL,") == ["ENR-3.2", "AD-2.EGLL"]
+    assert cli.sections("ENR") == ["ENR"]
+    with pytest.raises(SystemExit):
+        cli.parser().parse_args(["scrape", "--only", "ENR-3.2,EGLL"])
+
+def test_lazy_imports():
+    """The airac command doesn't import any heavy dependencies"""
+    code = ("import sys; from eaip_parser import cli; cli.main(['airac', '--date', '2024-06-01']); "
+            "print(sorted({'pandas', 'bs4', 'requests', 'git'} & set(sys.modules)))")
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True,
+        cwd=os.path.dirname(os.path.dirname(__file__)))
+    assert output.stdout.splitlines() == ["2024-05-16", "[]"]
+
+def test_scrape_only(data_dir):
+    """Only the requested sections are scraped"""
+    aip = SyntheticAip(small)
+    icao = aip.aerodromes[0][1]
+    with SyntheticServer(aip) as server:
+        cli.main(["scrape", "--base-url", server.base_url, "--only", f"ENR-4.4,AD-2.{icao}"])
+
+    files = os.listdir(data_dir)
+    assert "ENR-4.4.csv" in files
+    assert "ENR-4.1.csv" not in files
+    assert "AD-1.3.csv" in files
+    assert {file.split("_")[0] for file in files if file.endswith("_0.csv")} == {icao}
+
+def test_process_only(data_dir, mocker):
+    """Only the requested sections are processed"""
+    process = mocker.patch("eaip_parser.webscrape.ProcessData.process_enr_3")
+    skipped = mocker.patch("eaip_parser.webscrape.ProcessData.process_enr_4")
+    aerodromes = mocker.patch("eaip_parser.process.ProcessAerodromes.run")
+    cli.main(["process", "--only", "ENR-3.2", "--no-build"])
+    process.assert_called_once_with(no_build=True)
+    skipped.assert_not_called()
+    aerodromes.assert_not_called()
@@ -0,0 +1,99 @@
+"""
+eAIP Parser
+Chris Parkinson (@chssn)
+"""
+
+#!/usr/bin/env python3.9
+
+# Standard Libraries
+import json
+from unittest.mock import patch
+
+# Third Party Libraries
+import pytest
+
+# Local Libraries
+from eaip_parser.compare import ComparisonReport, UkSectorFile
+
+
+@pytest.fixture
+def sector_file():
+    """A UkSectorFile which doesn't touch git"""
+    with patch.object(UkSectorFile, "_git_actions"):
+        yield UkSectorFile()
+
+@pytest.fixture
+def vor_files(tmp_path):
+    """A pair of VOR files with one of each change kind"""
+    file_a = tmp_path / "old" / "VOR_UK.txt"
+    file_b = tmp_path / "new" / "VOR_UK.txt"
+    file_a.parent.mkdir()
+    file_b.parent.mkdir()
+    file_a.write_text(
+        "ADN 114.300 N057.18.37.620 W002.16.01.950 ; Aberdeen\n"
+        "BKY 116.250 N051.59.23.170 E000.03.42.870 ; Barkway (DME)\n"
+        "BEL 117.200 N054.39.40.270 W006.13.47.660 ; Belfast\n",
+        encoding="utf-8")
+    file_b.write_text(
+        "ADN 114.300 N057.18.37.620 W002.16.01.950 ; Aberdeen\n"
+        "BKY 116.200 N051.59.23.170 E000.03.42.870 ; Barkway (DME)\n"
+        "BHD 112.050 N050.23.54.980 W003.29.37.460 ; Berry Head\n",
+        encoding="utf-8")
+    return str(file_a), str(file_b)
+
+def test_compare_records(sector_file, vor_files):
+    """compare_records"""
+    entries = list(sector_file.compare_records(*vor_files))
+    assert [(entry["record"], entry["change"]) for entry in entries] == [
+        ("BKY", "modified"),
+        ("BEL", "removed"),
+        ("BHD", "added"),
+    ]
+    assert entries[0]["old"].startswith("BKY 116.250")
+    assert entries[0]["new"].startswith("BKY 116.200")
+    assert entries[1]["new"] is None
+    assert entries[2]["old"] is None
+    assert all(entry["file"] == "VOR_UK.txt" for entry in entries)
+
+def test_keyed_records_duplicates(sector_file, tmp_path):
+    """keyed_records"""
+    file_a = tmp_path / "route.txt"
+    file_a.write_text("BIG   BIG   BETPO BETPO\n;Route Break\n\nBIG   BIG   HON   HON\n",
+                      encoding="utf-8")
+    assert list(sector_file.keyed_records(str(file_a))) == ["BIG", ";Route Break", "BIG#1"]
+
+def test_report_jsonl(sector_file, vor_files, tmp_path):
+    """ComparisonReport jsonl"""
+    report_path = tmp_path / "report.jsonl"
+    with ComparisonReport(str(report_path)) as report:
+        sector_file.compare(*vor_files, report=report)
+
+    lines = [json.loads(line) for line in report_path.read_text(encoding="utf-8").splitlines()]
+    assert [line["type"] for line in lines] == ["entry", "entry", "entry", "summary"]
+    assert lines[-1] == {
+        "type": "summary", "files": 1, "added": 1, "removed": 1, "modified": 1, "total": 3}
+
+def test_report_json(sector_file, vor_files, tmp_path):
+    """ComparisonReport json"""
+    report_path = tmp_path / "report.json"
+    with ComparisonReport(str(report_path), output_format="json") as report:
+        sector_file.compare(*vor_files, report=report)
+
+    loaded = json.loads(report_path.read_text(encoding="utf-8"))
+    assert len(loaded["entries"]) == 3
+    assert loaded["summary"]["total"] == 3
+
+def test_report_empty(tmp_path):
+    """ComparisonReport with no entries"""
+    report_path = tmp_path / "report.json"
+    with ComparisonReport(str(report_path), output_format="json"):
+        pass
+    assert json.loads(report_path.read_text(encoding="utf-8"))["entries"] == []
+
+def test_report_errors(tmp_path):
+    """ComparisonReport errors"""
+    with pytest.raises(ValueError):
+        ComparisonReport(str(tmp_path / "report.xml"), output_format="xml")
+    with ComparisonReport(str(tmp_path / "report.jsonl")) as report:
+        with pytest.raises(ValueError):
+            report.add({"file": "a", "record": "b", "change": "moved", "old": 1, "new": 2})
@@ -0,0 +1,94 @@
+"""
+eAIP Parser
+Chris Parkinson (@chssn)
+"""
+
+#!/usr/bin/env python3.9
+
+# Standard Libraries
+import threading
+import time
+
+# Third Party Libraries
+import pytest
+
+# Local Libraries
+from eaip_parser import coordinates, functions
+from eaip_parser.coordinates import ConversionTable
+from eaip_parser.synthetic import SyntheticAip, SyntheticServer, SyntheticSettings
+from eaip_parser.webscrape import ProcessData, Webscrape
+
+def test_point_request():
+    """point_request"""
+    assert coordinates.normalise(" 571837.62N  0021601.95W ") == "571837.62N 0021601.95W"
+    assert (coordinates.point_request("571837.62N  0021601.95W") ==
+            "571837.62N 0021601.95W 571837.62N 0021601.95W")
+
+def test_table_get():
+    """Concurrent requests for the same key are converted once, failures aren't kept"""
+    table = ConversionTable()
+    calls = []
+
+    def convert():
+        calls.append(1)
+        time.sleep(0.05)
+        return "converted"
+
+    threads = [threading.Thread(target=table.get, args=("key", convert)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert (table.hits, table.misses) == (7, 1)
+
+    def broken():
+        raise RuntimeError("no connection")
+
+    with pytest.raises(RuntimeError):
+        table.get("other", broken)
+    assert table.get("other", lambda: "second try") == "second try"
+
+def test_distinct_points(tmp_path, monkeypatch, mocker):
+    """Every distinct point used by ENR 3 and ENR 4 is converted exactly once"""
+    monkeypatch.setattr(functions, "work_dir", str(tmp_path))
+    aip = SyntheticAip(SyntheticSettings(
+        aerodromes=1, routes=6, navaids=5, fixes=20, airspace=1, areas=1))
+    with SyntheticServer(aip) as server:
+        scrape = Webscrape(base_url=server.base_url)
+        scrape.run(no_build=True, only=["ENR-3", "ENR-4"])
+
+    coordinates.table.clear()
+    convert = mocker.patch.object(
+        scrape.proc.build, "convert", side_effect=coordinates.normalise)
+    scrape.proc.process_enr_3()
+    scrape.proc.process_enr_4()
+    requests_sent = [coordinates.normalise(call.args[0]) for call in convert.call_args_list]
+    assert len(requests_sent) == len(set(requests_sent))
+    assert len(requests_sent) == len(coordinates.table)
+    # The navaids are used by both sections but were only converted once
+    assert coordinates.table.hits >= 5
+
+def test_write_enr_2(tmp_path, monkeypatch, mocker):
+    """Areas are written in order under their titles while the conversions run concurrently"""
+    monkeypatch.setattr(functions, "work_dir", str(tmp_path))
+    (tmp_path / "DataFrames").mkdir()
+    coordinates.table.clear()
+    proc = ProcessData()
+
+    def convert(data_in):
+        time.sleep(0.05)
+        return f"converted {data_in}"
+
+    mocker.patch.object(proc.build, "convert", side_effect=convert)
+    areas = {f"{'LONDON' if idx < 4 else 'SCOTTISH'} CTA {idx}": f"51000{idx}N 0010000W"
+             for idx in range(8)}
+    limits = {name: "Class A" for name in list(areas)[1:]}
+    start = time.perf_counter()
+    proc.write_enr_2(areas, "ENR-2.1_0", False, limits)
+    assert time.perf_counter() - start < 0.3
+    output = (tmp_path / "DataFrames" / "ENR-2.1_0_AIRSPACE.sct").read_text(encoding="utf-8")
+    assert output.startswith("\n; LONDON CTA \n; LONDON CTA 0 - WARNING! Unable to locate")
+    assert output.index("CTA 3 - Class A") < output.index("; SCOTTISH CTA \n; SCOTTISH CTA 4")
+    assert output.count("converted 51000") == 8
+    coordinates.table.clear()
@@ -0,0 +1,85 @@
+"""
+eAIP Parser
+Chris Parkinson (@chssn)
+"""
+
+#!/usr/bin/env python3.9
+
+# Standard Libraries
+import json
+import os
+import threading
+import time
+import urllib.parse
+
+# Third Party Libraries
+import pytest
+
+# Local Libraries
+from eaip_parser import cassette, cli, countries, functions, webscrape
+from eaip_parser.synthetic import SyntheticAip, SyntheticServer, SyntheticSettings
+
+small = SyntheticSettings(aerodromes=2, routes=2, navaids=3, fixes=10, airspace=1, areas=2)
+
+def test_countries(tmp_path, monkeypatch):
+    """Each country is run in its own working directory and merged into one manifest"""
+    monkeypatch.setattr(functions, "work_dir", str(tmp_path))
+    with SyntheticServer(SyntheticAip(small, "EG")) as server_eg:
+        with SyntheticServer(SyntheticAip(small, "EH")) as server_eh:
+            cli.main(["countries", "EG,EH", "--no-build", "--only", "ENR-4,AD-1.3",
+                      "--base-url", f"EG={server_eg.base_url}",
+                      "--base-url", f"EH={server_eh.base_url}"])
+    with open(tmp_path / "countries.json", "r", encoding="utf-8") as file:
+        merged = json.load(file)["countries"]
+    assert sorted(merged) == ["EG", "EH"]
+    for country, result in merged.items():
+        assert result["status"] == "ok"
+        assert result["work_dir"] == str(tmp_path / "countries" / country)
+        assert "VOR_UK.txt" in os.listdir(result["dataframes"])
+        assert result["metrics"]["stages"]
+    ad_1_3 = os.path.join(merged["EH"]["dataframes"], "AD-1.3.csv")
+    with open(ad_1_3, "r", encoding="utf-8") as file:
+        assert ",EH" in file.read()
+
+def test_failed_country(tmp_path):
+    """A country which fails doesn't stop the others and is recorded in the manifest"""
+    with SyntheticServer(SyntheticAip(small, "EG")) as server:
+        runner = countries.MultiCountry(
+            ["EG", "EH"], root=str(tmp_path), base_urls={"EG": server.base_url,
+                                                         "EH": "http://127.0.0.1:9/"})
+        with pytest.raises(RuntimeError):
+            runner.run(no_build=True, only=["ENR-4"])
+    with open(runner.manifest_path, "r", encoding="utf-8") as file:
+        merged = json.load(file)["countries"]
+    assert merged["EG"]["status"] == "ok"
+    assert merged["EH"]["status"] == "failed"
+
+    with pytest.raises(ValueError):
+        countries.MultiCountry(["EG", "eg"])
+    with pytest.raises(ValueError):
+        countries.MultiCountry(["GBR"])
+    with pytest.raises(ValueError, match="EH"):
+        countries.MultiCountry(["EG", "EH"])
+
+def test_host_limit(tmp_path, monkeypatch):
+    """No more requests are in flight to a host than its limit"""
+    monkeypatch.setattr(functions, "work_dir", str(tmp_path))
+    aip = SyntheticAip(small)
+    page = aip.page
+    in_flight = []
+    lock = threading.Lock()
+
+    def slow_page(file_name):
+        with lock:
+            in_flight.append(in_flight[-1] + 1 if in_flight else 1)
+        time.sleep(0.02)
+        with lock:
+            in_flight.append(in_flight[-1] - 1)
+        return page(file_name)
+
+    monkeypatch.setattr(aip, "page", slow_page)
+    with SyntheticServer(aip) as server:
+        host = urllib.parse.urlsplit(server.base_url).netloc
+        monkeypatch.setitem(cassette.host_limits, host, threading.BoundedSemaphore(1))
+        webscrape.Webscrape(base_url=server.base_url).scrape(only=["ENR"], workers=4)
+    assert max(in_flight) == 1
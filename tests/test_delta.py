@@ -0,0 +1,142 @@
+"""
+eAIP Parser
+Chris Parkinson (@chssn)
+"""
+
+#!/usr/bin/env python3.9
+
+# Standard Libraries
+import json
+import shutil
+
+# Third Party Libraries
+import pandas as pd
+import pytest
+
+# Local Libraries
+from eaip_parser import coordinates, functions
+from eaip_parser.delta import CycleDelta
+from eaip_parser.synthetic import SyntheticAip, SyntheticServer, SyntheticSettings
+from eaip_parser.webscrape import ProcessData, Webscrape
+
+@pytest.fixture
+def cycles(tmp_path):
+    """Two cycles of scraped tables"""
+    previous = tmp_path / "previous"
+    current = tmp_path / "current"
+    previous.mkdir()
+    current.mkdir()
+    columns = ["name", "id", "frequency", "coordinates"]
+    pd.DataFrame([
+        ["ABERDEEN VOR/DME", "ADN", "114.300 MHz", "571837.62N 0021601.95W"],
+        ["BARKWAY DME", "BKY", "116.250 MHz", "515923.17N 0000342.87E"],
+        ["BELFAST VOR/DME", "BEL", "117.200 MHz", "543656.74N 0061136.10W"],
+    ], columns=columns).to_csv(previous / "ENR-4.1.csv")
+    pd.DataFrame([
+        ["ABERDEEN VOR/DME", "ADN", "114.300 MHz", "571837.62N 0021601.95W"],
+        ["BARKWAY DME", "BKY", "116.255 MHz", "515923.17N 0000342.87E"],
+        ["BIGGIN VOR/DME", "BIG", "115.100 MHz", "511951.00N 0000209.00E"],
+    ], columns=columns).to_csv(current / "ENR-4.1.csv")
+    pd.DataFrame({"area": ["EG D001 AREA 1", "EG D002 AREA 2"]}).to_csv(previous / "ENR-5.1.csv")
+    pd.DataFrame({"area": ["EG D001 AREA 1", "EG D002 AREA 3"]}).to_csv(current / "ENR-5.1.csv")
+    pd.DataFrame({"area": ["unchanged"]}).to_csv(previous / "ENR-5.2.csv")
+    pd.DataFrame({"area": ["unchanged"]}).to_csv(current / "ENR-5.2.csv")
+    # Processed output isn't compared
+    (current / "VOR_UK.txt").write_text("output", encoding="utf-8")
+    return CycleDelta(str(previous), str(current))
+
+def test_is_table():
+    """is_table"""
+    for file_name in ["ENR-4.1.csv", "ENR-3.2_15.csv", "EGLL_3.csv", "AD-1.3.csv"]:
+        assert CycleDelta.is_table(file_name)
+    for file_name in ["VOR_DME.csv", "AA - RUNWAYS.csv", "ENR-4.1.txt"]:
+        assert not CycleDelta.is_table(file_name)
+
+def test_changes(cycles):
+    """Keyed sections report modifications, others report additions and removals"""
+    changes = list(cycles.changes())
+    summary = {(change["file"], change["record"][:3], change["change"]) for change in changes
+               if change["file"] == "ENR-4.1"}
+    assert summary == {
+        ("ENR-4.1", "BKY", "modified"), ("ENR-4.1", "BIG", "added"),
+        ("ENR-4.1", "BEL", "removed")}
+    modified = [change for change in changes if change["change"] == "modified"][0]
+    assert modified["old"]["frequency"] == "116.250 MHz"
+    assert modified["new"]["frequency"] == "116.255 MHz"
+
+    enr_5 = [(change["change"], (change["new"] or change["old"])["area"])
+             for change in changes if change["file"] == "ENR-5.1"]
+    assert sorted(enr_5) == [("added", "EG D002 AREA 3"), ("removed", "EG D002 AREA 2")]
+
+def test_write(cycles, tmp_path):
+    """write"""
+    file_path = tmp_path / "delta.jsonl"
+    summary = cycles.write(str(file_path))
+    assert summary == {"files": 2, "added": 2, "removed": 2, "modified": 1, "total": 5}
+    lines = [json.loads(line) for line in file_path.read_text(encoding="utf-8").splitlines()]
+    assert len(lines) == 6
+    assert lines[-1]["type"] == "summary"
+
+def test_previous_conversions(tmp_path, monkeypatch, mocker):
+    """Only coordinates which changed since the previous cycle are converted"""
+    monkeypatch.setattr(functions, "work_dir", str(tmp_path))
+    data_dir = tmp_path / "DataFrames"
+    data_dir.mkdir()
+    pd.DataFrame({"route": ["L603"]}).to_csv(data_dir / "ENR-3.2_0.csv")
+
+    coordinates.table.clear()
+    proc = ProcessData()
+    request = mocker.patch.object(
+        proc.build, "convert", side_effect=lambda coords: f"CONVERTED {coords}")
+    search = mocker.patch.object(proc, "search_enr_3_x", return_value=[
+        {"ADN": "571837N 0021601W", "BKY": "515923N 0000342E"}, {"ABBEW": "503011N 0032833W"}])
+    proc.process_enr_3()
+    assert request.call_count == 3
+
+    previous = tmp_path / "previous"
+    shutil.copytree(data_dir, previous)
+    search.return_value = [
+        {"ADN": "571837N 0021601W", "BKY": "515924N 0000342E"}, {"ABBEW": "503011N 0032833W"}]
+    request.reset_mock()
+    proc.previous_dir = str(previous)
+    proc.process_enr_3()
+    request.assert_called_once_with("515924N 0000342E 515924N 0000342E")
+
+    vor_dme = pd.read_csv(data_dir / "VOR_DME.csv")
+    assert list(vor_dme["index"]) == ["ADN", "BKY"]
+    assert list(vor_dme["lat/lon"]) == ["CONVERTED 571837N", "CONVERTED 515924N"]
+
+def test_reuse_unchanged(tmp_path, monkeypatch):
+    """A stage whose tables haven't changed reuses the previous cycle's output"""
+    monkeypatch.setattr(functions, "work_dir", str(tmp_path))
+    aip = SyntheticAip(SyntheticSettings(
+        aerodromes=1, routes=1, navaids=3, fixes=5, airspace=1, areas=1))
+    previous = tmp_path / "previous"
+    with SyntheticServer(aip) as server:
+        scrape = Webscrape(base_url=server.base_url)
+        scrape.run(no_build=True, only=["ENR-4"])
+        shutil.copytree(tmp_path / "DataFrames", previous)
+        scrape.run(no_build=True, only=["ENR-4"], previous_dir=str(previous))
+        assert (tmp_path / "DataFrames" / "VOR_UK.txt").samefile(previous / "VOR_UK.txt")
+
+        # Once a table has changed the stage is run again
+        manifest = json.loads((previous / "manifest.json").read_text(encoding="utf-8"))
+        manifest["process ENR-4"] = "changed"
+        (previous / "manifest.json").write_text(json.dumps(manifest), encoding="utf-8")
+        scrape.run(no_build=True, only=["ENR-4"], previous_dir=str(previous))
+    assert not (tmp_path / "DataFrames" / "VOR_UK.txt").samefile(previous / "VOR_UK.txt")
+    assert (tmp_path / "DataFrames" / "VOR_UK.txt").read_bytes() == (
+        previous / "VOR_UK.txt").read_bytes()
+
+def test_merge_journal(tmp_path):
+    """The previous cycle's conversions are used and kept for the next cycle"""
+    previous = tmp_path / "previous.jsonl"
+    previous.write_text(json.dumps({"key": ["a", "b", "c"], "result": "converted"}) + "\n",
+                        encoding="utf-8")
+    table = coordinates.ConversionTable()
+    table.open_journal(str(tmp_path / "conversions.jsonl"))
+    assert table.merge_journal(str(previous)) == 1
+    table.close_journal()
+    assert table.get(("a", "b", "c"), lambda: "not converted") == "converted"
+    assert (tmp_path / "conversions.jsonl").read_text(encoding="utf-8") == previous.read_text(
+        encoding="utf-8")
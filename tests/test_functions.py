@@ -11,6 +11,8 @@ import subprocess
 
 # Third Party Libraries
 import git
+import numpy as np
+import pandas as pd
 import pytest
 from unittest.mock import MagicMock, patch
 
@@ -25,9 +27,46 @@ def test_generate_file_names():
         "flie3.csv",
         "file4.txt",
     ]
+    functions.directory_index.clear()
     with patch("os.listdir", return_value=test_data):
         output = functions.generate_file_names("file", "csv")
         assert output == ["file1.csv", "file2.csv"]
+    functions.directory_index.clear()
+
+def test_directory_index(tmp_path, mocker):
+    """The directory is only listed again once it has changed"""
+    for name in ["EGLL_0.csv", "EGLL_1.csv", "EGKK_0.csv", "ENR-3.2_1.csv", "ENR-3.3_0.csv",
+                 "ENR-3.2-UPPER-L9.txt"]:
+        (tmp_path / name).touch()
+    index = functions.DirectoryIndex()
+    index.racy_ns = 0
+    listdir = mocker.spy(os, "listdir")
+    assert sorted(index.files(str(tmp_path), "EGLL", "csv")) == ["EGLL_0.csv", "EGLL_1.csv"]
+    assert sorted(index.files(str(tmp_path), "ENR-3", "csv")) == [
+        "ENR-3.2_1.csv", "ENR-3.3_0.csv"]
+    assert index.files(str(tmp_path), "EGLL_1") == ["EGLL_1.csv"]
+    assert not index.files(str(tmp_path), "EGPH")
+    assert listdir.call_count == 1
+
+    (tmp_path / "EGPH_0.csv").touch()
+    # Make sure the change doesn't land in the same timestamp tick as the listing
+    os.utime(tmp_path, ns=(1, 1))
+    assert index.files(str(tmp_path), "EGPH") == ["EGPH_0.csv"]
+    assert listdir.call_count == 2
+
+def test_section_selected():
+    """section_selected and section_items"""
+    assert functions.section_selected("ENR-3.2")
+    assert functions.section_selected("ENR-3.2", ["ENR-3"])
+    assert functions.section_selected("ENR-3", ["ENR-3.2"])
+    assert functions.section_selected("AD-2", ["ENR-4.1", "AD-2.EGLL"])
+    assert functions.section_selected("ENR-5.1", ["ENR"])
+    assert not functions.section_selected("ENR-3.3", ["ENR-3.2"])
+    assert not functions.section_selected("AD-2", ["ENR-3"])
+
+    assert functions.section_items("AD-2") is None
+    assert functions.section_items("AD-2", ["AD-2.EGLL", "ENR-3", "AD-2.EGKK"]) == ["EGLL", "EGKK"]
+    assert functions.section_items("AD-2", ["AD-2.EGLL", "AD"]) is None
 
 def test_north_south():
     """north_south"""
@@ -155,6 +194,58 @@ def test_dms2dd():
     with pytest.raises(ValueError):
         Geo.dms2dd("A", "B")
 
+def test_dd2dms_array():
+    """dd2dms_array gives the same strings as dd2dms for any coordinates"""
+    rng = np.random.default_rng(2024)
+    lat = np.concatenate([rng.uniform(-90, 90, 5000), [0.0, -0.5, 51.5, 89.9999999],
+                          # Seconds which land on or next to a rounding tie
+                          np.arange(0, 1, 0.005) / 3600 + 51])
+    lon = np.concatenate([rng.uniform(-180, 180, 5000), [0.0, 0.5, -1.25, -179.9999999],
+                          -np.arange(0, 1, 0.005) / 3600 - 1])
+    assert list(Geo.dd2dms_array(lat, lon)) == [
+        Geo.dd2dms(float(y), float(x)) for y, x in zip(lat, lon)]
+    assert list(Geo.dd2dms_array(pd.Series([51.77592]), pd.Series([1.86495]))) == [
+        "N051.46.33.31 E001.51.53.82"]
+    with pytest.raises(ValueError):
+        Geo.dd2dms_array([1.7, 2.0], [2.7])
+    with pytest.raises(ValueError):
+        Geo.dd2dms_array(["A"], [2.7])
+    with pytest.raises(ValueError):
+        Geo.dd2dms_array([float("nan")], [2.7])
+
+def test_dms2dd_array():
+    """dms2dd_array gives the same values as dms2dd in any of the formats"""
+    rng = np.random.default_rng(2025)
+    lat, lon = [], []
+    for _ in range(2000):
+        degrees = rng.integers(0, 90, 2)
+        minutes = rng.integers(0, 60, 2)
+        seconds = rng.integers(0, 6000, 2) / 100
+        n_or_s = rng.choice(["N", "S"])
+        e_or_w = rng.choice(["E", "W"])
+        style = rng.integers(0, 4)
+        if style == 0:
+            lat.append(f"{n_or_s}{degrees[0]:03d}.{minutes[0]:02d}.{seconds[0]:05.2f}")
+            lon.append(f"{e_or_w}{degrees[1]:03d}.{minutes[1]:02d}.{seconds[1]:05.2f}")
+        elif style == 1:
+            lat.append(f"{degrees[0]:03d}.{minutes[0]:02d}.{seconds[0]:.0f}{n_or_s}")
+            lon.append(f"{degrees[1]:03d}.{minutes[1]:02d}.{seconds[1]:.1f}{e_or_w}")
+        elif style == 2:
+            lat.append(f"{degrees[0]:02d}{minutes[0]:02d}{int(seconds[0]):02d}{n_or_s}")
+            lon.append(f"{degrees[1]:03d}{minutes[1]:02d}{int(seconds[1]):02d}{e_or_w}")
+        else:
+            lat.append(f"{degrees[0]:02d}{minutes[0]:02d}{seconds[0]:05.2f}{n_or_s}")
+            lon.append(f"{degrees[1]:03d}{minutes[1]:02d}{seconds[1]:05.2f}{e_or_w}")
+    converted = Geo.dms2dd_array(pd.Series(lat), lon)
+    expected = [Geo.dms2dd(y, x) for y, x in zip(lat, lon)]
+    assert list(converted["lat"]) == [point["lat"] for point in expected]
+    assert list(converted["lon"]) == [point["lon"] for point in expected]
+
+    with pytest.raises(ValueError):
+        Geo.dms2dd_array(["N051.46.33.31", "051.46.33.31"], ["E001.51.53.82"] * 2)
+    with pytest.raises(ValueError):
+        Geo.dms2dd_array(["N051.46.33.31"], ["E001"])
+
 def test_git_init():
     """GitActions()"""
     # Test default settings
@@ -292,10 +383,10 @@ class TestPull:
 
         assert result is False
 
-    def test_repo_not_exists(self):
+    def test_repo_not_exists(self, monkeypatch):
         """Mock os.path.exists to return False"""
         with pytest.raises(FileNotFoundError):
-            os.path.exists = lambda _: False
+            monkeypatch.setattr(os.path, "exists", lambda _: False)
 
             your_class_instance = GitActions()
 
@@ -328,3 +419,13 @@ class TestTacanVor:
         test_tacan = TacanVor()
         for tacan, vor in test_cases:
             assert test_tacan.tacan_to_vor_ils(tacan) == vor
+
+    def test_channels_to_vor_ils(self):
+        """channels_to_vor_ils"""
+        test_tacan = TacanVor()
+        channels = pd.Series(["37X", "044Y", None, "126Y"])
+        assert test_tacan.channels_to_vor_ils(channels).tolist()[:2] == ["110.00", "110.75"]
+        assert test_tacan.channels_to_vor_ils(channels).isna().tolist() == [
+            False, False, True, False]
+        with pytest.raises(ValueError):
+            test_tacan.channels_to_vor_ils(pd.Series(["37X", "60X"]))
@@ -0,0 +1,66 @@
+"""
+eAIP Parser
+Chris Parkinson (@chssn)
+"""
+
+#!/usr/bin/env python3.9
+
+# Standard Libraries
+import os
+
+# Third Party Libraries
+import numpy as np
+import pandas as pd
+import pytest
+from geographiclib.geodesic import Geodesic
+
+# Local Libraries
+from eaip_parser import cli, geodesy
+from eaip_parser.geodesy import SegmentValidator
+from eaip_parser.synthetic import SyntheticAip, SyntheticServer, SyntheticSettings
+from eaip_parser.webscrape import Webscrape
+
+test_data = os.path.join(os.path.dirname(__file__), "test_data")
+
+def test_inverse():
+    """The vectorised inverse matches geographiclib, including where it falls back to it"""
+    rng = np.random.default_rng(44)
+    lat1, lat2 = rng.uniform(-89, 89, (2, 500))
+    lon1, lon2 = rng.uniform(-180, 180, (2, 500))
+    # Coincident, meridional and nearly antipodal points
+    lat1[:3], lon1[:3] = [51, 0, 0.5], [-1, 0, 0]
+    lat2[:3], lon2[:3] = [51, 60, -0.5], [-1, 0, 179.7]
+    distance, azimuth_1, azimuth_2 = geodesy.inverse(lat1, lon1, lat2, lon2)
+    for idx in range(len(lat1)):
+        expected = Geodesic.WGS84.Inverse(lat1[idx], lon1[idx], lat2[idx], lon2[idx])
+        assert distance[idx] == pytest.approx(expected["s12"], abs=1e-3)
+        if expected["s12"]:
+            assert azimuth_1[idx] == pytest.approx(expected["azi1"], abs=1e-6)
+            assert azimuth_2[idx] == pytest.approx(expected["azi2"], abs=1e-6)
+
+def test_segments():
+    """Each segment joins the points either side of it"""
+    table = pd.read_csv(os.path.join(test_data, "ENR-3.2_5.csv"), dtype=str)
+    validator = SegmentValidator()
+    segments = validator.check(validator.segments(table, "L10"))
+    assert list(segments[["from", "to", "track", "reverse_track", "distance"]].iloc[1]) == [
+        "SANDY", "BIGGIN  DME  (  BIG  )", 292, 111, 42.1]
+    assert not segments["flagged"].any()
+
+    table.loc[table["distance"] == "42.1 NM", "distance"] = "24.1 NM"
+    table.loc[(table["coordinates_bearing"] == "- 134°").idxmax(), "coordinates_bearing"] = (
+        "- 143°")
+    flagged = validator.check(validator.segments(table, "L10"))
+    assert list(flagged.index[flagged["flagged"]]) == [1, 2]
+
+def test_validate(data_dir, tmp_path):
+    """Every scraped airway segment matches its coordinates"""
+    aip = SyntheticAip(SyntheticSettings(
+        aerodromes=1, routes=20, navaids=5, fixes=50, airspace=1, areas=1))
+    with SyntheticServer(aip) as server:
+        Webscrape(base_url=server.base_url).run(no_build=True, only=["ENR-3"])
+    report = tmp_path / "segments.csv"
+    cli.main(["validate", "--report", str(report)])
+    segments = pd.read_csv(report)
+    assert len(segments) > 100
+    assert not segments["flagged"].any()
@@ -0,0 +1,59 @@
+"""
+eAIP Parser
+Chris Parkinson (@chssn)
+"""
+
+#!/usr/bin/env python3.9
+
+# Standard Libraries
+import os
+from typing import Optional
+
+# Third Party Libraries
+import pandas as pd
+import pytest
+
+# Local Libraries
+from eaip_parser import lists
+
+test_data = os.path.join(os.path.dirname(__file__), "test_data")
+
+def groups(match) -> Optional[list]:
+    """The groups of a match in the same form as a row of an extract"""
+    if not match:
+        return None
+    return list(match.groups())
+
+def extracted(dataframe:pd.DataFrame) -> list:
+    """The rows of an extract with NaN as None"""
+    rows = dataframe.astype(object).where(dataframe.notna(), None).values.tolist()
+    return [None if all(value is None for value in row) else row for row in rows]
+
+@pytest.mark.parametrize("method, column, kwargs", [
+    ("coordinates", "coordinates", {}),
+    ("coordinates", "coordinates", {"anchor": False}),
+    ("frequency", "frequency", {}),
+    ("tacan_channel", "frequency", {}),
+    ("vor_dme_ndb", "name", {}),
+])
+def test_extract(method, column, kwargs):
+    """The series variants match the same groups as the single value methods"""
+    series = pd.read_csv(os.path.join(test_data, "ENR-4.1.csv"))[column]
+    single = [groups(getattr(lists.Regex, method)(value, **kwargs)) for value in series]
+    batch = extracted(getattr(lists.Regex, f"extract_{method}")(series, **kwargs))
+    assert batch == single
+    assert any(single)
+
+def test_extract_values():
+    """Anchored frequencies, vertical limits and flight levels"""
+    assert extracted(lists.Regex.extract_frequency(
+        pd.Series(["118.505", "118.505 MHz"]), anchor=True)) == [["118.505"], None]
+    series = pd.Series([
+        "Upper limit: FL 245  Lower limit: FL 105",
+        "FL 195",
+        float("nan"),
+        ])
+    assert extracted(lists.Regex.extract_vertical_limits(series)) == [
+        ["FL 245", "FL 105"], None, None]
+    assert list(lists.Regex.extract_flight_levels(series)) == [
+        ["FL 245", "FL 105"], ["FL 195"], []]
@@ -0,0 +1,91 @@
+"""
+eAIP Parser
+Chris Parkinson (@chssn)
+"""
+
+#!/usr/bin/env python3.9
+
+# Standard Libraries
+import io
+
+# Third Party Libraries
+import pandas as pd
+import pytest
+
+# Local Libraries
+from eaip_parser import lxml_tables
+from eaip_parser.synthetic import SyntheticAip, SyntheticSettings
+from eaip_parser.webscrape import Webscrape
+
+pages = [
+    "<table><tr><th>A</th><th>B</th></tr><tr><td>1<br>2</td><td rowspan=2>x</td></tr>"
+    "<tr><td>3,000</td></tr></table>",
+    "<table><thead><tr><th colspan=2>Top</th></tr><tr><th>a</th><th>b</th></tr></thead>"
+    "<tbody><tr><td>1</td><td>2.5</td></tr><tr><td></td><td>N/A</td></tr></tbody>"
+    "<tfoot><tr><td>f</td><td>g</td></tr></tfoot></table>",
+    "<p>x</p><table style='display: none'><tr><td>hidden</td></tr></table>"
+    "<table><tr><td>a  b\n c</td><td><span style='display:none'>z</span>y</td></tr></table>",
+    "<table><tr><td>Route Designator</td><td>q</td></tr><tr><td>ragged</td></tr></table>"
+    "<table></table>",
+]
+
+def assert_same(page:str, match:str) -> None:
+    """Both backends return the same tables"""
+    expected = pd.read_html(io.StringIO(page), flavor="bs4", match=match)
+    tables = lxml_tables.read_tables(page, match)
+    assert len(tables) == len(expected)
+    for table, expected_table in zip(tables, expected):
+        pd.testing.assert_frame_equal(table, expected_table)
+
+@pytest.mark.parametrize("page", pages)
+def test_read_tables(page):
+    """read_tables matches pd.read_html"""
+    assert_same(page, ".+")
+
+def test_match():
+    """Only tables containing the match are returned"""
+    assert_same(pages[3], "Route Designator")
+    with pytest.raises(ValueError):
+        lxml_tables.read_tables(pages[0], "Route Designator")
+
+def test_route_tables():
+    """A synthetic ENR 3.2 page is read the same by both backends"""
+    aip = SyntheticAip(SyntheticSettings(routes=10, navaids=5, fixes=40))
+    assert_same(aip.page(aip.file_name("ENR-3.2")), "Route Designator")
+
+def test_html_backend(mocker):
+    """The route pages use lxml unless bs4 is selected"""
+    mocker.patch("eaip_parser.airac.Airac.url", return_value="https://example.com/")
+    read = mocker.patch.object(lxml_tables, "read_tables", return_value=[])
+    Webscrape().read_tables("ENR-3.2", pages[3], "Route Designator")
+    assert read.called
+    read.reset_mock()
+    Webscrape(html_backend="bs4").read_tables("ENR-3.2", pages[3], "Route Designator")
+    Webscrape().read_tables("ENR-4.1", pages[3])
+    assert not read.called
+    with pytest.raises(ValueError):
+        Webscrape(html_backend="html5lib")
+
+def test_locate_tables():
+    """Tables are found by their header, whatever else is added to the page"""
+    aip = SyntheticAip(SyntheticSettings(airspace=10, aerodromes=3))
+    page = aip.page(aip.file_name("ENR-2.2"))
+    locators = [
+        lxml_tables.TableLocator("Unit providing service"),
+        lxml_tables.TableLocator("^Lateral limits"),
+        lxml_tables.TableLocator("^Lateral limits", occurrence=1),
+    ]
+    expected = pd.read_html(io.StringIO(page), flavor="bs4")
+    for tables in [lxml_tables.locate_tables(page, locators),
+                   lxml_tables.locate_frames(expected, locators)]:
+        for table, index in zip(tables, [0, 26, 27]):
+            pd.testing.assert_frame_equal(table, expected[index])
+
+    # A new table at the top of the page doesn't shift anything
+    inserted = page.replace("<body>", "<body><table><tr><th>New</th></tr><tr><td>1</td></tr>"
+                            "</table>")
+    tables = lxml_tables.locate_tables(inserted, locators)
+    pd.testing.assert_frame_equal(tables[1], expected[26])
+
+    with pytest.raises(ValueError, match="Lateral limits \\(2\\)"):
+        lxml_tables.locate_tables(page, [lxml_tables.TableLocator("^Lateral limits", 2)])
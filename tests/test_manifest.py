@@ -0,0 +1,82 @@
+"""
+eAIP Parser
+Chris Parkinson (@chssn)
+"""
+
+#!/usr/bin/env python3.9
+
+# Standard Libraries
+import os
+
+# Local Libraries
+from eaip_parser import builder, metrics
+from eaip_parser.builder import BuildSettings
+from eaip_parser.manifest import Manifest
+from eaip_parser.synthetic import SyntheticAip, SyntheticServer, SyntheticSettings
+from eaip_parser.webscrape import Webscrape
+
+small = SyntheticSettings(aerodromes=3, routes=3, navaids=5, fixes=20, airspace=2, areas=2)
+
+def test_digest(data_dir):
+    """digest changes with file content and settings"""
+    file_path = data_dir / "ENR-4.1.csv"
+    file_path.write_text("a,b\n1,2\n", encoding="utf-8")
+    digest = Manifest.digest([str(file_path)], BuildSettings())
+    assert digest == Manifest.digest([str(file_path)], BuildSettings())
+    assert digest != Manifest.digest([str(file_path)], BuildSettings(wpt=False))
+    file_path.write_text("a,b\n1,3\n", encoding="utf-8")
+    assert digest != Manifest.digest([str(file_path)], BuildSettings())
+
+def test_stage(data_dir):
+    """stage only reruns when its inputs change and removes its stale outputs"""
+    calls = []
+
+    def func():
+        calls.append(1)
+        (data_dir / "VOR_UK.txt").write_text("output", encoding="utf-8")
+
+    (data_dir / "ENR-4.1.csv").write_text("a,b\n1,2\n", encoding="utf-8")
+    (data_dir / "FIXES_UK.txt").write_text("stale", encoding="utf-8")
+    manifest = Manifest()
+    stage = manifest.stage("process ENR-4", func, ["ENR-4.*.csv"], {"no_build": True},
+                           ["VOR_UK.txt", "FIXES_UK.txt"])
+    stage()
+    stage()
+    assert len(calls) == 1
+    assert not (data_dir / "FIXES_UK.txt").exists()
+
+    # A new manifest picks up the saved hashes
+    Manifest().stage("process ENR-4", func, ["ENR-4.*.csv"], {"no_build": True})()
+    assert len(calls) == 1
+    Manifest(skip_unchanged=False).stage("process ENR-4", func, ["ENR-4.*.csv"],
+                                         {"no_build": True})()
+    assert len(calls) == 2
+    (data_dir / "ENR-4.4.csv").write_text("a,b\n1,2\n", encoding="utf-8")
+    stage()
+    assert len(calls) == 3
+
+def test_incremental_run(data_dir, monkeypatch):
+    """Only the aerodrome whose page changed is rebuilt"""
+    aip = SyntheticAip(small)
+    changed = aip.aerodromes[0][1]
+    with SyntheticServer(aip) as server:
+        Webscrape(base_url=server.base_url).run(no_build=True)
+        builder.BuildAirports(no_build=True).run()
+
+        page = aip.page
+        monkeypatch.setattr(aip, "page", lambda file_name: page(file_name).replace(
+            "Direction and distance from city</td><td>", "Direction and distance from city</td>"
+            "<td>CHANGED ") if changed in file_name else page(file_name))
+        built = []
+        create_dirs = builder.BuildAirports.create_dirs
+        monkeypatch.setattr(builder.BuildAirports, "create_dirs",
+                            staticmethod(lambda icao: built.append(icao) or create_dirs(icao)))
+        Webscrape(base_url=server.base_url).run(no_build=True, incremental=True)
+        # Only the aerodrome data changed
+        for section in ["ENR-2", "ENR-3", "ENR-4", "ENR-5"]:
+            assert metrics.collector.get("cache", f"process {section}").cache_hits == 1
+        assert metrics.collector.get("cache", "process AD-2").cache_hits == 0
+        builder.BuildAirports(no_build=True).run()
+
+    assert built == [changed]
+    assert "VOR_UK.txt" in os.listdir(data_dir)
@@ -0,0 +1,100 @@
+"""
+eAIP Parser
+Chris Parkinson (@chssn)
+"""
+
+#!/usr/bin/env python3.9
+
+# Standard Libraries
+import json
+import threading
+
+# Third Party Libraries
+import pytest
+
+# Local Libraries
+from eaip_parser.metrics import Metrics
+
+
+def test_stage_counters():
+    """stage and count"""
+    test_metrics = Metrics()
+    with test_metrics.stage("scrape"):
+        with test_metrics.stage("scrape", "ENR-4.1"):
+            test_metrics.count("rows", 10)
+            test_metrics.count("http_requests")
+            test_metrics.count("bytes_downloaded", 2048)
+        with test_metrics.stage("scrape", "ENR-4.4"):
+            test_metrics.count("rows", 5)
+    # Counting outside of a stage is ignored
+    test_metrics.count("rows", 100)
+
+    assert test_metrics.get("scrape").rows == 15
+    assert test_metrics.get("scrape").calls == 1
+    assert test_metrics.get("scrape", "ENR-4.1").rows == 10
+    assert test_metrics.get("scrape", "ENR-4.1").bytes_downloaded == 2048
+    assert test_metrics.get("scrape", "ENR-4.4").http_requests == 0
+    assert test_metrics.get("scrape").wall_time >= test_metrics.get("scrape", "ENR-4.1").wall_time
+
+    with pytest.raises(ValueError):
+        test_metrics.count("widgets")
+
+def test_stage_threads():
+    """count is attributed to the stage on the calling thread"""
+    test_metrics = Metrics()
+
+    def worker(section:str) -> None:
+        with test_metrics.stage("process", section):
+            for _ in range(100):
+                test_metrics.count("rows")
+
+    threads = [threading.Thread(target=worker, args=(f"ENR-{idx}",)) for idx in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert [test_metrics.get("process", f"ENR-{idx}").rows for idx in range(4)] == [100] * 4
+
+def test_bind():
+    """count on a bound worker thread is also attributed to the stages it was bound to"""
+    test_metrics = Metrics()
+
+    def worker(section:str) -> None:
+        with test_metrics.stage("process", section):
+            test_metrics.count("rows", 10)
+        test_metrics.count("http_requests")
+
+    with test_metrics.stage("run"):
+        threads = [threading.Thread(target=test_metrics.bind(worker), args=(f"ENR-{idx}",))
+                   for idx in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert test_metrics.get("run").rows == 40
+    assert test_metrics.get("run").http_requests == 4
+    assert test_metrics.get("process", "ENR-0").rows == 10
+    assert test_metrics.get("process", "ENR-0").http_requests == 0
+
+def test_export(tmp_path):
+    """write_json and write_prometheus"""
+    test_metrics = Metrics()
+    with test_metrics.stage("build", "AD-2"):
+        test_metrics.count("cache_hits", 3)
+
+    json_path = tmp_path / "metrics.json"
+    test_metrics.write_json(str(json_path))
+    loaded = json.loads(json_path.read_text(encoding="utf-8"))
+    assert loaded["stages"][0]["stage"] == "build"
+    assert loaded["stages"][0]["cache_hits"] == 3
+
+    prom_path = tmp_path / "metrics.prom"
+    test_metrics.write_prometheus(str(prom_path))
+    prom = prom_path.read_text(encoding="utf-8")
+    assert "# TYPE eaip_parser_stage_cache_hits_total counter" in prom
+    assert 'eaip_parser_stage_cache_hits_total{stage="build",section="AD-2"} 3' in prom
+
+    test_metrics.reset()
+    assert test_metrics.to_dict() == {"stages": []}
@@ -0,0 +1,91 @@
+"""
+eAIP Parser
+Chris Parkinson (@chssn)
+"""
+
+#!/usr/bin/env python3.9
+
+# Standard Libraries
+import threading
+import time
+
+# Third Party Libraries
+import pytest
+
+# Local Libraries
+from eaip_parser.pipeline import Pipeline, Task
+from eaip_parser.webscrape import Webscrape
+
+
+def test_order():
+    """order"""
+    pipe = Pipeline([
+        Task("build", lambda: None, ["processed"], ["output"]),
+        Task("process", lambda: None, ["scraped", "index"], ["processed"]),
+        Task("scrape", lambda: None, ["index"], ["scraped"]),
+        Task("index", lambda: None, ["already on disk"], ["index"]),
+    ])
+    assert pipe.order() == ["index", "scrape", "process", "build"]
+    assert pipe.dependencies("process") == {"index", "scrape"}
+
+def test_invalid():
+    """Duplicate tasks, duplicate outputs and cycles are rejected"""
+    pipe = Pipeline([Task("a", lambda: None, ["y"], ["x"])])
+    with pytest.raises(ValueError):
+        pipe.add(Task("a", lambda: None))
+    with pytest.raises(ValueError):
+        pipe.add(Task("b", lambda: None, [], ["x"]))
+    pipe.add(Task("c", lambda: None, ["x"], ["y"]))
+    with pytest.raises(ValueError):
+        pipe.order()
+
+def test_run_concurrently():
+    """Independent branches run at the same time and dependencies are respected"""
+    finished = []
+    lock = threading.Lock()
+
+    def work(name:str, seconds:float):
+        def func():
+            time.sleep(seconds)
+            with lock:
+                finished.append(name)
+        return func
+
+    pipe = Pipeline([
+        Task("slow", work("slow", 0.3), [], ["slow"]),
+        Task("fast_1", work("fast_1", 0.1), [], ["fast_1"]),
+        Task("fast_2", work("fast_2", 0.1), ["fast_1"], ["fast_2"]),
+        Task("last", work("last", 0.0), ["slow", "fast_2"], ["last"]),
+    ])
+    start = time.perf_counter()
+    pipe.run(workers=4)
+    assert time.perf_counter() - start < 0.45
+    assert finished.index("fast_1") < finished.index("fast_2")
+    assert finished[-1] == "last"
+    assert pipe.critical_path() == ["slow", "last"]
+
+def test_run_failure():
+    """A failing task stops its dependants and the error is raised"""
+    ran = []
+
+    def fail():
+        raise RuntimeError("broken")
+
+    pipe = Pipeline([
+        Task("fail", fail, [], ["a"]),
+        Task("after", lambda: ran.append("after"), ["a"], ["b"]),
+    ])
+    with pytest.raises(RuntimeError):
+        pipe.run()
+    assert not ran
+
+def test_webscrape_pipeline():
+    """The webscrape tasks are wired together by their data"""
+    scrape = Webscrape()
+    pipe = scrape.pipeline()
+    assert pipe.dependencies("process AD-2") == {"scrape AD-2"}
+    assert pipe.dependencies("process ENR-3") == {"scrape ENR-3.2", "scrape ENR-3.3"}
+    assert not pipe.dependencies("scrape ENR-5.1")
+
+    pipe = scrape.pipeline(only=["ENR-4.4"], download_first=False)
+    assert list(pipe.tasks) == ["process ENR-4"]
@@ -0,0 +1,99 @@
+"""
+eAIP Parser
+Chris Parkinson (@chssn)
+"""
+
+#!/usr/bin/env python3.9
+
+# Standard Libraries
+import os
+
+# Third Party Libraries
+import pytest
+
+# Local Libraries
+from eaip_parser import cli, functions, staging
+from eaip_parser.staging import StagedOutput
+from eaip_parser.synthetic import SyntheticAip, SyntheticServer, SyntheticSettings
+from eaip_parser.webscrape import Webscrape
+
+@pytest.fixture
+def live_dir(data_dir):
+    """A live DataFrames directory with a previous run's output in it"""
+    (data_dir / "VOR_UK.txt").write_text("first", encoding="utf-8")
+    return data_dir
+
+def write(file_name:str, text:str) -> None:
+    """Write a file to the DataFrames directory"""
+    file_path = os.path.join(functions.work_dir, "DataFrames", file_name)
+    functions.unshare(file_path)
+    with open(file_path, "w", encoding="utf-8") as file:
+        file.write(text)
+
+def test_publish(live_dir):
+    """Staged output replaces the live directory only once it's complete"""
+    with StagedOutput():
+        write("VOR_UK.txt", "second")
+        # Anything reading the live directory still sees the previous output
+        assert (live_dir / "VOR_UK.txt").read_text(encoding="utf-8") == "first"
+        with StagedOutput():
+            write("NDB_UK.txt", "second")
+    assert (live_dir / "VOR_UK.txt").read_text(encoding="utf-8") == "second"
+    assert (live_dir / "NDB_UK.txt").exists()
+    assert not os.path.exists(staging.paths()[1])
+
+    with StagedOutput(copy=False):
+        write("NDB_UK.txt", "third")
+    assert os.listdir(live_dir) == ["NDB_UK.txt"]
+    # Only the live and previous generations are kept
+    assert len(staging.generations()) == 2
+
+    staging.rollback()
+    assert (live_dir / "VOR_UK.txt").read_text(encoding="utf-8") == "second"
+    with pytest.raises(ValueError):
+        staging.rollback()
+
+def test_linked(data_dir):
+    """The staged output links the live files and a staged write leaves the live file alone"""
+    aip = SyntheticAip(SyntheticSettings(
+        aerodromes=2, routes=2, navaids=3, fixes=5, airspace=1, areas=2))
+    with SyntheticServer(aip) as server:
+        scrape = Webscrape(base_url=server.base_url)
+        scrape.run(no_build=True)
+        first = staging.current()
+        stamps = {name: os.stat(os.path.join(first, name)).st_mtime_ns
+                  for name in os.listdir(first)}
+        with StagedOutput():
+            staged = os.path.join(functions.work_dir, "DataFrames", "VOR_UK.txt")
+            assert os.path.samefile(staged, data_dir / "VOR_UK.txt")
+            scrape.run(no_build=True, clean_start=False)
+    # Nothing in the previous generation was rewritten in place
+    assert {name: os.stat(os.path.join(first, name)).st_mtime_ns
+            for name in os.listdir(first)} == stamps
+
+def test_failed_run(live_dir):
+    """A failed run doesn't touch the live directory and can be resumed"""
+    with pytest.raises(RuntimeError):
+        with StagedOutput():
+            write("NDB_UK.txt", "partial")
+            raise RuntimeError("the eAIP went away")
+    assert os.listdir(live_dir) == ["VOR_UK.txt"]
+    assert functions.work_dir == str(live_dir.parent)
+
+    with StagedOutput(resume=True):
+        write("VOR_UK.txt", "resumed")
+    assert sorted(os.listdir(live_dir)) == ["NDB_UK.txt", "VOR_UK.txt"]
+
+def test_run_rollback(live_dir, capsys):
+    """A full run is published as a new generation which can be rolled back"""
+    aip = SyntheticAip(SyntheticSettings(
+        aerodromes=1, routes=2, navaids=3, fixes=5, airspace=1, areas=1))
+    with SyntheticServer(aip) as server:
+        Webscrape(base_url=server.base_url).run(no_build=True, only=["ENR-4"])
+    assert "VOR_UK.txt" in os.listdir(live_dir)
+    assert (live_dir / "VOR_UK.txt").read_text(encoding="utf-8") != "first"
+
+    cli.main(["rollback"])
+    assert capsys.readouterr().out.strip() == staging.current()
+    assert os.listdir(live_dir) == ["VOR_UK.txt"]
+    assert (live_dir / "VOR_UK.txt").read_text(encoding="utf-8") == "first"
@@ -0,0 +1,78 @@
+"""
+eAIP Parser
+Chris Parkinson (@chssn)
+"""
+
+#!/usr/bin/env python3.9
+
+# Standard Libraries
+import os
+import threading
+
+# Third Party Libraries
+import pytest
+
+# Local Libraries
+from eaip_parser import functions
+from eaip_parser.streaming import StreamProcessor, TableStream
+from eaip_parser.synthetic import SyntheticAip, SyntheticServer, SyntheticSettings
+from eaip_parser.webscrape import Webscrape
+
+small = SyntheticSettings(aerodromes=3, routes=4, navaids=5, fixes=20, airspace=2, areas=3)
+
+def test_backpressure():
+    """put blocks while the stream is full"""
+    stream = TableStream(maxsize=2)
+    stream.put("ENR-4.1", "ENR-4.1")
+    stream.put("ENR-4.4", "ENR-4.4")
+    producer = threading.Thread(target=stream.put, args=("ENR-5.1", "ENR-5.1"))
+    producer.start()
+    producer.join(timeout=0.1)
+    assert producer.is_alive()
+
+    received = []
+    consumer = threading.Thread(target=lambda: received.extend(name for _, name in stream))
+    consumer.start()
+    producer.join()
+    stream.close(1)
+    consumer.join()
+    assert received == ["ENR-4.1", "ENR-4.4", "ENR-5.1"]
+
+def test_consumer_error():
+    """A failing table doesn't block the scrapers and the error is raised at the end"""
+
+    class Broken:
+        """Processor which always fails"""
+        def process_enr_5_table(self, name, no_build):
+            raise RuntimeError(name)
+
+    stream = TableStream(maxsize=1)
+    consumer = StreamProcessor(Broken(), None)
+    thread = threading.Thread(target=consumer.consume, args=(stream,))
+    thread.start()
+    for section in ["ENR-5.1", "ENR-5.2", "ENR-5.3"]:
+        stream.put(section, section)
+    stream.close(1)
+    thread.join()
+    with pytest.raises(RuntimeError):
+        consumer.finish(only=["ENR-5"])
+
+def run(work_dir, monkeypatch, **kwargs) -> dict:
+    """Run the synthetic pipeline and return the contents of every output"""
+    monkeypatch.setattr(functions, "work_dir", str(work_dir))
+    aip = SyntheticAip(small)
+    with SyntheticServer(aip) as server:
+        Webscrape(base_url=server.base_url).run(no_build=True, **kwargs)
+    output = {}
+    data_dir = work_dir / "DataFrames"
+    for file in os.listdir(data_dir):
+        if file not in ["metrics.json", "manifest.json", "checkpoint.json"]:
+            output[file] = (data_dir / file).read_bytes()
+    return output
+
+def test_streaming_run(tmp_path, monkeypatch):
+    """A streaming run produces exactly the same output as a normal run"""
+    normal = run(tmp_path / "normal", monkeypatch)
+    streamed = run(tmp_path / "streamed", monkeypatch, streaming=True)
+    assert "AA - RUNWAYS.csv" in streamed
+    assert streamed == normal
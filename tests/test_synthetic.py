@@ -0,0 +1,72 @@
+"""
+eAIP Parser
+Chris Parkinson (@chssn)
+"""
+
+#!/usr/bin/env python3.9
+
+# Standard Libraries
+import os
+
+# Third Party Libraries
+import requests
+
+# Local Libraries
+from eaip_parser import builder
+from eaip_parser.synthetic import SyntheticAip, SyntheticServer, SyntheticSettings, dms
+from eaip_parser.webscrape import Webscrape
+
+small = SyntheticSettings(aerodromes=3, routes=9, navaids=10, fixes=50, airspace=5, areas=6)
+
+def test_scaled():
+    """SyntheticSettings.scaled"""
+    scaled = small.scaled(10)
+    assert scaled.aerodromes == 30
+    assert scaled.routes == 90
+    assert scaled.fixes == 500
+    assert scaled.points_per_route == small.points_per_route
+    assert scaled.seed == small.seed
+
+def test_dms():
+    """dms"""
+    assert dms(51.775925, True) == "514633.33N"
+    assert dms(-1.864950, False) == "0015153.82W"
+    assert dms(-1.864950, False, False) == "0015153W"
+
+def test_pages_are_stable():
+    """page"""
+    aip_a = SyntheticAip(small)
+    aip_b = SyntheticAip(small)
+    file_name = aip_a.file_name("ENR-3.2")
+    # Requesting pages in a different order must not change their content
+    aip_b.page(aip_b.file_name("ENR-4.4"))
+    assert aip_a.page(file_name) == aip_b.page(file_name)
+    assert aip_a.page("EG-GEN-0.1-en-GB.html") is None
+
+def test_server():
+    """SyntheticServer"""
+    aip = SyntheticAip(small)
+    with SyntheticServer(aip) as server:
+        response = requests.get(f"{server.base_url}{aip.file_name('AD-1.3')}", timeout=5)
+        assert response.status_code == 200
+        response = requests.get(f"{server.base_url}EG-GEN-0.1-en-GB.html", timeout=5)
+        assert response.status_code == 404
+
+def test_pipeline(data_dir):
+    """Run the full pipeline against the synthetic eAIP"""
+    aip = SyntheticAip(small)
+    with SyntheticServer(aip) as server:
+        scrape = Webscrape(base_url=server.base_url)
+        assert scrape.cycle_url.startswith(server.base_url)
+        scrape.run(no_build=True)
+        builder.BuildAirports(no_build=True).run()
+
+    files = os.listdir(data_dir)
+    assert len([file for file in files if file.startswith("ENR-3.2_")]) == small.routes
+    assert len([file for file in files if file.startswith("ENR-5.1-")]) == small.areas
+    for file in ["VOR_UK.txt", "FIXES_UK.txt", "ENR-2.1_0_AIRSPACE.sct", "AA - RUNWAYS.csv"]:
+        assert file in files
+    with open(data_dir / "FIXES_UK.txt", "r", encoding="utf-8") as file:
+        assert len(file.readlines()) == small.fixes
+    airports = os.listdir(data_dir / "Output" / "Airports")
+    assert sorted(airports) == sorted(icao for _, icao in aip.aerodromes)
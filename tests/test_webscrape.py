@@ -90,7 +90,9 @@ class TestWebscrape:
                 with pytest.raises(ValueError, match=error):
                     Webscrape(date_in=date)
 
-    def test_run(self):
+    def test_run(self, tmp_path, monkeypatch):
+        # The run is staged and published in a temporary directory, not the package
+        monkeypatch.setattr(functions, "work_dir", str(tmp_path))
         obj = Webscrape()
 
         # Mock the parse and process methods
@@ -190,33 +192,34 @@ class TestWebscrape:
                 pd.DataFrame({"Column1": [1, 2], "Column2": [3, 4]}),
                 pd.DataFrame({"Column3": [5, 6], "Column4": [7, 8]})
                 ]
-            with patch("pandas.read_html", return_value=mock_tables) as mock_read_html:
+            with patch("pandas.read_html", return_value=mock_tables) as mock_read_html, \
+                    patch.object(self.obj, "fetch", return_value="<table/>") as mock_fetch:
                 # Call the get_table() method
                 result = self.obj.get_table(section="AD-0.0", match=".+")
 
-                # Check if pd.read_html was called with the correct arguments
-                mock_read_html.assert_called_once_with(
-                    self.obj.cycle_url + self.obj.url_suffix(section="AD-0.0"),
-                    flavor="bs4",
-                    match=".+"
-                    )
+                # Check if the page was fetched and parsed with the correct arguments
+                mock_fetch.assert_called_once_with(
+                    self.obj.cycle_url + self.obj.url_suffix(section="AD-0.0"))
+                mock_read_html.assert_called_once()
+                assert mock_read_html.call_args.args[0].getvalue() == "<table/>"
+                assert mock_read_html.call_args.kwargs == {"flavor": "bs4", "match": ".+"}
 
                 # Check if the method returned the expected result
                 assert result == mock_tables
 
         def test_get_table_no_tables(self):
             # Mock the pd.read_html method to return an empty list
-            with patch("pandas.read_html", return_value=[]) as mock_read_html:
+            with patch("pandas.read_html", return_value=[]) as mock_read_html, \
+                    patch.object(self.obj, "fetch", return_value="<table/>") as mock_fetch:
                 # Call the get_table() method and expect an exception to be raised
                 with pytest.raises(functions.NoUrlDataFoundError) as exc_info:
                     self.obj.get_table(section="AD-0.0", match=".+")
 
-                # Check if pd.read_html was called with the correct arguments
-                mock_read_html.assert_called_once_with(
-                    self.obj.cycle_url + self.obj.url_suffix(section="AD-0.0"),
-                    flavor="bs4",
-                    match=".+"
-                    )
+                # Check if the page was fetched and parsed with the correct arguments
+                mock_fetch.assert_called_once_with(
+                    self.obj.cycle_url + self.obj.url_suffix(section="AD-0.0"))
+                mock_read_html.assert_called_once()
+                assert mock_read_html.call_args.kwargs == {"flavor": "bs4", "match": ".+"}
 
                 # Check if the correct exception was raised
                 error = (f"No data found at the given url - {self.obj.cycle_url}"